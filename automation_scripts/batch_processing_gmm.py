@@ -13,11 +13,46 @@ payment frequency and generates grace period dates, automating complex operation
 workflows.
 """
 
+import argparse
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from pathlib import Path
 
+from automation_scripts.renewal_calendar import (
+    ScheduleCache,
+    decode_signature,
+    encode_signature,
+    format_dates,
+    horizon_months,
+    long_schedule_frame,
+    month_end_clamp,
+)
+from automation_scripts.input_validation import (
+    check_issue_dates,
+    collect_errors,
+    error_report_path,
+    normalized_text,
+    row_errors,
+    write_error_report,
+)
+from automation_scripts.instrumentation import (
+    add_profiling_arguments,
+    configure,
+    profile_stage,
+    span,
+    tally,
+)
+from automation_scripts.storage import (
+    EXCEL_MAX_ROWS,
+    TableWriter,
+    add_storage_arguments,
+    finish_output,
+    is_excel,
+    iter_table_batches,
+    read_table,
+    with_format,
+)
+
 
 # ---------------------
 # CONFIGURACIÓN GENERAL
@@ -25,164 +60,321 @@ from pathlib import Path
 START_YEAR = 2025
 END_YEAR = 2026
 
-START_DATE = datetime(START_YEAR, 1, 1)
-END_DATE = datetime(END_YEAR, 12, 31)
+EXCEL_DATE_FORMAT = "DD/MM/YYYY"
+DATE_FORMAT = "%d/%m/%Y"
+
+LONG_BATCH_SIZE = 10_000  # Pólizas por bloque al generar el formato largo
+LAYOUTS = ["wide", "long"]
+
+# Forma de Pago -> (columnas de salida, intervalo en meses)
+PAYMENT_COLUMNS = {
+    "mensual": (24, 1),
+    "bimestral": (12, 2),
+    "trimestral": (8, 3),
+    "semestral": (4, 6),
+    "anual": (2, 12),
+}
 
 
 # ---------------------
-# FUNCIONES AUXILIARES
+# MOTOR VECTORIZADO
 # ---------------------
-def parse_issue_date(value: str) -> datetime:
+def coerce_payment_day(value) -> int:
     """
-    Convierte valores de Fecha Emisión a datetime soportando múltiples formatos.
+    Convierte un Día de Cobro a entero; devuelve 0 si no es válido.
     """
-    value = str(value).strip()
-    if not value:
-        raise ValueError("Fecha Emisión vacía")
+    try:
+        return int(value)
+    except Exception:
+        return 0
 
-    formats = ["%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
 
-    for fmt in formats:
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
+def resolve_payment_days(issue_dates: pd.Series, payment_days: pd.Series) -> np.ndarray:
+    """
+    Día de cobro efectivo de cada fila: el Día de Cobro si es un entero
+    positivo; si falta, no es numérico o es 0 o negativo, el día de la
+    Fecha Emisión.
+    """
+    if pd.api.types.is_numeric_dtype(payment_days):
+        raw = np.trunc(payment_days.to_numpy(dtype="float64", na_value=np.nan))
+        raw = np.where(np.isfinite(raw), raw, 0)
+    else:
+        raw = np.fromiter(
+            (coerce_payment_day(value) for value in payment_days),
+            dtype="float64",
+            count=len(payment_days),
+        )
 
-    return pd.to_datetime(value, dayfirst=True, errors="raise").to_pydatetime()
+    # Cualquier día mayor a 31 se ajusta al fin de mes, así que 31 basta.
+    raw = np.clip(raw, -1, 31).astype("int64")
+    return np.where(raw > 0, raw, issue_dates.dt.day.to_numpy())
 
 
-def adjust_day(year: int, month: int, day: int) -> datetime:
+def payment_columns(start_year: int = START_YEAR, end_year: int = END_YEAR) -> dict:
     """
-    Ajusta el día al último día del mes si el día solicitado no existe.
+    Columnas de salida por forma de pago para un horizonte dado; con el
+    horizonte por defecto coincide con PAYMENT_COLUMNS.
     """
-    base = datetime(year, month, 1)
-    last_day = (base + relativedelta(day=31)).day
-    return base.replace(day=min(day, last_day))
+    months = horizon_months(start_year, end_year)
+    return {
+        freq: (-(-months // step), step)
+        for freq, (_, step) in PAYMENT_COLUMNS.items()
+    }
 
 
-def get_payment_day(issue_date: datetime, payment_day) -> int:
+def schedule_matrix(
+    issue_months: np.ndarray,
+    payment_days: np.ndarray,
+    step: int,
+    count: int,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+) -> np.ndarray:
     """
-    Regla de negocio:
-    - Si hay Día de Cobro, se utiliza.
-    - Si no, se toma el día de la Fecha Emisión.
+    Genera la matriz (filas x count) de fechas de renovación con intervalo
+    de `step` meses; las posiciones fuera del horizonte quedan en NaT.
     """
-    try:
-        payment_day = int(payment_day)
-        return payment_day if payment_day > 0 else issue_date.day
-    except Exception:
-        return issue_date.day
-
-
-def generate_dates(issue_date: datetime, payment_day: int, step: int) -> list:
+    offsets = issue_months[:, None] + step * np.arange(count)[None, :]
+    horizon = horizon_months(start_year, end_year)
+
+    months = np.datetime64(f"{start_year}-01", "M") + offsets
+    dates = month_end_clamp(months, payment_days[:, None])
+    return np.where(offsets < horizon, dates, np.datetime64("NaT", "D"))
+
+
+def signature_schedule(
+    codes: np.ndarray,
+    step: int,
+    count: int,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    date_format: str | None = None,
+) -> np.ndarray:
     """
-    Genera fechas de renovación con un intervalo en meses.
+    Calendario de cada firma (mes de emisión, día de cobro): las `count`
+    cuotas seguidas de Fecha Renovación y los amparos de 30 y 45 días.
     """
-    dates = []
-    year = START_YEAR
-    month = issue_date.month
-    current = adjust_day(year, month, payment_day)
-
-    while current < START_DATE:
-        month += step
-        if month > 12:
-            month -= 12
-            year += 1
-        current = adjust_day(year, month, payment_day)
+    issue_months, payment_days = decode_signature(codes, 2)
+    installments = schedule_matrix(issue_months, payment_days, step, count, start_year, end_year)
+    # La primera cuota siempre cae en el mes de emisión del primer año.
+    renewal = month_end_clamp(
+        np.datetime64(f"{start_year}-01", "M") + issue_months, payment_days
+    )
+    dates = np.column_stack([installments, renewal, renewal + 30, renewal + 45])
+    return format_dates(dates, date_format)
 
-    while current <= END_DATE:
-        dates.append(current)
-        month += step
-        if month > 12:
-            month -= 12
-            year += 1
-        current = adjust_day(year, month, payment_day)
 
-    return dates
+def schedule_inputs(df: pd.DataFrame, issue_dates: pd.Series) -> tuple:
+    """
+    Prepara forma de pago, día de cobro efectivo y mes de emisión (base 0)
+    para todas las filas. Las filas deben venir revisadas por validate_rows.
+    """
+    frequencies = normalized_text(df["Forma de Pago"])
+    payment_days = resolve_payment_days(issue_dates, df["Día de Cobro"])
+    issue_months = issue_dates.dt.month.to_numpy() - 1
 
+    return frequencies, payment_days, issue_months
 
-def generate_annual_dates(issue_date: datetime, payment_day: int) -> list:
-    dates = []
-    for year in [START_YEAR, END_YEAR]:
-        date = adjust_day(year, issue_date.month, payment_day)
-        if START_DATE <= date <= END_DATE:
-            dates.append(date)
-    return dates
 
+def build_schedule(
+    df: pd.DataFrame,
+    issue_dates: pd.Series,
+    date_format: str | None = DATE_FORMAT,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    cache: ScheduleCache | None = None,
+) -> pd.DataFrame:
+    """
+    Calcula cuotas, Fecha Renovación y amparos para todo el DataFrame a la vez
+    (formato ancho: una columna por cuota).
+    Con date_format=None las columnas de fechas quedan como datetime64.
 
-def generate_grace_periods(renewal_date: datetime) -> tuple:
+    Cada firma (forma de pago, mes de emisión, día de cobro) se calcula y
+    formatea una sola vez y se reparte a sus filas; `cache` permite
+    conservar las firmas entre lotes.
     """
-    Calcula amparos de 30 y 45 días desde la fecha de renovación.
+    frequencies, payment_days, issue_months = schedule_inputs(df, issue_dates)
+    cache = cache if cache is not None else ScheduleCache()
+    codes = encode_signature(issue_months, payment_days)
+
+    size = len(df)
+    dtype = object if date_format else "datetime64[D]"
+    empty = "" if date_format else np.datetime64("NaT", "D")
+    schedule = {}
+    renewals = np.full((size, 3), empty, dtype=dtype)
+    with span("generate_schedules"):
+        for freq, (count, step) in payment_columns(start_year, end_year).items():
+            mask = frequencies == freq
+            rows = cache.rows(
+                ("wide", freq, start_year, end_year, date_format),
+                codes[mask],
+                lambda unique, step=step, count=count: signature_schedule(
+                    unique, step, count, start_year, end_year, date_format
+                ),
+            )
+            for i in range(count):
+                column = np.full(size, empty, dtype=dtype)
+                column[mask] = rows[:, i]
+                schedule[f"{freq.capitalize()}_{i+1}"] = column
+            renewals[mask] = rows[:, count:]
+
+        schedule["Fecha Renovación"] = renewals[:, 0]
+        schedule["Amparo_30_días"] = renewals[:, 1]
+        schedule["Amparo_15_días"] = renewals[:, 2]
+
+    # Todas las columnas nuevas se agregan de una vez (horizontes largos
+    # generan cientos de columnas).
+    with span("assign"):
+        schedule = pd.DataFrame(schedule, index=df.index)
+        return pd.concat([df.drop(columns=schedule.columns, errors="ignore"), schedule], axis=1)
+
+
+def iter_schedule_long(
+    df: pd.DataFrame,
+    issue_dates: pd.Series,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    batch_size: int = LONG_BATCH_SIZE,
+    cache: ScheduleCache | None = None,
+):
     """
-    return (
-        renewal_date + timedelta(days=30),
-        renewal_date + timedelta(days=45),
-    )
+    Genera el calendario en formato largo (póliza, cuota, fecha de pago,
+    amparos de 30 y 45 días) por bloques de batch_size pólizas, sin límite
+    de columnas: cualquier horizonte cuesta solo un bloque en memoria.
+    """
+    frequencies, payment_days, issue_months = schedule_inputs(df, issue_dates)
+    cache = cache if cache is not None else ScheduleCache()
+    codes = encode_signature(issue_months, payment_days)
+    columns = payment_columns(start_year, end_year)
+
+    # Sin filas válidas se genera igual un bloque vacío con los encabezados.
+    for start in range(0, max(len(df), 1), batch_size):
+        block = slice(start, start + batch_size)
+        positions, installments, due_dates = [], [], []
+
+        with span("generate_schedules"):
+            for freq, (count, step) in columns.items():
+                rows = np.flatnonzero(frequencies[block] == freq) + start
+                matrix = cache.rows(
+                    ("long", freq, start_year, end_year),
+                    codes[rows],
+                    lambda unique, step=step, count=count: schedule_matrix(
+                        *decode_signature(unique, 2), step, count, start_year, end_year
+                    ),
+                )
+                row_idx, col_idx = np.nonzero(~np.isnat(matrix))
+                positions.append(rows[row_idx])
+                installments.append(col_idx + 1)
+                due_dates.append(matrix[row_idx, col_idx])
+
+        with span("assign"):
+            frame = long_schedule_frame(
+                df,
+                np.concatenate(positions),
+                np.concatenate(installments),
+                np.concatenate(due_dates),
+            )
+        yield frame
 
 
 # ---------------------
 # PROCESO PRINCIPAL
 # ---------------------
-def process_file(input_path: Path, output_path: Path) -> None:
-    df = pd.read_excel(input_path, dtype={"Fecha Emisión": str})
-
-    issue_dates = df["Fecha Emisión"].astype(str).apply(parse_issue_date)
-
-    payment_columns = {
-        "mensual": (24, 1),
-        "bimestral": (12, 2),
-        "trimestral": (8, 3),
-        "semestral": (4, 6),
-        "anual": (2, 12),
-    }
-
-    for freq, (count, _) in payment_columns.items():
-        for i in range(count):
-            df[f"{freq.capitalize()}_{i+1}"] = ""
-
-    df["Fecha Renovación"] = ""
-    df["Amparo_30_días"] = ""
-    df["Amparo_15_días"] = ""
+def validate_rows(df: pd.DataFrame) -> tuple[pd.Series, np.ndarray, pd.DataFrame]:
+    """
+    Revisa Fecha Emisión y Forma de Pago de todas las filas a la vez y
+    devuelve las fechas de emisión, la máscara de filas válidas y el
+    reporte de errores. Un Día de Cobro vacío o no numérico no es error:
+    se usa el día de la Fecha Emisión (resolve_payment_days).
+    """
+    issue_dates, date_errors = check_issue_dates(df)
+    unknown = ~np.isin(normalized_text(df["Forma de Pago"]), list(PAYMENT_COLUMNS))
+    valid, report = collect_errors(
+        df, [date_errors, row_errors(df, "Forma de Pago", unknown, "Forma de Pago desconocida")]
+    )
+    return issue_dates, valid, report
 
-    for idx, row in df.iterrows():
-        issue_date = issue_dates.iloc[idx]
-        payment_day = get_payment_day(issue_date, row["Día de Cobro"])
-        frequency = str(row["Forma de Pago"]).strip().lower()
 
-        if frequency not in payment_columns:
-            raise ValueError(f"Forma de Pago desconocida en fila {idx + 1}")
+def process_file(
+    input_path: Path,
+    output_path: Path,
+    batch_size: int | None = None,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    layout: str = "wide",
+) -> None:
+    """
+    Las fechas se guardan tipadas en todos los formatos; en Excel como
+    celdas de fecha con formato dd/mm/aaaa.
 
-        count, step = payment_columns[frequency]
+    Con batch_size la entrada se lee por lotes y cada lote se calcula y
+    agrega a la salida, manteniendo la memoria constante. layout="long"
+    escribe una fila por póliza y cuota en lugar de una columna por cuota;
+    en Excel la salida falla si no cabe en una hoja (EXCEL_MAX_ROWS).
 
-        dates = (
-            generate_annual_dates(issue_date, payment_day)
-            if frequency == "anual"
-            else generate_dates(issue_date, payment_day, step)
+    Las filas con errores (validate_rows) no detienen el proceso: se omiten
+    y se listan en <salida>_errores junto al archivo de salida.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Formato de salida no soportado: {layout}")
+    if layout == "long" and is_excel(output_path):
+        print(
+            f"⚠️ Formato largo en Excel: una hoja admite {EXCEL_MAX_ROWS - 1:,} filas; "
+            "para carteras grandes use --format csv, parquet o arrow"
         )
 
-        if not dates:
-            raise ValueError(f"No se generaron fechas en la fila {idx + 1}")
-
-        renewal_date = dates[0]
-        df.at[idx, "Fecha Renovación"] = renewal_date.strftime("%d/%m/%Y")
-
-        g30, g15 = generate_grace_periods(renewal_date)
-        df.at[idx, "Amparo_30_días"] = g30.strftime("%d/%m/%Y")
-        df.at[idx, "Amparo_15_días"] = g15.strftime("%d/%m/%Y")
-
-        for i, date in enumerate(dates[:count]):
-            df.at[idx, f"{frequency.capitalize()}_{i+1}"] = date.strftime("%d/%m/%Y")
+    excel_dtype = {"Fecha Emisión": str}
+    batches = (
+        iter_table_batches(input_path, batch_size, excel_dtype)
+        if batch_size
+        else [read_table(input_path, excel_dtype=excel_dtype)]
+    )
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(output_path, index=False)
+    cache = ScheduleCache()
+    errors = []
+    with TableWriter(output_path, EXCEL_DATE_FORMAT) as writer:
+        for df in batches:
+            tally("rows", len(df))
+            issue_dates, valid, report = validate_rows(df)
+            errors.append(report)
+            if not valid.all():
+                df, issue_dates = df[valid], issue_dates[valid]
+            if layout == "long":
+                for block in iter_schedule_long(
+                    df, issue_dates, start_year, end_year, cache=cache
+                ):
+                    writer.write(block)
+            else:
+                writer.write(build_schedule(df, issue_dates, None, start_year, end_year, cache))
 
     print(f"✅ Archivo generado exitosamente: {output_path}")
+    invalid = write_error_report(errors, output_path)
+    if invalid:
+        print(f"⚠️ {invalid:,} filas con error omitidas: {error_report_path(output_path)}")
+    print(cache.report())
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Renovaciones y amparos GMM/Tradicional.")
+    add_storage_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=None, help="Filas por lote (modo streaming)")
+    parser.add_argument("--start-year", type=int, default=START_YEAR, help="Primer año del horizonte")
+    parser.add_argument("--end-year", type=int, default=END_YEAR, help="Último año del horizonte")
+    parser.add_argument("--layout", choices=LAYOUTS, default="wide", help="Una columna por cuota o una fila por cuota")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
     input_file = Path("data/raw/Renovaciones_GMM_Tradicional.xlsx")
-    output_file = Path("data/processed/Renovaciones_GMM_Tradicional_processed.xlsx")
+    output_file = with_format(
+        Path("data/processed/Renovaciones_GMM_Tradicional_processed.xlsx"), args.format
+    )
 
-    process_file(input_file, output_file)
+    with profile_stage("gmm_renewals"):
+        process_file(
+            input_file, output_file, args.batch_size, args.start_year, args.end_year, args.layout
+        )
+        finish_output(output_file, args, EXCEL_DATE_FORMAT)
 
 
 if __name__ == "__main__":
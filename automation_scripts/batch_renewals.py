@@ -0,0 +1,242 @@
+"""
+Procesamiento por lotes de libros de renovaciones.
+
+Este módulo ejecuta el cálculo de renovaciones (GMM/Tradicional o
+productos flexibles) sobre todos los libros de una carpeta o patrón, uno
+por sucursal, en procesos paralelos con un máximo de procesos
+simultáneos. Reporta estado, tiempo y memoria de cada archivo y puede
+unir los resultados en una salida consolidada leyéndolos por lotes.
+
+Batch renewal workbook runner.
+
+This module runs the renewal calculation (GMM/Traditional or flexible
+products) over every workbook in a folder or glob, one per branch, in
+parallel worker processes with bounded concurrency. It reports each
+file's status, time and memory and can merge the results into one
+consolidated output, reading them back in batches.
+"""
+
+import argparse
+import glob
+import importlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from automation_scripts.resource_usage import isolated_executor, peak_rss_mb
+from automation_scripts.storage import (
+    DEFAULT_BATCH_SIZE,
+    FORMAT_SUFFIXES,
+    SUFFIX_FORMATS,
+    TableWriter,
+    iter_table_batches,
+)
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+SCRIPTS = {
+    "gmm": "automation_scripts.batch_processing_gmm",
+    "flexibles": "business_calculations.primas_flexibles_calculation",
+}
+LAYOUTS = ["wide", "long"]
+
+OUTPUT_DIR = Path("data/processed/lotes")
+SOURCE_COLUMN = "Archivo"  # Libro de origen de cada fila consolidada
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def find_workbooks(patterns: list[str]) -> list[Path]:
+    """
+    Libros de entrada a partir de carpetas o patrones glob, ordenados y
+    sin repetir; se omiten los archivos temporales de Excel (~$...).
+    """
+    workbooks = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        candidates = path.iterdir() if path.is_dir() else map(Path, glob.glob(pattern, recursive=True))
+        workbooks.update(
+            candidate for candidate in candidates
+            if candidate.is_file()
+            and candidate.suffix.lower() in SUFFIX_FORMATS
+            and not candidate.name.startswith("~$")
+        )
+    return sorted(workbooks)
+
+
+def output_paths(workbooks: list[Path], output_dir: Path, fmt: str) -> list[Path]:
+    """
+    Archivo de salida de cada libro: <nombre>_processed.<formato>.
+    """
+    outputs = [output_dir / f"{workbook.stem}_processed{FORMAT_SUFFIXES[fmt]}" for workbook in workbooks]
+    repeated = {output for output in outputs if outputs.count(output) > 1}
+    if repeated:
+        raise ValueError(f"Libros con el mismo nombre: {sorted(path.name for path in repeated)}")
+    return outputs
+
+
+# ---------------------
+# EJECUCIÓN EN PARALELO
+# ---------------------
+def run_workbook(module_name: str, input_path: Path, output_path: Path, options: dict) -> tuple[float, float | None]:
+    """
+    Ejecuta process_file del script sobre un libro dentro de un proceso
+    del pool y devuelve (segundos, RSS pico en MB). Los mensajes del
+    script se descartan para no mezclar la salida de varios procesos; si
+    falla, se borra la salida incompleta.
+    """
+    module = importlib.import_module(module_name)
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(io.StringIO()):
+            module.process_file(input_path, output_path, **options)
+    except BaseException:
+        output_path.unlink(missing_ok=True)
+        raise
+    return time.perf_counter() - start, peak_rss_mb()
+
+
+def run_batch(
+    script: str,
+    workbooks: list[Path],
+    outputs: list[Path],
+    workers: int,
+    options: dict,
+) -> list[tuple[Path, str, float | None, float | None]]:
+    """
+    Procesa todos los libros con a lo sumo `workers` procesos a la vez;
+    cada libro corre en un proceso nuevo, así un error o un libro grande
+    no afecta a los demás. Devuelve (libro, estado, segundos, RSS pico)
+    en el orden de entrada.
+    """
+    module_name = SCRIPTS[script]
+    results = {}
+
+    with isolated_executor(workers, [module_name]) as executor:
+        futures = {
+            executor.submit(run_workbook, module_name, workbook, output, options): workbook
+            for workbook, output in zip(workbooks, outputs)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            workbook = futures[future]
+            try:
+                seconds, peak = future.result()
+            except Exception as error:
+                print(f"⚠️ [{done}/{len(futures)}] {workbook.name}: {error}")
+                results[workbook] = (workbook, "error", None, None)
+                continue
+            print(f"✅ [{done}/{len(futures)}] {workbook.name} ({seconds:,.2f} s)")
+            results[workbook] = (workbook, "ok", seconds, peak)
+
+    return [results[workbook] for workbook in workbooks]
+
+
+def consolidate(
+    sources: list[tuple[Path, Path]],
+    output_path: Path,
+    excel_date_format: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Une las salidas (libro, salida) en un solo archivo leyendo cada una por
+    lotes, con una columna Archivo que indica el libro de origen. Solo hay
+    un lote en memoria a la vez. Devuelve el número de filas escritas; si
+    falla, se borra la salida incompleta.
+    """
+    try:
+        with TableWriter(output_path, excel_date_format) as writer:
+            for workbook, path in sources:
+                for batch in iter_table_batches(path, batch_size):
+                    batch.insert(0, SOURCE_COLUMN, workbook.name)
+                    writer.write(batch)
+    except BaseException:
+        output_path.unlink(missing_ok=True)
+        raise
+    return writer.rows
+
+
+def print_summary(results: list, elapsed: float) -> None:
+    print("\n⏱️ Resumen por libro")
+    width = max([len(workbook.name) for workbook, *_ in results] + [7]) + 2
+    print(f"{'Libro':<{width}}{'Estado':<8}{'Tiempo (s)':>12}{'RSS pico (MB)':>16}")
+    for workbook, status, seconds, peak in results:
+        seconds = f"{seconds:,.2f}" if seconds is not None else "-"
+        peak = f"{peak:,.1f}" if peak is not None else "-"
+        print(f"{workbook.name:<{width}}{status:<8}{seconds:>12}{peak:>16}")
+    print(f"{'Total':<{width + 8}}{elapsed:>12,.2f}")
+
+
+# ---------------------
+# PROCESO PRINCIPAL
+# ---------------------
+def main():
+    parser = argparse.ArgumentParser(description="Renovaciones por lotes de libros.")
+    parser.add_argument("script", choices=list(SCRIPTS), help="Cálculo de renovaciones a ejecutar")
+    parser.add_argument("inputs", nargs="+", help="Carpetas o patrones glob de libros de entrada")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="Carpeta de salidas por libro")
+    parser.add_argument("--format", choices=sorted(FORMAT_SUFFIXES), default="excel", help="Formato de las salidas por libro")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Libros procesados a la vez")
+    parser.add_argument("--consolidate", type=Path, help="Salida consolidada (.xlsx, .csv, .parquet, .arrow)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Filas por lote dentro de cada libro")
+    parser.add_argument("--start-year", type=int, default=None, help="Primer año del horizonte")
+    parser.add_argument("--end-year", type=int, default=None, help="Último año del horizonte")
+    parser.add_argument("--layout", choices=LAYOUTS, default="wide", help="Una columna por cuota o una fila por cuota")
+    args = parser.parse_args()
+
+    if args.consolidate and args.consolidate.suffix.lower() not in SUFFIX_FORMATS:
+        parser.error(f"Formato de salida consolidada no soportado: {args.consolidate.name}")
+
+    workbooks = find_workbooks(args.inputs)
+    if not workbooks:
+        parser.error("No se encontraron libros de entrada")
+    try:
+        outputs = output_paths(workbooks, args.output_dir, args.format)
+    except ValueError as error:
+        parser.error(str(error))
+
+    options = {"batch_size": args.batch_size, "layout": args.layout}
+    if args.start_year is not None:
+        options["start_year"] = args.start_year
+    if args.end_year is not None:
+        options["end_year"] = args.end_year
+
+    print(f"🚀 {len(workbooks)} libros, {min(args.workers, len(workbooks))} procesos\n")
+    start = time.perf_counter()
+    results = run_batch(args.script, workbooks, outputs, args.workers, options)
+
+    consolidation_error = None
+    if args.consolidate:
+        excel_date_format = importlib.import_module(SCRIPTS[args.script]).EXCEL_DATE_FORMAT
+        succeeded = [
+            (workbook, output)
+            for (workbook, status, *_), output in zip(results, outputs)
+            if status == "ok"
+        ]
+        try:
+            rows = consolidate(succeeded, args.consolidate, excel_date_format)
+        except Exception as error:
+            consolidation_error = error
+        else:
+            print(f"\n📦 Salida consolidada: {args.consolidate} ({rows:,} filas, {len(succeeded)} libros)")
+
+    print_summary(results, time.perf_counter() - start)
+
+    failed = sum(status == "error" for _, status, *_ in results)
+    if failed:
+        print(f"\n⚠️ {failed} libros con error.")
+    if consolidation_error is not None:
+        print(f"\n⚠️ Error en la salida consolidada {args.consolidate}: {consolidation_error}")
+    if failed or consolidation_error is not None:
+        sys.exit(1)
+    print("\n✅ Lote completado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Interpretación vectorizada de fechas de emisión.
+
+Este módulo convierte columnas completas de Fecha Emisión a datetime64
+probando cada formato conocido sobre todas las fechas pendientes a la vez,
+interpretando cada texto distinto una sola vez y reportando las filas que
+no pudieron convertirse.
+
+Vectorized issue date parsing.
+
+This module converts whole Fecha Emisión columns to datetime64, trying
+each known format over all still-unparsed values at once, parsing each
+distinct string only once and reporting the rows that failed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from automation_scripts.instrumentation import span
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+ISSUE_DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+
+
+# ---------------------
+# FUNCIONES PRINCIPALES
+# ---------------------
+def parse_issue_dates(values: pd.Series, formats: list[str] = ISSUE_DATE_FORMATS) -> tuple[pd.Series, pd.DataFrame]:
+    """
+    Convierte una columna de fechas de emisión a datetime64.
+
+    Cada formato se prueba en orden, como en la conversión fila por fila
+    original, y lo que no coincide se interpreta con dayfirst=True. Devuelve
+    la columna tipada (NaT donde falló) y un reporte con fila, valor y
+    motivo de cada fecha inválida.
+    """
+    with span("parse_dates"):
+        return _parse_issue_dates(values, formats)
+
+
+def _parse_issue_dates(values: pd.Series, formats: list[str]) -> tuple[pd.Series, pd.DataFrame]:
+    raw = values.astype(str).str.strip().where(values.notna())
+    codes, uniques = pd.factorize(raw)
+    uniques = pd.Series(uniques, dtype=object)
+
+    parsed = np.full(len(uniques), np.datetime64("NaT"), dtype="datetime64[ns]")
+    remaining = (uniques != "").to_numpy().copy()
+
+    for fmt in formats:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(uniques[remaining], format=fmt, errors="coerce")
+        parsed[remaining] = attempt.to_numpy("datetime64[ns]")
+        remaining &= np.isnat(parsed)
+
+    for pos in np.flatnonzero(remaining):
+        parsed[pos] = pd.to_datetime(uniques[pos], dayfirst=True, errors="coerce").to_datetime64()
+
+    dates = np.full(len(raw), np.datetime64("NaT"), dtype="datetime64[ns]")
+    known = codes >= 0
+    dates[known] = parsed[codes[known]]
+    result = pd.Series(dates, index=values.index, name=values.name)
+
+    failed = result.isna()
+    report = pd.DataFrame({
+        "Fila": values.index[failed] + 1,
+        "Fecha Emisión": raw[failed].to_numpy(),
+        "Motivo": np.where(
+            raw[failed].fillna("") == "",
+            "Fecha Emisión vacía",
+            "Formato de fecha no reconocido",
+        ),
+    })
+
+    return result, report
+
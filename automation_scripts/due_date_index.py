@@ -0,0 +1,459 @@
+"""
+Índice de vencimientos de las renovaciones.
+
+Este módulo reúne las salidas de renovaciones GMM/Tradicional y de
+productos flexibles (formato ancho o largo, en cualquier formato de
+almacenamiento) en un índice SQLite ordenado por fecha de pago, para
+consultar en milisegundos qué pólizas vencen o están en su periodo de
+amparo en un día o rango dado. El índice se guarda en disco y solo se
+reconstruye la salida que cambió desde la última consulta.
+
+Renewal due-date index.
+
+This module loads the GMM/Traditional and flexible products renewal
+outputs (wide or long layout, any storage format) into a SQLite index
+sorted by due date, so listing the policies due or in their grace window
+on a given day or range takes milliseconds. The index persists on disk
+and only the outputs that changed since the last query are reindexed.
+"""
+
+import argparse
+import re
+import sqlite3
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from pathlib import Path
+
+from automation_scripts.batch_renewals import SOURCE_COLUMN
+from automation_scripts.date_parsing import parse_issue_dates
+from automation_scripts.instrumentation import span
+from automation_scripts.renewal_calendar import LONG_COLUMNS, POLICY_COLUMNS
+from automation_scripts.storage import FORMAT_SUFFIXES, read_table, with_format, write_table
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+SOURCES = {
+    "gmm": Path("data/processed/Renovaciones_GMM_Tradicional_processed.xlsx"),
+    "flexibles": Path("data/processed/Renovaciones_Flexibles_processed.xlsx"),
+}
+DEFAULT_INDEX = Path("data/processed/indice_vencimientos.sqlite")
+INDEX_VERSION = "2"  # Cambiarla obliga a reconstruir el índice
+
+RENEWAL_COLUMN = "Fecha Renovación"
+GRACE_COLUMNS = LONG_COLUMNS[2:]  # Amparo_30_días, Amparo_15_días
+INSTALLMENT_COLUMN = re.compile(r"^(Mensual|Bimestral|Trimestral|Semestral|Anual)(_\d+)?$")
+
+RESULT_COLUMNS = [
+    "Origen", SOURCE_COLUMN, "Fila", "Póliza", "Forma de Pago", "Concepto",
+    "Fecha de Pago", *GRACE_COLUMNS,
+]
+DATE_COLUMNS = ["Fecha de Pago", *GRACE_COLUMNS]
+CLI_DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"]
+EPOCH = date(1970, 1, 1)
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def parse_day(value: str) -> date:
+    """
+    Fecha de la línea de comandos en dd/mm/aaaa, aaaa-mm-dd o dd-mm-aaaa.
+    """
+    for fmt in CLI_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Fecha no reconocida: {value!r}")
+
+
+def resolve_source(path: Path) -> Path | None:
+    """
+    Salida más reciente entre las variantes .xlsx/.csv/.parquet/.arrow de
+    un archivo (cada script puede escribir cualquiera con --format).
+    """
+    candidates = [with_format(path, fmt) for fmt in FORMAT_SUFFIXES]
+    existing = [candidate for candidate in candidates if candidate.exists()]
+    return max(existing, key=lambda candidate: candidate.stat().st_mtime_ns, default=None)
+
+
+def to_days(values: pd.Series) -> np.ndarray:
+    """
+    Convierte una columna de fechas (tipada o texto) a datetime64[D];
+    las celdas vacías o inválidas quedan en NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy("datetime64[D]")
+    dates, _ = parse_issue_dates(values)
+    return dates.to_numpy("datetime64[D]")
+
+
+def day_numbers(dates: np.ndarray) -> list:
+    """
+    Fechas como días desde 1970-01-01 (enteros ordenables en SQLite);
+    NaT se guarda como NULL.
+    """
+    numbers = dates.astype("int64").astype(object)
+    numbers[np.isnat(dates)] = None
+    return numbers.tolist()
+
+
+def day_number(day: date) -> int:
+    return (day - EPOCH).days
+
+
+def text_column(df: pd.DataFrame, names: list[str]) -> np.ndarray:
+    """
+    Valores como texto de la primera columna existente de `names` ("" si
+    no hay ninguna).
+    """
+    column = next((name for name in names if name in df.columns), None)
+    if column is None:
+        return np.full(len(df), "", dtype=object)
+    return df[column].astype(str).where(df[column].notna(), "").to_numpy(dtype=object)
+
+
+# ---------------------
+# EXTRACCIÓN DE VENCIMIENTOS
+# ---------------------
+def schedule_events(df: pd.DataFrame) -> dict:
+    """
+    Convierte una salida de renovaciones en vencimientos: una entrada por
+    póliza y fecha de pago con sus amparos (si los tiene). `fila` es la
+    fila de la salida (1 = primera fila de datos) en ambos formatos, así
+    que es única dentro de un archivo aunque una salida consolidada repita
+    los números de fila de entrada de cada libro.
+
+    En formato largo cada cuota ya trae sus amparos. En formato ancho los
+    amparos corresponden a Fecha Renovación: se asignan a la cuota que cae
+    ese día o, si ninguna coincide, la renovación se agrega como vencimiento
+    propio.
+    """
+    policies = text_column(df, POLICY_COLUMNS)
+    payment_types = text_column(df, ["Forma de Pago"])
+    workbooks = text_column(df, [SOURCE_COLUMN])
+    output_rows = np.arange(len(df)) + 1
+
+    if LONG_COLUMNS[0] in df.columns:
+        installments = df[LONG_COLUMNS[0]].to_numpy()
+        concepts = np.char.add("Cuota ", installments.astype(str)).astype(object)
+        return {
+            "archivo": workbooks,
+            "fila": output_rows,
+            "poliza": policies,
+            "forma_pago": payment_types,
+            "concepto": concepts,
+            "fecha": to_days(df[LONG_COLUMNS[1]]),
+            "amparo_30": to_days(df[GRACE_COLUMNS[0]]),
+            "amparo_15": to_days(df[GRACE_COLUMNS[1]]),
+        }
+
+    nat = np.datetime64("NaT", "D")
+    size = len(df)
+    columns = [column for column in df.columns if INSTALLMENT_COLUMN.match(str(column))]
+    matrix = (
+        np.column_stack([to_days(df[column]) for column in columns])
+        if columns else np.empty((size, 0), dtype="datetime64[D]")
+    )
+    renewal, grace_30, grace_15 = (
+        to_days(df[column]) if column in df.columns else np.full(size, nat)
+        for column in [RENEWAL_COLUMN, *GRACE_COLUMNS]
+    )
+
+    row_idx, col_idx = np.nonzero(~np.isnat(matrix))
+    dates = matrix[row_idx, col_idx]
+    concepts = np.array(columns, dtype=object)[col_idx]
+
+    # La renovación suele coincidir con una cuota: esa cuota recibe los amparos.
+    matched = dates == renewal[row_idx]
+    amparo_30 = np.where(matched, grace_30[row_idx], nat)
+    amparo_15 = np.where(matched, grace_15[row_idx], nat)
+
+    covered = np.zeros(size, dtype=bool)
+    covered[row_idx[matched]] = True
+    extra = np.flatnonzero(~covered & ~np.isnat(renewal))
+
+    row_idx = np.concatenate([row_idx, extra])
+    return {
+        "archivo": workbooks[row_idx],
+        "fila": output_rows[row_idx],
+        "poliza": policies[row_idx],
+        "forma_pago": payment_types[row_idx],
+        "concepto": np.concatenate([concepts, np.full(len(extra), RENEWAL_COLUMN, dtype=object)]),
+        "fecha": np.concatenate([dates, renewal[extra]]),
+        "amparo_30": np.concatenate([amparo_30, grace_30[extra]]),
+        "amparo_15": np.concatenate([amparo_15, grace_15[extra]]),
+    }
+
+
+# ---------------------
+# ÍNDICE DE VENCIMIENTOS
+# ---------------------
+class DueDateIndex:
+    """
+    Tabla `events` (origen, libro de origen, fila de la salida, póliza,
+    forma de pago, concepto, fecha de pago y fin de cada amparo) con
+    índice por fecha de pago.
+
+    Los amparos son intervalos (fecha de pago, fin del amparo]; como su
+    duración máxima se conoce al indexar, "en amparo el día X" se resuelve
+    con un recorrido del índice sobre [X - duración máxima, X) y un filtro
+    por el fin del amparo.
+
+    Uso típico:
+        index = DueDateIndex(index_path)
+        index.refresh({"gmm": ruta_gmm, "flexibles": ruta_flex})
+        index.due(date(2025, 3, 1)), index.in_grace(date(2025, 3, 1))
+        index.close()
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+
+        if self._version() != INDEX_VERSION:
+            self.connection.executescript(
+                """
+                DROP TABLE IF EXISTS meta;
+                DROP TABLE IF EXISTS sources;
+                DROP TABLE IF EXISTS events;
+                """
+            )
+
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sources (
+                origin TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                events INTEGER NOT NULL,
+                max_grace_days INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                origin TEXT NOT NULL,
+                archivo TEXT NOT NULL,
+                fila INTEGER NOT NULL,
+                poliza TEXT NOT NULL,
+                forma_pago TEXT NOT NULL,
+                concepto TEXT NOT NULL,
+                fecha INTEGER NOT NULL,
+                amparo_30 INTEGER,
+                amparo_15 INTEGER,
+                PRIMARY KEY (fecha, origin, fila, concepto)
+            ) WITHOUT ROWID;
+            """
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (INDEX_VERSION,)
+        )
+        self.connection.commit()
+
+    def _version(self) -> str | None:
+        try:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def refresh(self, sources: dict[str, Path], force: bool = False) -> dict[str, int]:
+        """
+        Reindexa los orígenes cuyo archivo cambió (tamaño, fecha de
+        modificación o ruta) y elimina los que ya no tienen archivo.
+        Devuelve {origen: vencimientos indexados} de los reindexados.
+        """
+        updated = {}
+        for origin, path in sources.items():
+            if path is None or not path.exists():
+                continue
+            stat = path.stat()
+            known = self.connection.execute(
+                "SELECT path, size, mtime_ns FROM sources WHERE origin = ?", (origin,)
+            ).fetchone()
+            if not force and known == (str(path), stat.st_size, stat.st_mtime_ns):
+                continue
+            updated[origin] = self._load(origin, path, stat)
+
+        indexed = [row[0] for row in self.connection.execute("SELECT origin FROM sources")]
+        with self.connection:
+            for origin in indexed:
+                path = sources.get(origin)
+                if path is None or not path.exists():
+                    self.connection.execute("DELETE FROM events WHERE origin = ?", (origin,))
+                    self.connection.execute("DELETE FROM sources WHERE origin = ?", (origin,))
+        return updated
+
+    def _load(self, origin: str, path: Path, stat) -> int:
+        df = read_table(path)
+        with span("index_events"):
+            events = schedule_events(df)
+            # Insertar en orden de la llave primaria llena las páginas en secuencia.
+            order = np.lexsort((events["concepto"].astype(str), events["fila"], events["fecha"]))
+            events = {name: values[order] for name, values in events.items()}
+            dates = events["fecha"]
+            grace = events["amparo_15"] - dates
+            grace = grace[~np.isnat(grace)]
+            max_grace = int(grace.max().astype(int)) if len(grace) else 0
+
+            rows = zip(
+                [origin] * len(dates),
+                events["archivo"].tolist(),
+                events["fila"].tolist(),
+                events["poliza"].tolist(),
+                events["forma_pago"].tolist(),
+                events["concepto"].tolist(),
+                day_numbers(dates),
+                day_numbers(events["amparo_30"]),
+                day_numbers(events["amparo_15"]),
+            )
+
+        with span("write"), self.connection:
+            self.connection.execute("DELETE FROM events WHERE origin = ?", (origin,))
+            self.connection.executemany(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                (origin, str(path), stat.st_size, stat.st_mtime_ns, len(dates), max_grace),
+            )
+        return len(dates)
+
+    def max_grace_days(self) -> int:
+        return self.connection.execute(
+            "SELECT COALESCE(MAX(max_grace_days), 0) FROM sources"
+        ).fetchone()[0]
+
+    def _query(
+        self,
+        where: str,
+        params: list,
+        origin: str | None,
+        window_day: date | None = None,
+    ) -> pd.DataFrame:
+        select = "origin, archivo, fila, poliza, forma_pago, concepto, fecha, amparo_30, amparo_15"
+        columns = list(RESULT_COLUMNS)
+        if window_day is not None:
+            select += ", CASE WHEN amparo_30 >= ? THEN ? ELSE ? END"
+            params = [day_number(window_day), *GRACE_COLUMNS, *params]
+            columns.append("Ventana")
+        if origin is not None:
+            where += " AND origin = ?"
+            params = [*params, origin]
+
+        cursor = self.connection.execute(
+            f"SELECT {select} FROM events WHERE {where} ORDER BY fecha, origin, fila", params
+        )
+        rows = cursor.fetchall()
+        values = dict(zip(columns, zip(*rows))) if rows else {column: () for column in columns}
+        for column in DATE_COLUMNS:
+            values[column] = pd.to_datetime(pd.Series(values[column], dtype="float64"), unit="D")
+        return pd.DataFrame(values, columns=columns)
+
+    def due(self, start: date, end: date | None = None, origin: str | None = None) -> pd.DataFrame:
+        """
+        Vencimientos con fecha de pago entre start y end (inclusive).
+        """
+        end = end or start
+        return self._query("fecha BETWEEN ? AND ?", [day_number(start), day_number(end)], origin)
+
+    def in_grace(self, day: date, origin: str | None = None) -> pd.DataFrame:
+        """
+        Vencimientos en amparo el día `day`: pagos anteriores a ese día cuyo
+        amparo sigue vigente. La columna Ventana indica si está dentro del
+        Amparo_30_días o ya en el Amparo_15_días.
+        """
+        target = day_number(day)
+        return self._query(
+            "fecha >= ? AND fecha < ? AND amparo_15 >= ?",
+            [target - self.max_grace_days(), target, target],
+            origin,
+            window_day=day,
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# ---------------------
+# ACTUALIZACIÓN
+# ---------------------
+def default_sources() -> dict[str, Path | None]:
+    return {origin: resolve_source(path) for origin, path in SOURCES.items()}
+
+
+def refresh_index(
+    sources: dict[str, Path | None],
+    index_path: Path = DEFAULT_INDEX,
+    force: bool = False,
+) -> None:
+    """
+    Actualiza el índice persistente con las salidas de renovaciones.
+    """
+    index = DueDateIndex(index_path)
+    updated = index.refresh(sources, force)
+    for origin, total in updated.items():
+        print(f"🔄 Índice actualizado: {origin} ({total:,} vencimientos)")
+    if not updated:
+        print(f"♻️ Índice sin cambios: {index_path}")
+    index.close()
+
+
+# ---------------------
+# PROCESO PRINCIPAL
+# ---------------------
+def main():
+    parser = argparse.ArgumentParser(description="Vencimientos y amparos por día.")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX, help="Archivo SQLite del índice")
+    parser.add_argument("--gmm", type=Path, help="Salida de renovaciones GMM/Tradicional")
+    parser.add_argument("--flex", type=Path, help="Salida de renovaciones de flexibles")
+    parser.add_argument("--date", type=parse_day, default=date.today(), help="Día consultado (dd/mm/aaaa)")
+    parser.add_argument("--until", type=parse_day, help="Último día del rango de vencimientos")
+    parser.add_argument("--grace", action="store_true", help="Pólizas en amparo en lugar de vencimientos")
+    parser.add_argument("--origin", choices=list(SOURCES), help="Solo GMM/Tradicional o solo flexibles")
+    parser.add_argument("--output", type=Path, help="Guardar la lista (.xlsx, .csv, .parquet, .arrow)")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruir el índice completo")
+    args = parser.parse_args()
+
+    sources = default_sources()
+    if args.gmm:
+        sources["gmm"] = args.gmm
+    if args.flex:
+        sources["flexibles"] = args.flex
+
+    index = DueDateIndex(args.index)
+    for origin, total in index.refresh(sources, args.rebuild).items():
+        print(f"🔄 Índice actualizado: {origin} ({total:,} vencimientos)")
+    if not len(index):
+        index.close()
+        parser.error("No hay salidas de renovaciones para indexar")
+
+    if args.grace:
+        df = index.in_grace(args.date, args.origin)
+        title = f"Pólizas en amparo el {args.date:%d/%m/%Y}"
+    else:
+        df = index.due(args.date, args.until, args.origin)
+        end = args.until or args.date
+        title = f"Vencimientos del {args.date:%d/%m/%Y}" + (f" al {end:%d/%m/%Y}" if end != args.date else "")
+    index.close()
+
+    if args.output:
+        write_table(df, args.output)
+        print(f"✅ Lista generada: {args.output}")
+    else:
+        with pd.option_context("display.max_rows", None, "display.width", None):
+            print(df.to_string(index=False) if len(df) else "⚠️ Sin resultados")
+    print(f"📅 {title}: {len(df)}")
+
+
+if __name__ == "__main__":
+    main()
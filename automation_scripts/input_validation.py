@@ -0,0 +1,131 @@
+"""
+Validación previa de las entradas de renovaciones.
+
+Este módulo revisa columnas completas de una vez (Fecha Emisión, Forma de
+Pago, Día de Cobro, ...) y reúne todas las filas con error en un solo
+reporte con número de fila, columna, valor y motivo, en lugar de detener
+el proceso en el primer error. Las filas válidas se procesan en la misma
+ejecución y el reporte se guarda junto a la salida.
+
+Renewal input pre-validation.
+
+This module checks whole columns at once (issue date, payment frequency,
+payment day, ...) and gathers every bad row into a single report with
+row number, column, value and reason instead of stopping at the first
+error. Valid rows are processed in the same run and the report is saved
+next to the output.
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from automation_scripts.date_parsing import parse_issue_dates
+from automation_scripts.instrumentation import span, tally
+from automation_scripts.storage import write_table
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+ERROR_COLUMNS = ["Fila", "Columna", "Valor", "Motivo"]
+ISSUE_DATE_COLUMN = "Fecha Emisión"
+
+
+# ---------------------
+# REVISIONES POR COLUMNA
+# ---------------------
+def check_issue_dates(df: pd.DataFrame) -> tuple[pd.Series, pd.DataFrame]:
+    """
+    Fecha Emisión como datetime64 (NaT donde es inválida) y el reporte de
+    las filas inválidas. Las entradas Parquet/Arrow ya vienen tipadas.
+    """
+    column = df[ISSUE_DATE_COLUMN]
+    if pd.api.types.is_datetime64_any_dtype(column):
+        missing = column.isna().to_numpy()
+        return column, row_errors(df, ISSUE_DATE_COLUMN, missing, "Fecha Emisión vacía")
+
+    issue_dates, failures = parse_issue_dates(column)
+    report = pd.DataFrame({
+        "Fila": failures["Fila"],
+        "Columna": ISSUE_DATE_COLUMN,
+        "Valor": failures[ISSUE_DATE_COLUMN].fillna(""),
+        "Motivo": failures["Motivo"],
+    })
+    return issue_dates, report
+
+
+def normalized_text(values: pd.Series) -> np.ndarray:
+    """
+    Texto en minúsculas y sin espacios laterales (como Forma de Pago).
+    """
+    return values.astype(str).str.strip().str.lower().to_numpy()
+
+
+def non_numeric(values: pd.Series) -> np.ndarray:
+    """
+    Filas con un valor que no es un número; las celdas vacías no cuentan.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return np.zeros(len(values), dtype=bool)
+    text = values.astype(str).str.strip().where(values.notna(), "")
+    numbers = pd.to_numeric(text.where(text != ""), errors="coerce")
+    return (numbers.isna() & (text != "")).to_numpy()
+
+
+def row_errors(df: pd.DataFrame, column: str, mask: np.ndarray, reason: str) -> pd.DataFrame:
+    """
+    Reporte (Fila, Columna, Valor, Motivo) de las filas marcadas en `mask`.
+    """
+    positions = np.flatnonzero(mask)
+    values = df[column].iloc[positions] if column in df.columns else pd.Series("", index=positions)
+    return pd.DataFrame({
+        "Fila": df.index[positions] + 1,
+        "Columna": column,
+        "Valor": values.astype(str).where(values.notna(), "").to_numpy(),
+        "Motivo": reason,
+    }, columns=ERROR_COLUMNS)
+
+
+def collect_errors(df: pd.DataFrame, reports: list[pd.DataFrame]) -> tuple[np.ndarray, pd.DataFrame]:
+    """
+    Une los reportes de cada revisión y devuelve la máscara de filas
+    válidas (sin ningún error) junto con el reporte ordenado por fila.
+    """
+    reports = [report for report in reports if len(report)]
+    if not reports:
+        return np.ones(len(df), dtype=bool), pd.DataFrame(columns=ERROR_COLUMNS)
+
+    report = pd.concat(reports, ignore_index=True)
+    report = report.sort_values("Fila", kind="stable", ignore_index=True)
+    invalid = df.index.isin(report["Fila"] - 1)
+    tally("invalid_rows", int(invalid.sum()))
+    return ~invalid, report
+
+
+# ---------------------
+# REPORTE DE ERRORES
+# ---------------------
+def error_report_path(output_path: Path) -> Path:
+    """
+    Archivo de errores junto a la salida: <nombre>_errores.<extensión>.
+    """
+    return output_path.with_name(f"{output_path.stem}_errores{output_path.suffix}")
+
+
+def write_error_report(reports: list[pd.DataFrame], output_path: Path) -> int:
+    """
+    Guarda los errores de todos los lotes junto a la salida y devuelve el
+    número de filas con error. Sin errores, borra el reporte de una
+    ejecución anterior para que no quede desactualizado.
+    """
+    path = error_report_path(output_path)
+    reports = [report for report in reports if len(report)]
+    if not reports:
+        path.unlink(missing_ok=True)
+        return 0
+
+    report = pd.concat(reports, ignore_index=True)
+    with span("write_errors"):
+        write_table(report, path)
+    return report["Fila"].nunique()
@@ -0,0 +1,290 @@
+"""
+Instrumentación opcional del pipeline.
+
+Este módulo mide tramos con nombre (lectura, interpretación de fechas,
+generación de calendarios, formato, escritura, análisis de cada HTML),
+cuenta filas y archivos, registra la memoria pico y, opcionalmente,
+perfila una etapa completa con cProfile. Todo se guarda en un reporte
+JSON. Se activa con la variable de entorno PIPELINE_PROFILE o con la
+opción --profile de cada script; desactivado, cada tramo cuesta una
+llamada a función.
+
+Optional pipeline instrumentation.
+
+This module times named spans (read, date parsing, schedule generation,
+formatting, writing, per-file HTML parsing), counts rows and files,
+records peak memory and can wrap a whole stage in cProfile, writing
+everything to a JSON report. It is enabled with the PIPELINE_PROFILE
+environment variable or each script's --profile flag; when disabled a
+span costs a single function call.
+"""
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from automation_scripts.resource_usage import peak_rss_mb
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+ENV_VAR = "PIPELINE_PROFILE"  # "1" o ruta del reporte JSON
+CPROFILE_ENV_VAR = "PIPELINE_CPROFILE"  # "1" para perfilar cada etapa
+DEFAULT_REPORT = Path("data/processed/profile_report.json")
+PROFILE_TOP_FUNCTIONS = 25  # Funciones por etapa incluidas en el reporte
+
+NULL_SPAN = nullcontext()
+
+_state = None
+
+
+class _Recorder:
+    def __init__(self, report_path: Path, cprofile: bool):
+        self.report_path = report_path
+        self.cprofile = cprofile
+        self.spans = {}
+        self.counters = {}
+        self.profiles = {}
+        self.stack = []
+        self.written = False
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        _state.stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        path = "/".join(_state.stack)
+        _state.stack.pop()
+
+        entry = _state.spans.get(path)
+        if entry is None:
+            entry = _state.spans[path] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+        entry["calls"] += 1
+        entry["seconds"] += elapsed
+        entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+
+
+# ---------------------
+# ACTIVACIÓN
+# ---------------------
+def enabled() -> bool:
+    return _state is not None
+
+
+def enable(report_path: Path | None = None, cprofile: bool = False) -> None:
+    """
+    Activa la instrumentación en este proceso y en los procesos hijos
+    (por medio de las variables de entorno).
+    """
+    global _state
+    report_path = Path(report_path or DEFAULT_REPORT)
+    _state = _Recorder(report_path, cprofile)
+
+    os.environ[ENV_VAR] = str(report_path)
+    if cprofile:
+        os.environ[CPROFILE_ENV_VAR] = "1"
+
+
+def _enable_from_environment() -> None:
+    value = os.environ.get(ENV_VAR, "")
+    if value in ("", "0"):
+        return
+    enable(None if value == "1" else Path(value), os.environ.get(CPROFILE_ENV_VAR) == "1")
+
+
+# ---------------------
+# MEDICIÓN
+# ---------------------
+def span(name: str):
+    """
+    Contexto que mide un tramo con nombre; los tramos anidados se
+    acumulan bajo la ruta "etapa/tramo".
+    """
+    if _state is None:
+        return NULL_SPAN
+    return _Span(name)
+
+
+def tally(name: str, amount: int = 1) -> None:
+    """
+    Suma `amount` al contador `name` de la etapa en curso.
+    """
+    if _state is None:
+        return
+    key = f"{_state.stack[0]}/{name}" if _state.stack else name
+    _state.counters[key] = _state.counters.get(key, 0) + amount
+
+
+def measured(function, *args):
+    """
+    Ejecuta function(*args) con tramos y contadores propios y devuelve
+    (resultado, mediciones). Pensado para el trabajo hecho en procesos
+    hijos, cuyas mediciones no llegan solas al proceso principal: este
+    las suma a las suyas con merge(). Desactivada, las mediciones son None.
+    """
+    if _state is None:
+        return function(*args), None
+
+    saved = _state.spans, _state.counters, _state.stack
+    _state.spans, _state.counters, _state.stack = {}, {}, []
+    try:
+        result = function(*args)
+        return result, {"spans": _state.spans, "counters": _state.counters}
+    finally:
+        _state.spans, _state.counters, _state.stack = saved
+
+
+def merge(measures: dict | None) -> None:
+    """
+    Suma las mediciones de measured() a las de este proceso, bajo el
+    tramo en curso (igual que si se hubieran medido aquí).
+    """
+    if _state is None or not measures:
+        return
+
+    prefix = "/".join(_state.stack)
+    for path, child in measures["spans"].items():
+        key = f"{prefix}/{path}" if prefix else path
+        entry = _state.spans.get(key)
+        if entry is None:
+            entry = _state.spans[key] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+        entry["calls"] += child["calls"]
+        entry["seconds"] += child["seconds"]
+        entry["max_seconds"] = max(entry["max_seconds"], child["max_seconds"])
+
+    for name, amount in measures["counters"].items():
+        tally(name, amount)
+
+
+@contextmanager
+def profile_stage(name: str):
+    """
+    Mide una etapa completa como tramo y, si cProfile está activo, la
+    perfila y guarda el resultado junto al reporte (<reporte>_<etapa>.prof).
+    """
+    if _state is None:
+        yield
+        return
+
+    profiler = cProfile.Profile() if _state.cprofile else None
+    with _Span(name):
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                _store_profile(name, profiler)
+
+
+def _store_profile(name: str, profiler: cProfile.Profile) -> None:
+    report = _state.report_path
+    prof_path = report.with_name(f"{report.stem}_{name}.prof")
+    prof_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(prof_path)
+
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    _state.profiles[name] = {
+        "file": str(prof_path),
+        "top": [
+            {
+                "function": f"{file}:{line}({function})",
+                "calls": calls,
+                "total_seconds": total,
+                "cumulative_seconds": cumulative,
+            }
+            for (file, line, function), (_, calls, total, cumulative, _) in rows[:PROFILE_TOP_FUNCTIONS]
+        ],
+    }
+
+
+# ---------------------
+# REPORTE
+# ---------------------
+def snapshot() -> dict | None:
+    """
+    Resultados acumulados en este proceso (None si está desactivada).
+    """
+    if _state is None:
+        return None
+    return {
+        "pid": os.getpid(),
+        "spans": _state.spans,
+        "counters": _state.counters,
+        "peak_rss_mb": peak_rss_mb(),
+        "profiles": _state.profiles,
+    }
+
+
+def write_report(path: Path | None = None, **extra) -> Path | None:
+    """
+    Guarda el reporte JSON de este proceso; `extra` agrega secciones (p. ej.
+    los reportes de procesos hijos).
+    """
+    if _state is None:
+        return None
+
+    path = Path(path or _state.report_path)
+    report = {"created": datetime.now().isoformat(timespec="seconds"), **snapshot(), **extra}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    _state.written = True
+    return path
+
+
+@atexit.register
+def _write_at_exit() -> None:
+    if _state is not None and not _state.written and (_state.spans or _state.counters):
+        print(f"⏱️ Reporte de instrumentación: {write_report()}")
+
+
+# ---------------------
+# LÍNEA DE COMANDOS
+# ---------------------
+def add_profiling_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Agrega las opciones --profile y --cprofile a un script.
+    """
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_REPORT,
+        default=None,
+        type=Path,
+        help=f"Medir tramos y guardar el reporte JSON (por defecto {DEFAULT_REPORT})",
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="Perfilar cada etapa con cProfile (requiere --profile)",
+    )
+
+
+def configure(args: argparse.Namespace) -> None:
+    """
+    Activa la instrumentación si el script recibió --profile.
+    """
+    if args.profile:
+        enable(args.profile, args.cprofile)
+
+
+_enable_from_environment()
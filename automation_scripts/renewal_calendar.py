@@ -0,0 +1,214 @@
+"""
+Calendario compartido para los cálculos de renovación.
+
+Este módulo concentra el ajuste de días al fin de mes que usan los
+generadores de fechas de GMM/Tradicional y de productos flexibles, sobre
+arreglos datetime64, y la caché que reparte un calendario ya calculado a
+todas las pólizas con la misma firma.
+
+Shared renewal calendar.
+
+This module holds the month-end day clamp used by both the GMM/Traditional
+and flexible products schedule generators, as a vectorized datetime64
+kernel, plus the cache that broadcasts an already computed schedule to
+every policy sharing its signature.
+"""
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+
+from automation_scripts.instrumentation import span, tally
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+# Columnas que identifican la póliza en las entradas de renovación
+POLICY_COLUMNS = ["Póliza", "No. Póliza", "Número de Póliza"]
+LONG_COLUMNS = ["No. Cuota", "Fecha de Pago", "Amparo_30_días", "Amparo_15_días"]
+
+SIGNATURE_BASE = 32  # Mes (0-11) y días (0-31) de una firma caben en base 32
+SCHEDULE_CACHE_CELLS = 4_000_000  # Fechas guardadas como máximo en la caché
+
+
+# ---------------------
+# AJUSTE DE DÍAS
+# ---------------------
+def month_end_clamp(months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Fecha de cada mes (arreglo datetime64[M]) con el día indicado, ajustado
+    al último día del mes si no existe.
+    """
+    first_day = months.astype("datetime64[D]")
+    last_day = ((months + 1).astype("datetime64[D]") - first_day).astype("int64")
+    return first_day + (np.minimum(days, last_day) - 1)
+
+
+# ---------------------
+# FORMATO
+# ---------------------
+def format_dates(dates: np.ndarray, fmt: str | None) -> np.ndarray:
+    """
+    Formatea un arreglo datetime64[D] a texto; NaT se convierte en "".
+    Solo se formatea cada fecha distinta una vez. Con fmt=None las fechas
+    se conservan tipadas.
+    """
+    if fmt is None:
+        return dates
+
+    with span("format"):
+        unique, inverse = np.unique(dates, return_inverse=True)
+        labels = np.array(
+            ["" if np.isnat(d) else d.astype(datetime).strftime(fmt) for d in unique],
+            dtype=object,
+        )
+        return labels[inverse].reshape(dates.shape)
+
+
+# ---------------------
+# CACHÉ DE CALENDARIOS
+# ---------------------
+def encode_signature(*fields: np.ndarray) -> np.ndarray:
+    """
+    Combina campos enteros menores a SIGNATURE_BASE (mes, día de emisión,
+    día de cobro) en un solo código por fila.
+    """
+    codes = np.zeros(len(fields[0]), dtype="int64")
+    for field in fields:
+        codes = codes * SIGNATURE_BASE + field
+    return codes
+
+
+def decode_signature(codes: np.ndarray, count: int) -> list:
+    """
+    Inverso de encode_signature: devuelve los `count` campos en orden.
+    """
+    fields = []
+    for _ in range(count):
+        codes, field = np.divmod(codes, SIGNATURE_BASE)
+        fields.append(field)
+    return fields[::-1]
+
+
+class ScheduleCache:
+    """
+    Caché de calendarios por firma.
+
+    Un calendario depende solo de su firma (mes y día de emisión, día de
+    cobro efectivo y forma de pago), así que cada firma distinta se calcula
+    una vez y su fila se reparte a todas las pólizas con la misma firma.
+
+    Las filas se guardan en una tabla por kernel, forma de pago, horizonte
+    y formato, indexada por el código de la firma (a lo sumo 12 x 32 x 32
+    filas). El límite se mide en fechas guardadas: si se excede, se
+    descartan primero las tablas usadas hace más tiempo (p. ej. las de otro
+    horizonte), de modo que un horizonte largo no acumula memoria.
+    """
+
+    def __init__(self, max_cells: int = SCHEDULE_CACHE_CELLS):
+        self.max_cells = max_cells
+        self.tables = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def rows(self, namespace: tuple, codes: np.ndarray, compute) -> np.ndarray:
+        """
+        Devuelve la matriz (filas x columnas) de las firmas `codes`.
+
+        Solo las firmas que no están en la tabla se calculan, con una
+        llamada a compute(códigos únicos); namespace distingue kernel,
+        forma de pago, horizonte y formato.
+        """
+        table, filled = self.tables.pop(namespace, (None, np.zeros(0, dtype=bool)))
+        if not len(codes):
+            if table is None:
+                return compute(codes)
+            self.tables[namespace] = (table, filled)
+            return table[:0]
+
+        size = int(codes.max()) + 1
+        if len(filled) < size:
+            filled = np.concatenate([filled, np.zeros(size - len(filled), dtype=bool)])
+
+        missing = np.unique(codes[~filled[codes]])
+        if len(missing):
+            computed = compute(missing)
+            if table is None or len(table) < size:
+                grown = np.empty((size, computed.shape[1]), dtype=computed.dtype)
+                if table is not None:
+                    grown[:len(table)] = table
+                table = grown
+            table[missing] = computed
+            filled[missing] = True
+
+        self.misses += len(missing)
+        self.hits += len(codes) - len(missing)
+
+        self.tables[namespace] = (table, filled)
+        self._evict()
+        return table[codes]
+
+    def _evict(self) -> None:
+        cells = sum(table.size for table, _ in self.tables.values())
+        # La tabla en uso (la última) nunca se descarta.
+        while cells > self.max_cells and len(self.tables) > 1:
+            _, (table, _) = self.tables.popitem(last=False)
+            cells -= table.size
+            self.evictions += 1
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        """
+        Resumen para imprimir al terminar (y contadores de instrumentación).
+        """
+        tally("schedule_cache_hits", self.hits)
+        tally("schedule_cache_misses", self.misses)
+        tally("schedule_cache_evictions", self.evictions)
+        return (
+            f"♻️ Caché de calendarios: {self.hit_rate():.1%} de aciertos, "
+            f"{self.misses:,} firmas calculadas, {self.evictions:,} tablas descartadas"
+        )
+
+
+# ---------------------
+# FORMATO LARGO
+# ---------------------
+def horizon_months(start_year: int, end_year: int) -> int:
+    """
+    Número de meses del horizonte START_YEAR..END_YEAR (inclusive).
+    """
+    if end_year < start_year:
+        raise ValueError(f"Horizonte inválido: {start_year}-{end_year}")
+    return 12 * (end_year - start_year + 1)
+
+
+def long_schedule_frame(
+    df: pd.DataFrame,
+    positions: np.ndarray,
+    installments: np.ndarray,
+    due_dates: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Arma el bloque en formato largo (una fila por póliza y cuota) con sus
+    amparos de 30 y 45 días, ordenado por fila de entrada y número de cuota.
+    """
+    order = np.lexsort((installments, positions))
+    positions = positions[order]
+    due_dates = due_dates[order]
+
+    frame = {"Fila": df.index.to_numpy()[positions] + 1}
+    policy_column = next((c for c in POLICY_COLUMNS if c in df.columns), None)
+    if policy_column:
+        frame[policy_column] = df[policy_column].to_numpy()[positions]
+
+    frame[LONG_COLUMNS[0]] = installments[order]
+    frame[LONG_COLUMNS[1]] = due_dates
+    frame[LONG_COLUMNS[2]] = due_dates + 30
+    frame[LONG_COLUMNS[3]] = due_dates + 45
+    return pd.DataFrame(frame)
@@ -0,0 +1,51 @@
+"""
+Medición de memoria y procesos aislados para el pipeline.
+
+Este módulo reporta la memoria residente pico de un proceso y crea pools
+de procesos donde cada tarea corre en un proceso nuevo, de modo que el
+pico medido corresponda solo a esa tarea.
+
+Memory measurement and isolated worker processes.
+
+This module reports a process's peak resident memory and builds process
+pools where every task runs in a fresh process, so the measured peak
+belongs to that task alone.
+"""
+
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def peak_rss_mb() -> float | None:
+    """
+    Memoria residente pico del proceso actual en MB (None si la
+    plataforma no la reporta, p. ej. Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la reporta en KB y macOS en bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def isolated_executor(workers: int, preload: list[str] = ()) -> ProcessPoolExecutor:
+    """
+    Pool de procesos donde cada proceso ejecuta una sola tarea.
+
+    Donde existe (Linux/macOS) usa un fork server que importa `preload`
+    una sola vez, así cada proceso nuevo arranca sin volver a importar
+    pandas/lxml; en el resto usa spawn.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(list(preload))
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1)
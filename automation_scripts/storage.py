@@ -0,0 +1,517 @@
+"""
+Capa de almacenamiento para las etapas del pipeline.
+
+Este módulo permite que cada etapa lea y escriba sus tablas en Excel,
+Parquet o Arrow IPC según la extensión del archivo, conservando los tipos
+de columna (fechas incluidas) en los formatos columnares y dejando Excel
+como exportación final opcional.
+
+Pipeline storage layer.
+
+This module lets each stage read and write its tables as Excel, Parquet
+or Arrow IPC based on the file extension, keeping column dtypes (dates
+included) in the columnar formats and leaving Excel as an optional final
+export.
+"""
+
+import argparse
+import pandas as pd
+from datetime import date
+from itertools import islice
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from pathlib import Path
+
+from automation_scripts.instrumentation import span
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+FORMAT_SUFFIXES = {
+    "excel": ".xlsx",
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+EXCEL_DATE_FORMAT = "DD/MM/YYYY"
+EXCEL_CHUNK_SIZE = 10_000  # Filas convertidas a objetos Python por bloque
+EXCEL_MAX_ROWS = 1_048_576  # Filas por hoja de Excel, encabezado incluido
+DEFAULT_BATCH_SIZE = 50_000  # Filas por lote en modo streaming
+
+SUFFIX_FORMATS = {
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def storage_format(path: Path) -> str:
+    """
+    Devuelve el formato de almacenamiento según la extensión del archivo.
+    """
+    try:
+        return SUFFIX_FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Formato de archivo no soportado: {path.name}") from None
+
+
+def with_format(path: Path, fmt: str) -> Path:
+    """
+    Cambia la extensión de un archivo a la del formato indicado.
+    """
+    if fmt not in FORMAT_SUFFIXES:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    return path.with_suffix(FORMAT_SUFFIXES[fmt])
+
+
+def is_excel(path: Path) -> bool:
+    return storage_format(path) == "excel"
+
+
+def check_excel_rows(rows: int) -> None:
+    """
+    Falla si `rows` filas de datos (más el encabezado) no caben en una hoja
+    de Excel; openpyxl en modo write-only no lo revisa y guardaría un libro
+    que Excel no abre completo.
+    """
+    if rows > EXCEL_MAX_ROWS - 1:
+        raise ValueError(
+            f"La salida tiene más de {EXCEL_MAX_ROWS - 1:,} filas, el límite de una hoja "
+            "de Excel; use --format csv, parquet o arrow"
+        )
+
+
+# ---------------------
+# LECTURA Y ESCRITURA
+# ---------------------
+def read_table(path: Path, excel_dtype: dict | None = None, memory_map: bool = False) -> pd.DataFrame:
+    """
+    Lee una tabla en Excel, CSV, Parquet o Arrow IPC.
+
+    excel_dtype solo aplica a Excel y CSV, donde los tipos no se conservan.
+    memory_map lee Parquet/Arrow mapeando el archivo en memoria en vez de
+    copiarlo completo.
+    """
+    fmt = storage_format(path)
+
+    with span("read"):
+        return _read_table(path, fmt, excel_dtype, memory_map)
+
+
+def _read_table(path: Path, fmt: str, excel_dtype: dict | None, memory_map: bool) -> pd.DataFrame:
+    if fmt == "excel":
+        return pd.read_excel(path, dtype=excel_dtype)
+
+    if fmt == "csv":
+        return pd.read_csv(path, dtype=excel_dtype)
+
+    if fmt == "parquet":
+        return pd.read_parquet(path, memory_map=memory_map)
+
+    import pyarrow as pa
+
+    source = pa.memory_map(str(path), "r") if memory_map else pa.OSFile(str(path), "rb")
+    with source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def iter_table_batches(
+    path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    excel_dtype: dict | None = None,
+):
+    """
+    Lee una tabla en lotes de batch_size filas sin cargarla completa.
+
+    Cada lote conserva el número de fila global en su índice, de modo que
+    los mensajes de error apunten a la fila correcta del archivo.
+    """
+    fmt = storage_format(path)
+    batches = _raw_batches(path, fmt, batch_size, excel_dtype)
+    start = 0
+
+    while True:
+        with span("read"):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        batch.index = pd.RangeIndex(start, start + len(batch))
+        start += len(batch)
+        yield batch
+
+
+def _without_trailing_blanks(rows):
+    """
+    Filas de openpyxl sin las vacías del final (celdas con formato pero sin
+    valor), como hace pd.read_excel; las vacías intermedias se conservan.
+    """
+    blanks = []
+    for row in rows:
+        if all(value is None for value in row):
+            blanks.append(row)
+            continue
+        yield from blanks
+        blanks.clear()
+        yield row
+
+
+def _raw_batches(path: Path, fmt: str, batch_size: int, excel_dtype: dict | None):
+    if fmt == "csv":
+        yield from pd.read_csv(path, dtype=excel_dtype, chunksize=batch_size)
+        return
+
+    if fmt == "excel":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            rows = _without_trailing_blanks(rows)
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                batch = pd.DataFrame(chunk, columns=header)
+                for column, dtype in (excel_dtype or {}).items():
+                    if column in batch:
+                        values = batch[column]
+                        batch[column] = values.where(values.isna(), values.astype(dtype))
+                yield batch
+        finally:
+            wb.close()
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pandas()
+        return
+
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            record_batch = reader.get_batch(i)
+            for offset in range(0, record_batch.num_rows, batch_size):
+                yield record_batch.slice(offset, batch_size).to_pandas()
+
+
+def dataframe_rows(df: pd.DataFrame, chunk_size: int = EXCEL_CHUNK_SIZE):
+    """
+    Genera las filas de un DataFrame por bloques como tuplas de valores
+    Python; NaN y NaT se convierten en celdas vacías.
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def write_excel_stream(
+    rows,
+    output_path: Path,
+    header: list,
+    sheet_title: str = "Sheet1",
+    date_format: str = EXCEL_DATE_FORMAT,
+) -> None:
+    """
+    Escribe filas en Excel con openpyxl en modo write-only: cada fila se
+    serializa al agregarla, así que la memoria no crece con el archivo.
+    Las fechas se guardan como celdas de fecha con date_format.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    ws.append(header)
+    try:
+        append_excel_rows(ws, rows, date_format)
+    except BaseException:
+        discard_sheet(ws)
+        raise
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(output_path)
+
+
+def discard_sheet(ws) -> None:
+    """
+    Cierra una hoja write-only sin guardar el libro y borra su archivo
+    temporal.
+    """
+    ws.close()
+    ws._writer.cleanup()
+
+
+def append_excel_rows(ws, rows, date_format: str = EXCEL_DATE_FORMAT, written: int = 0) -> int:
+    """
+    Agrega filas a una hoja write-only convirtiendo las fechas en celdas
+    de fecha con date_format. `written` son las filas de datos que ya tiene
+    la hoja; devuelve el nuevo total y falla antes de pasar del límite de
+    Excel (check_excel_rows).
+    """
+    for row in rows:
+        written += 1
+        check_excel_rows(written)
+        values = list(row)
+        for i, value in enumerate(values):
+            if isinstance(value, date):
+                cell = WriteOnlyCell(ws, value=value)
+                cell.number_format = date_format
+                values[i] = cell
+        ws.append(values)
+    return written
+
+
+def write_table(
+    df: pd.DataFrame,
+    path: Path,
+    excel_date_format: str = EXCEL_DATE_FORMAT,
+    sheet_title: str = "Sheet1",
+) -> None:
+    """
+    Escribe una tabla en el formato indicado por la extensión del archivo.
+    Excel se escribe en modo streaming con celdas de fecha tipadas.
+    """
+    fmt = storage_format(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with span("write"):
+        if fmt == "excel":
+            check_excel_rows(len(df))
+            write_excel_stream(
+                dataframe_rows(df), path, list(df.columns), sheet_title, excel_date_format
+            )
+        elif fmt == "csv":
+            df.to_csv(path, index=False)
+        elif fmt == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.reset_index(drop=True).to_feather(path)
+
+
+def check_columns(current: list, incoming: list) -> None:
+    """
+    Falla si un lote no trae las mismas columnas que el primero (el orden
+    puede variar).
+    """
+    missing = [name for name in current if name not in incoming]
+    extra = [name for name in incoming if name not in current]
+    if missing or extra:
+        raise ValueError(f"Los lotes tienen columnas distintas (faltan: {missing}, sobran: {extra})")
+
+
+def promote_schema(current, incoming):
+    """
+    Esquema Arrow que admite los lotes de ambos esquemas: una columna nula
+    toma el tipo del otro lote, int y float se unen como float y tipos
+    incompatibles (p. ej. número y texto) se guardan como texto.
+    """
+    import pyarrow as pa
+
+    if current.names != incoming.names:
+        check_columns(current.names, incoming.names)
+        raise ValueError("Los lotes tienen las columnas en otro orden")
+
+    fields = []
+    for old, new in zip(current, incoming):
+        if old.type == new.type or pa.types.is_null(new.type):
+            fields.append(old)
+        elif pa.types.is_null(old.type):
+            fields.append(old.with_type(new.type))
+        else:
+            try:
+                merged = pa.unify_schemas(
+                    [pa.schema([old]), pa.schema([new])], promote_options="permissive"
+                ).field(0)
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                merged = old.with_type(pa.string())
+            fields.append(merged)
+
+    # Los metadatos de pandas describen los tipos del primer lote.
+    changed = any(not a.equals(b) for a, b in zip(fields, current))
+    return pa.schema(fields, metadata=None if changed else current.metadata)
+
+
+class TableWriter:
+    """
+    Escritor incremental: cada llamada a write agrega un lote de filas al
+    archivo de salida (Excel write-only, CSV, grupos de filas Parquet o
+    lotes Arrow IPC) sin mantener lotes anteriores en memoria.
+
+    Cada lote se ordena con las columnas del primero (Excel y CSV agregan
+    filas por posición bajo un solo encabezado) y falla si trae columnas
+    distintas. En Parquet/Arrow el esquema se amplía si un lote trae un
+    tipo que el primero no tenía (promote_schema). En Excel falla antes de pasar del
+    límite de filas de una hoja, y si el bloque `with` termina con error el
+    archivo incompleto se borra.
+    """
+
+    def __init__(self, path: Path, excel_date_format: str = EXCEL_DATE_FORMAT):
+        self.path = path
+        self.format = storage_format(path)
+        self.excel_date_format = excel_date_format
+        self.rows = 0
+        self.columns = None
+        self._workbook = None
+        self._sheet = None
+        self._writer = None
+        self._schema = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        with span("write"):
+            self._write(df)
+        self.rows += len(df)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = list(df.columns)
+        elif list(df.columns) != self.columns:
+            check_columns(self.columns, list(df.columns))
+            df = df[self.columns]
+
+        if self.format == "excel":
+            check_excel_rows(self.rows + len(df))
+            if self._workbook is None:
+                self._workbook = Workbook(write_only=True)
+                self._sheet = self._workbook.create_sheet("Sheet1")
+                self._sheet.append(list(df.columns))
+            append_excel_rows(self._sheet, dataframe_rows(df), self.excel_date_format, self.rows)
+
+        elif self.format == "csv":
+            df.to_csv(self.path, index=False, mode="a" if self.rows else "w", header=not self.rows)
+
+        else:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._open(table.schema)
+            else:
+                schema = promote_schema(self._schema, table.schema)
+                if not schema.equals(self._schema):
+                    self._rewrite(schema)
+            self._writer.write_table(table.cast(self._schema))
+
+    def _open(self, schema) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._schema = schema
+        self._writer = (
+            pq.ParquetWriter(self.path, schema)
+            if self.format == "parquet"
+            else pa.ipc.new_file(str(self.path), schema)
+        )
+
+    def _rewrite(self, schema) -> None:
+        """
+        Vuelve a escribir los lotes ya guardados con el esquema ampliado
+        (p. ej. una columna vacía en el primer lote que luego trae datos).
+        Se lee un lote a la vez, así que la memoria no crece.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._writer.close()
+        staged = self.path.with_name(f"{self.path.name}.tmp")
+        self.path.replace(staged)
+        self._open(schema)
+        try:
+            if self.format == "parquet":
+                with pq.ParquetFile(staged) as source:
+                    for batch in source.iter_batches():
+                        self._writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+            else:
+                with pa.memory_map(str(staged), "r") as source:
+                    reader = pa.ipc.open_file(source)
+                    for i in range(reader.num_record_batches):
+                        self._writer.write_table(pa.Table.from_batches([reader.get_batch(i)]).cast(schema))
+        finally:
+            staged.unlink()
+
+    def close(self) -> None:
+        with span("write"):
+            if self._workbook is not None:
+                self._workbook.save(self.path)
+            if self._writer is not None:
+                self._writer.close()
+
+    def abort(self) -> None:
+        """
+        Descarta la salida incompleta (p. ej. si un lote falla).
+        """
+        if self._sheet is not None:
+            discard_sheet(self._sheet)
+            self._workbook = self._sheet = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def export_excel(
+    source: Path,
+    output_path: Path,
+    memory_map: bool = True,
+    excel_date_format: str = EXCEL_DATE_FORMAT,
+) -> None:
+    """
+    Exportación final a Excel desde un archivo Parquet o Arrow.
+    """
+    write_table(read_table(source, memory_map=memory_map), output_path, excel_date_format)
+
+
+# ---------------------
+# LÍNEA DE COMANDOS
+# ---------------------
+def add_storage_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Agrega las opciones --format y --export-excel a un script.
+    """
+    parser.add_argument(
+        "--format",
+        choices=sorted(FORMAT_SUFFIXES),
+        default="excel",
+        help="Formato del archivo de salida",
+    )
+    parser.add_argument(
+        "--export-excel",
+        action="store_true",
+        help="Exportar también a Excel al terminar (formatos parquet/arrow)",
+    )
+
+
+def finish_output(
+    output_path: Path,
+    args: argparse.Namespace,
+    excel_date_format: str = EXCEL_DATE_FORMAT,
+) -> None:
+    """
+    Genera la exportación Excel opcional de una salida columnar.
+    """
+    if args.export_excel and not is_excel(output_path):
+        excel_path = with_format(output_path, "excel")
+        export_excel(output_path, excel_path, excel_date_format=excel_date_format)
+        print(f"📄 Exportación Excel: {excel_path}")
@@ -0,0 +1,56 @@
+"""
+Micro-benchmark del ajuste de día al fin de mes.
+
+Compara el ajuste original (datetime + relativedelta(day=31) en cada
+llamada) contra clamp_date de las implementaciones de referencia, que
+memoriza cada combinación (año, mes, día) del horizonte.
+
+Month-end clamp micro-benchmark.
+
+Compares the original per-call relativedelta clamp against the memoized
+clamp_date from the reference implementations.
+"""
+
+import argparse
+import random
+import timeit
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+
+from benchmarks.reference_schedules import clamp_date, warm_clamp_cache
+
+
+def legacy_adjust_day(year: int, month: int, day: int) -> datetime:
+    """
+    Ajuste original, usado como referencia.
+    """
+    base = datetime(year, month, 1)
+    last_day = (base + relativedelta(day=31)).day
+    return base.replace(day=min(day, last_day))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    calls = [
+        (rng.randint(2025, 2026), rng.randint(1, 12), rng.randint(1, 31))
+        for _ in range(args.calls)
+    ]
+    warm_clamp_cache(2025, 2026)
+
+    assert all(legacy_adjust_day(*c) == clamp_date(*c) for c in calls[:10_000])
+
+    legacy = timeit.timeit(lambda: [legacy_adjust_day(*c) for c in calls], number=1)
+    cached = timeit.timeit(lambda: [clamp_date(*c) for c in calls], number=1)
+
+    print(f"Llamadas: {args.calls}")
+    print(f"relativedelta: {legacy / args.calls * 1e6:>7.3f} µs/llamada")
+    print(f"clamp_date:    {cached / args.calls * 1e6:>7.3f} µs/llamada")
+
+
+if __name__ == "__main__":
+    main()
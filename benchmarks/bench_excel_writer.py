@@ -0,0 +1,58 @@
+"""
+Benchmark de memoria de la escritura a Excel.
+
+Compara df.to_excel (libro completo en memoria) contra el escritor en modo
+write-only de automation_scripts.storage sobre la salida de renovaciones
+GMM, midiendo tiempo y memoria pico asignada durante la escritura.
+
+Excel writer memory benchmark.
+
+Compares df.to_excel (whole workbook in memory) against the write-only
+streaming writer on the GMM renewal output, measuring time and peak
+allocated memory while writing.
+"""
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from automation_scripts.batch_processing_gmm import EXCEL_DATE_FORMAT, build_schedule, validate_rows
+from automation_scripts.storage import write_table
+from benchmarks.generators import make_gmm_portfolio
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    df = make_gmm_portfolio(args.rows)
+    schedule = build_schedule(df.copy(), validate_rows(df)[0], date_format=None)
+
+    with TemporaryDirectory() as tmp:
+        full_time, full_peak = measure(
+            lambda: schedule.to_excel(Path(tmp) / "completo.xlsx", index=False)
+        )
+        stream_time, stream_peak = measure(
+            lambda: write_table(schedule, Path(tmp) / "streaming.xlsx", EXCEL_DATE_FORMAT)
+        )
+
+    print(f"Filas: {args.rows}, columnas: {schedule.shape[1]}")
+    print(f"df.to_excel: {full_time:>7.2f} s, pico {full_peak / 1024 ** 2:>8.1f} MB")
+    print(f"write-only:  {stream_time:>7.2f} s, pico {stream_peak / 1024 ** 2:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark de la extracción de pólizas desde HTML.
+
+Compara, documento por documento, la búsqueda original (find_field una vez
+por etiqueta, cada una recorriendo todo el árbol) contra el índice de una
+sola pasada de index_labels, y verifica que ambos extraigan los mismos
+valores.
+
+HTML policy extraction benchmark.
+
+Compares per document the original per-label tree scans against the
+single-pass label index and checks both extract the same values.
+"""
+
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from database_construction.create_clients_database import (
+    FIELD_LABELS,
+    PLAN_TAG_ID,
+    index_labels,
+    resolve_plan,
+)
+from benchmarks.generators import make_client_page
+from benchmarks.reference_labels import extract_record
+
+
+def indexed_extract(soup: BeautifulSoup) -> dict:
+    values, ids = index_labels(soup, FIELD_LABELS.values(), [PLAN_TAG_ID])
+    record = {column: values[label] for column, label in FIELD_LABELS.items()}
+    record["Plan"] = resolve_plan(values, ids)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--noise-rows", type=int, default=300)
+    args = parser.parse_args()
+
+    soups = [
+        BeautifulSoup(make_client_page(seed, args.noise_rows), "html.parser")
+        for seed in range(args.documents)
+    ]
+
+    start = time.perf_counter()
+    legacy = [extract_record(soup) for soup in soups]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [indexed_extract(soup) for soup in soups]
+    indexed_time = time.perf_counter() - start
+
+    print(f"Documentos: {args.documents}")
+    print(f"find_field:   {legacy_time / args.documents * 1000:>8.2f} ms/documento")
+    print(f"index_labels: {indexed_time / args.documents * 1000:>8.2f} ms/documento")
+    print(f"Resultados idénticos: {'sí' if legacy == indexed else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
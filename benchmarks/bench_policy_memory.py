@@ -0,0 +1,126 @@
+"""
+Benchmark de memoria de la base de pólizas.
+
+Compara, para N pólizas sintéticas, la representación original (un dict
+de 28 llaves por póliza y un DataFrame con columnas de texto sin tipo)
+contra la compacta (tuplas en el orden de POLICY_COLUMNS y policy_frame
+con categorías, texto Arrow y Suma Asegurada numérica). Los registros se
+miden por el tamaño de sus contenedores (los textos son los mismos en
+ambos casos) y el DataFrame con memory_usage(deep=True). La verificación
+de identidad incluye montos con sufijo de moneda y con formatos que no se
+deben convertir ("1.500.000,00", "500 mil"), que se conservan como texto.
+
+Policy database memory benchmark.
+
+Compares, for N synthetic policies, the original representation (one
+28-key dict per policy and an untyped text DataFrame) against the compact
+one (tuples in POLICY_COLUMNS order and policy_frame with categories,
+Arrow strings and a numeric Suma Asegurada).
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from database_construction.create_clients_database import POLICY_COLUMNS
+from database_construction.policy_store import CATEGORY_COLUMNS, policy_frame
+from benchmarks.generators import client_values
+
+
+# Montos con ruido: valor esperado, o None si debe conservarse el texto
+NOISY_AMOUNTS = {
+    "$1,000,000.00 M.N.": 1_000_000.0,
+    "MXN 2,500.50": 2_500.5,
+    "750000 USD": 750_000.0,
+    "1.500.000,00": None,
+    "500 mil": None,
+}
+
+
+def make_rows(policies: int, seed: int = 0) -> list[tuple]:
+    """
+    Filas sintéticas en el orden de POLICY_COLUMNS.
+    """
+    rng = random.Random(seed)
+    return [
+        (f"poliza_{number}.html", *client_values(rng, number).values())
+        for number in range(policies)
+    ]
+
+
+def with_amounts(rows: list[tuple], amounts: list[str]) -> list[tuple]:
+    """
+    Las primeras filas con Suma Asegurada reemplazada por `amounts`.
+    """
+    column = POLICY_COLUMNS.index("Suma Asegurada")
+    return [row[:column] + (amount,) + row[column + 1:] for row, amount in zip(rows, amounts)]
+
+
+def amounts_preserved(rows: list[tuple]) -> bool:
+    """
+    Los montos con formato reconocido se convierten a su valor y, si hay
+    alguno que no, la columna conserva exactamente el texto original.
+    """
+    parseable = [amount for amount, value in NOISY_AMOUNTS.items() if value is not None]
+    numeric = policy_frame(with_amounts(rows, parseable), POLICY_COLUMNS)["Suma Asegurada"]
+    expected = np.array([NOISY_AMOUNTS[amount] for amount in parseable])
+
+    mixed = with_amounts(rows, list(NOISY_AMOUNTS))
+    text = policy_frame(mixed, POLICY_COLUMNS)["Suma Asegurada"]
+    raw = [row[POLICY_COLUMNS.index("Suma Asegurada")] for row in mixed]
+    return bool((numeric.to_numpy() == expected).all()) and text.tolist() == raw
+
+
+def records_mb(records: list) -> float:
+    """
+    Memoria de la lista y de cada registro, sin contar los textos.
+    """
+    return (sys.getsizeof(records) + sum(map(sys.getsizeof, records))) / 2 ** 20
+
+
+def frame_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--policies", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = make_rows(args.policies, args.seed)
+
+    start = time.perf_counter()
+    dicts = [dict(zip(POLICY_COLUMNS, row)) for row in rows]
+    legacy = pd.DataFrame(dicts).astype(object)
+    legacy_time = time.perf_counter() - start
+    dicts_mb, legacy_mb = records_mb(dicts), frame_mb(legacy)
+    del dicts
+
+    start = time.perf_counter()
+    compact = policy_frame(rows, POLICY_COLUMNS)
+    compact_time = time.perf_counter() - start
+    tuples_mb, compact_mb = records_mb(rows), frame_mb(compact)
+
+    same = all(
+        legacy[column].astype(str).tolist() == compact[column].astype(str).tolist()
+        for column in CATEGORY_COLUMNS
+    ) and (
+        pd.to_numeric(legacy["Suma Asegurada"].str.replace(r"[$,\s]", "", regex=True))
+        .to_numpy() == compact["Suma Asegurada"].to_numpy()
+    ).all() and amounts_preserved(rows)
+
+    print(f"Pólizas: {args.policies:,}")
+    print(f"{'':<22}{'Registros (MB)':>16}{'DataFrame (MB)':>16}{'Tiempo (s)':>12}")
+    print(f"{'dicts + object':<22}{dicts_mb:>16,.1f}{legacy_mb:>16,.1f}{legacy_time:>12,.2f}")
+    print(f"{'tuplas + compacta':<22}{tuples_mb:>16,.1f}{compact_mb:>16,.1f}{compact_time:>12,.2f}")
+    print(f"Reducción del DataFrame: {legacy_mb / compact_mb:,.1f}x")
+    print(f"Valores idénticos: {'sí' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark de la extracción de primas tradicionales.
+
+Compara la versión original (árbol BeautifulSoup completo + find_all de
+filas GridRow) contra el extractor incremental de lxml, midiendo tiempo y
+memoria pico por archivo, y verifica que ambos devuelvan la misma tupla.
+
+Traditional premium extraction benchmark.
+
+Compares the full BeautifulSoup tree against the incremental lxml
+extractor (time and peak memory per file) and checks both return the
+same tuple.
+"""
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from bs4 import BeautifulSoup
+
+from business_calculations.primas_tradicionales_calculation import (
+    PREMIUM_COLUMN_INDEX,
+    extract_premium_file,
+    read_html_file,
+)
+from benchmarks.generators import make_grid_page
+
+
+def legacy_extract(html_content: str, file_name: str) -> tuple | None:
+    """
+    Extracción original con BeautifulSoup, usada como referencia.
+    """
+    soup = BeautifulSoup(html_content, "lxml")
+    for row in soup.find_all("tr", class_="GridRow"):
+        policy_link = row.find("a", id=lambda x: x and "lnkPoliza" in x)
+        if not policy_link:
+            continue
+
+        cells = row.find_all("td")
+        premium = ""
+        if len(cells) > PREMIUM_COLUMN_INDEX:
+            premium = cells[PREMIUM_COLUMN_INDEX].get_text(strip=True)
+        return file_name, policy_link.text.strip(), premium
+    return None
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--first-valid", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        html_file = Path(tmp) / "grid.html"
+        html_file.write_text(make_grid_page(args.rows, args.first_valid), encoding="latin-1")
+        size_mb = html_file.stat().st_size / 1024 ** 2
+
+        legacy, legacy_time, legacy_peak = measure(
+            lambda path: legacy_extract(read_html_file(path), path.name), html_file
+        )
+        streamed, stream_time, stream_peak = measure(lambda path: extract_premium_file(path)[0], html_file)
+
+    print(f"Archivo: {size_mb:.1f} MB, primera fila válida: {args.first_valid}")
+    print(f"BeautifulSoup: {legacy_time:>7.3f} s, pico {legacy_peak / 1024 ** 2:>8.1f} MB")
+    print(f"lxml stream:   {stream_time:>7.3f} s, pico {stream_peak / 1024 ** 2:>8.1f} MB")
+    print(f"Resultados idénticos: {'sí' if legacy == streamed else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
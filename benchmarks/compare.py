@@ -0,0 +1,93 @@
+"""
+Comparación de resultados de la suite de benchmarks entre commits.
+
+Lee dos JSON generados por benchmarks.suite, muestra por etapa y tamaño
+la variación de tiempo y de memoria pico y termina con código 1 si algún
+caso empeoró más que el umbral indicado.
+
+Benchmark suite results comparison between commits.
+
+Reads two JSON files written by benchmarks.suite, shows the time and
+peak memory change per stage and size, and exits with status 1 when any
+case regressed beyond the given threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def load_results(path: Path) -> tuple[dict, dict]:
+    report = json.loads(path.read_text(encoding="utf-8"))
+    cases = {(result["stage"], result["size"]): result for result in report["results"]}
+    return report, cases
+
+
+def change(before: float | None, after: float | None) -> float | None:
+    if not before or after is None:
+        return None
+    return after / before - 1
+
+
+def format_change(value: float | None) -> str:
+    return "n/d" if value is None else f"{value:+.1%}"
+
+
+# ---------------------
+# PROCESO PRINCIPAL
+# ---------------------
+def compare(baseline: Path, candidate: Path, threshold: float = 0.10) -> list[tuple]:
+    """
+    Imprime la comparación y devuelve los casos que empeoraron más que
+    `threshold` en tiempo o en memoria pico.
+    """
+    base_report, base_cases = load_results(baseline)
+    new_report, new_cases = load_results(candidate)
+
+    print(f"Base: {base_report.get('commit')}  Nuevo: {new_report.get('commit')}")
+    print(f"{'Etapa':<22}{'Tamaño':>7}{'Tiempo base':>13}{'Tiempo nuevo':>14}{'Δ tiempo':>10}{'Δ memoria':>11}")
+
+    regressions = []
+    for key in base_cases:
+        if key not in new_cases:
+            continue
+        before, after = base_cases[key], new_cases[key]
+        time_change = change(before["seconds"], after["seconds"])
+        memory_change = change(before["peak_rss_mb"], after["peak_rss_mb"])
+
+        worse = [
+            value for value in (time_change, memory_change)
+            if value is not None and value > threshold
+        ]
+        if worse:
+            regressions.append((*key, time_change, memory_change))
+
+        flag = " ⚠️" if worse else ""
+        print(
+            f"{key[0]:<22}{key[1]:>7}{before['seconds']:>12.2f}s{after['seconds']:>13.2f}s"
+            f"{format_change(time_change):>10}{format_change(memory_change):>11}{flag}"
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline", type=Path, help="JSON del commit de referencia")
+    parser.add_argument("candidate", type=Path, help="JSON del commit a evaluar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento tolerado (0.10 = 10 %%)")
+    args = parser.parse_args()
+
+    regressions = compare(args.baseline, args.candidate, args.threshold)
+    if regressions:
+        print(f"⚠️ Casos con regresión: {len(regressions)}")
+        sys.exit(1)
+    print("✅ Sin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
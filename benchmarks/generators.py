@@ -0,0 +1,223 @@
+"""
+Generadores sintéticos y reproducibles para los benchmarks.
+
+Este módulo crea, a partir de una semilla, carteras de renovación con todas
+las formas de pago, listas de nombres de clientes y páginas HTML de cliente
+y de grid (GridRow) con la forma que esperan extract_policy_data y
+extract_premium_data, para medir el pipeline sin datos reales.
+
+Seeded synthetic generators for the benchmarks.
+
+This module builds, from a seed, renewal portfolios covering every payment
+frequency, client name lists, and client and GridRow HTML pages shaped
+like what the extractors expect, so the pipeline can be measured without
+customer data.
+"""
+
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from automation_scripts.storage import write_table
+from business_calculations.primas_tradicionales_calculation import PREMIUM_COLUMN_INDEX
+from database_construction.create_clients_database import FIELD_LABELS, PLAN_TAG_ID
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+GMM_FREQUENCIES = ["Mensual", "Bimestral", "Trimestral", "Semestral", "Anual"]
+FLEX_FREQUENCIES = ["Mensual", "Semestral", "Trimestral", "Anual"]
+
+FIRST_NAMES = ["ANA", "JUAN", "MARÍA", "JOSÉ", "LUIS", "PAULA", "CARLOS", "SOFÍA", "JORGE", "LAURA"]
+LAST_NAMES = ["PÉREZ", "LÓPEZ", "GARCÍA", "HERNÁNDEZ", "MARTÍNEZ", "RAMÍREZ", "TORRES", "FLORES"]
+NAME_NOISE = ["", " ", "  ", " 123", " Sr", ". Cliente preferente", "  2", " ref. 55"]
+
+STATUSES = ["Vigente", "Cancelada", "Suspendida", "Vencida"]
+CURRENCIES = ["MXN", "USD", "UDI"]
+INSURANCE_TYPES = ["Vida", "Gastos Médicos Mayores", "Ahorro", "Inversión"]
+STATES = ["Jalisco", "Nuevo León", "Ciudad de México", "Puebla", "Yucatán"]
+
+
+# ---------------------
+# CARTERAS DE RENOVACIÓN
+# ---------------------
+def issue_dates(rng: np.random.Generator, rows: int) -> pd.DatetimeIndex:
+    return pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 365 * 10, rows), unit="D")
+
+
+def payment_days(rng: np.random.Generator, rows: int) -> np.ndarray:
+    """
+    Días de cobro entre 0 y 31, con 20 % vacíos.
+    """
+    days = rng.integers(0, 32, rows).astype("float64")
+    days[rng.random(rows) < 0.2] = np.nan
+    return days
+
+
+def frequencies(rng: np.random.Generator, rows: int, choices: list[str]) -> np.ndarray:
+    """
+    Formas de pago al azar; las primeras filas recorren todas las opciones
+    para que cualquier tamaño las cubra.
+    """
+    values = rng.choice(choices, rows)
+    head = min(rows, len(choices))
+    values[:head] = choices[:head]
+    return values
+
+
+def make_gmm_portfolio(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Genera una cartera GMM/Tradicional sintética con todas las formas de pago.
+    """
+    rng = np.random.default_rng(seed)
+    issue = issue_dates(rng, rows)
+
+    return pd.DataFrame({
+        "Póliza": [f"P{i:07d}" for i in range(rows)],
+        "Fecha Emisión": issue.strftime("%d/%m/%Y"),
+        "Día de Cobro": payment_days(rng, rows),
+        "Forma de Pago": frequencies(rng, rows, GMM_FREQUENCIES),
+    })
+
+
+def make_flex_portfolio(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Genera una cartera de flexibles sintética sin fechas 29 de febrero.
+    """
+    rng = np.random.default_rng(seed)
+    issue = issue_dates(rng, rows)
+    issue = issue.where(~((issue.month == 2) & (issue.day == 29)), issue - pd.Timedelta(days=1))
+
+    return pd.DataFrame({
+        "Póliza": [f"F{i:07d}" for i in range(rows)],
+        "Fecha Emisión": issue.strftime("%d/%m/%Y"),
+        "Día de Cobro": payment_days(rng, rows),
+        "Forma de Pago": frequencies(rng, rows, FLEX_FREQUENCIES),
+    })
+
+
+def make_names(rows: int, seed: int = 0, distinct: int = 50_000) -> pd.DataFrame:
+    """
+    Genera nombres de clientes con ruido (minúsculas, números, texto tras
+    un punto, espacios extra); como en una cartera real, los nombres se
+    repiten entre filas.
+    """
+    rng = random.Random(seed)
+    pool = [
+        f"{rng.choice(FIRST_NAMES)}  {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}{rng.choice(NAME_NOISE)}"
+        for _ in range(min(rows, distinct))
+    ]
+    names = [rng.choice(pool) for _ in range(rows)]
+    return pd.DataFrame({"NOMBRES": names})
+
+
+def write_portfolio(df: pd.DataFrame, path: Path) -> Path:
+    """
+    Guarda una cartera sintética (Excel, Parquet o Arrow según la extensión).
+    """
+    write_table(df, path)
+    return path
+
+
+# ---------------------
+# PÁGINAS HTML
+# ---------------------
+def client_values(rng: random.Random, seed: int) -> dict:
+    """
+    Valores plausibles para cada campo de la página de cliente.
+    """
+    issue = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2010, 2024)}"
+    birth = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}"
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    return {
+        "Número de Póliza": f"{10_000_000 + seed}",
+        "Tipo de Seguro": rng.choice(INSURANCE_TYPES),
+        "Plan": f"Plan {seed % 7}",
+        "Estatus": rng.choice(STATUSES),
+        "Suma Asegurada": f"$ {rng.randint(50, 50_000) * 1000:,}.00",
+        "Moneda": rng.choice(CURRENCIES),
+        "Fecha Emisión": issue,
+        "Forma de Pago": rng.choice(GMM_FREQUENCIES),
+        "Medio de Cobro": rng.choice(["Tarjeta", "Domiciliación", "Ventanilla"]),
+        "Banco": rng.choice(["BBVA", "Banorte", "Santander", "HSBC"]),
+        "Cuenta / CLABE": f"{rng.randint(10 ** 17, 10 ** 18 - 1)}",
+        "Día de Cobro": str(rng.randint(1, 31)),
+        "Agente": f"AG{rng.randint(1, 500):04d}",
+        "Correo Agente": f"agente{rng.randint(1, 500)}@example.com",
+        "Teléfono Agente": f"55{rng.randint(10 ** 7, 10 ** 8 - 1)}",
+        "Contratante": name,
+        "Asegurado Principal": name,
+        "Fecha de Nacimiento": birth,
+        "Calle y Número": f"Calle {rng.randint(1, 300)} #{rng.randint(1, 999)}",
+        "Colonia": f"Colonia {rng.randint(1, 80)}",
+        "Ciudad o Municipio": f"Municipio {rng.randint(1, 40)}",
+        "Estado": rng.choice(STATES),
+        "Código Postal": f"{rng.randint(1000, 99999):05d}",
+        "País": "México",
+        "Correo Electrónico": f"cliente{seed}@example.com",
+        "Teléfono Particular": f"33{rng.randint(10 ** 7, 10 ** 8 - 1)}",
+        "Teléfono Oficina": f"81{rng.randint(10 ** 7, 10 ** 8 - 1)}",
+    }
+
+
+def make_client_page(seed: int, noise_rows: int = 300) -> str:
+    """
+    Genera una página de cliente sintética (etiqueta en una celda y valor
+    en la siguiente) con filas de relleno entre campos; una de cada tres
+    páginas no trae el span del plan y se resuelve por etiqueta.
+    """
+    rng = random.Random(seed)
+    values = client_values(rng, seed)
+    rows = []
+    for column, label in FIELD_LABELS.items():
+        for _ in range(rng.randint(0, noise_rows // len(FIELD_LABELS))):
+            rows.append(f"<tr><td>Dato {rng.random():.6f}</td><td><span>{rng.randint(0, 9999)}</span></td></tr>")
+        rows.append(f"<tr><td>{label}:</td><td>{values[column]}</td></tr>")
+
+    plan = f"<span id='{PLAN_TAG_ID}'>{values['Plan']}</span>" if seed % 3 else ""
+    return f"<html><body><div>Planes tradicionales</div>{plan}<table>{''.join(rows)}</table></body></html>"
+
+
+def make_grid_page(rows: int, first_valid: int, seed: int = 0) -> str:
+    """
+    Genera una exportación de grid con `rows` filas; la primera fila con
+    enlace de póliza es la número `first_valid`.
+    """
+    rng = random.Random(seed)
+    lines = ["<html><head><title>Cartera</title></head><body><table>"]
+    for i in range(rows):
+        cells = [f"<td>{rng.randint(0, 99999)}</td>" for _ in range(PREMIUM_COLUMN_INDEX + 3)]
+        if i >= first_valid:
+            cells[1] = f"<td><a id='ctl00_grid_ctl{i:05d}_lnkPoliza' href='#'> {1000000 + i} </a></td>"
+            cells[PREMIUM_COLUMN_INDEX] = f"<td> $ {rng.randint(100, 99999):,}.00 </td>"
+        lines.append(f"<tr class='GridRow'>{''.join(cells)}</tr>")
+    lines.append("</table></body></html>")
+    return "\n".join(lines)
+
+
+def write_client_pages(folder: Path, documents: int, seed: int = 0, noise_rows: int = 300) -> Path:
+    """
+    Escribe `documents` páginas de cliente (utf-8) en una carpeta.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(documents):
+        page = make_client_page(seed * 1_000_003 + i, noise_rows)
+        (folder / f"cliente_{i:07d}.html").write_text(page, encoding="utf-8")
+    return folder
+
+
+def write_grid_pages(folder: Path, pages: int, rows: int, seed: int = 0) -> Path:
+    """
+    Escribe `pages` exportaciones de grid (latin-1) de `rows` filas cada una;
+    la primera fila válida de cada página se elige al azar.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(pages):
+        page = make_grid_page(rows, rng.randrange(rows), rng.randrange(2 ** 32))
+        (folder / f"grid_{i:07d}.html").write_text(page, encoding="latin-1")
+    return folder
@@ -0,0 +1,61 @@
+"""
+Implementación de referencia de la extracción de pólizas desde HTML.
+
+Estas son las versiones originales de find_field y extract_plan de
+create_clients_database: un recorrido completo del árbol de
+BeautifulSoup por etiqueta. El script usa solo el índice de una pasada
+(index_labels / resolve_plan); estas versiones se conservan para medirlo
+(bench_label_index) y como referencia de las pruebas en tests/.
+
+Reference HTML policy extraction.
+
+These are the original find_field and extract_plan from
+create_clients_database, one full BeautifulSoup tree scan per label. The
+script only uses the single-pass index; these are kept to benchmark it
+and as the reference for the tests in tests/.
+"""
+
+from bs4 import BeautifulSoup
+
+from database_construction.create_clients_database import FIELD_LABELS
+
+
+def find_field(soup: BeautifulSoup, label: str) -> str:
+    """
+    Busca un campo por etiqueta textual y devuelve el valor asociado limpio.
+    """
+    element = soup.find(string=lambda x: x and label in x)
+    if element:
+        next_element = element.find_next(["td", "div", "span"])
+        if next_element:
+            return next_element.get_text(strip=True)
+    return ""
+
+
+def extract_plan(soup: BeautifulSoup) -> str:
+    """
+    Extrae el plan asegurador priorizando selectores específicos
+    y usando búsqueda por texto como respaldo.
+    """
+    plan_tag = soup.find(id="ctl00_ContentPlaceHolder1_lbDescL")
+    if plan_tag and plan_tag.get_text(strip=True):
+        return plan_tag.get_text(strip=True)
+
+    plan_text = soup.find(string=lambda x: x and "Plan" in x)
+    if plan_text:
+        next_element = plan_text.find_next(["td", "div", "span"])
+        if next_element:
+            value = next_element.get_text(strip=True)
+            if value.lower() not in ["planes tradicionales", "plan", "planes"]:
+                return value
+
+    return ""
+
+
+def extract_record(soup: BeautifulSoup) -> dict:
+    """
+    Extracción original: un recorrido completo del árbol por etiqueta.
+    """
+    record = {column: find_field(soup, label) for column, label in FIELD_LABELS.items()}
+    record["Plan"] = extract_plan(soup)
+    return record
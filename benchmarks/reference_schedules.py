@@ -0,0 +1,371 @@
+"""
+Implementaciones de referencia de los calendarios de renovación.
+
+Estas son las versiones originales fila por fila (iterrows y datetime, con
+el ajuste de día memorizado) de batch_processing_gmm y
+primas_flexibles_calculation. Los scripts usan solo el motor vectorizado;
+estas versiones se conservan para medirlo (bench_gmm_schedule,
+bench_flex_schedule, bench_clamp) y como referencia de las pruebas de
+regresión en tests/, en formato ancho y largo.
+
+Reference renewal schedule implementations.
+
+These are the original row-by-row versions (iterrows and datetime, with a
+memoized day clamp) of batch_processing_gmm and
+primas_flexibles_calculation. The scripts only use the vectorized engine;
+these are kept to benchmark it and as the reference for the regression
+tests in tests/, in both wide and long layouts.
+"""
+
+from calendar import monthrange
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from automation_scripts import batch_processing_gmm as gmm
+from automation_scripts.renewal_calendar import LONG_COLUMNS, POLICY_COLUMNS
+from business_calculations import primas_flexibles_calculation as flex
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+MAX_DAY = 31  # Cualquier día mayor se ajusta igual que el 31
+
+
+# ---------------------
+# AJUSTE DE DÍAS
+# ---------------------
+@lru_cache(maxsize=None)
+def _clamp(year: int, month: int, day: int) -> datetime:
+    return datetime(year, month, min(day, monthrange(year, month)[1]))
+
+
+def clamp_date(year: int, month: int, day: int) -> datetime:
+    """
+    Devuelve la fecha (year, month, day) ajustando el día al último del mes
+    si no existe. El resultado se memoriza: como el día se limita a 31, la
+    tabla tiene a lo sumo 12 x 31 entradas por año del horizonte.
+    """
+    return _clamp(year, month, min(day, MAX_DAY))
+
+
+def warm_clamp_cache(start_year: int, end_year: int) -> None:
+    """
+    Precalcula la tabla de ajuste para todo el horizonte.
+    """
+    for year in range(start_year, end_year + 1):
+        for month in range(1, 13):
+            for day in range(1, MAX_DAY + 1):
+                _clamp(year, month, day)
+
+
+def generate_grace_periods(renewal_date: datetime) -> tuple:
+    """
+    Calcula amparos de 30 y 45 días desde la fecha de renovación.
+    """
+    return (
+        renewal_date + timedelta(days=30),
+        renewal_date + timedelta(days=45),
+    )
+
+
+def long_frame(df: pd.DataFrame, rows: list[tuple]) -> pd.DataFrame:
+    """
+    Arma el formato largo a partir de tuplas (posición, cuota, fecha), con
+    las mismas columnas y tipos que renewal_calendar.long_schedule_frame.
+    """
+    positions = np.array([row[0] for row in rows], dtype="int64")
+    dates = np.array([row[2] for row in rows], dtype="datetime64[D]")
+
+    frame = {"Fila": df.index.to_numpy()[positions] + 1}
+    policy_column = next((c for c in POLICY_COLUMNS if c in df.columns), None)
+    if policy_column:
+        frame[policy_column] = df[policy_column].to_numpy()[positions]
+
+    frame[LONG_COLUMNS[0]] = np.array([row[1] for row in rows], dtype="int64")
+    frame[LONG_COLUMNS[1]] = dates
+    frame[LONG_COLUMNS[2]] = dates + 30
+    frame[LONG_COLUMNS[3]] = dates + 45
+    return pd.DataFrame(frame)
+
+
+# ---------------------
+# GMM / TRADICIONAL
+# ---------------------
+def parse_issue_date(value: str) -> datetime:
+    """
+    Convierte valores de Fecha Emisión a datetime soportando múltiples formatos.
+    """
+    value = str(value).strip()
+    if not value:
+        raise ValueError("Fecha Emisión vacía")
+
+    formats = ["%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+
+    return pd.to_datetime(value, dayfirst=True, errors="raise").to_pydatetime()
+
+
+def get_payment_day(issue_date: datetime, payment_day) -> int:
+    """
+    Regla de negocio:
+    - Si hay Día de Cobro, se utiliza.
+    - Si no, se toma el día de la Fecha Emisión.
+    """
+    try:
+        payment_day = int(payment_day)
+        return payment_day if payment_day > 0 else issue_date.day
+    except Exception:
+        return issue_date.day
+
+
+def generate_dates(
+    issue_date: datetime,
+    payment_day: int,
+    step: int,
+    start_year: int = gmm.START_YEAR,
+    end_year: int = gmm.END_YEAR,
+) -> list:
+    """
+    Genera fechas de renovación con un intervalo en meses.
+    """
+    start_date, end_date = datetime(start_year, 1, 1), datetime(end_year, 12, 31)
+    dates = []
+    year = start_year
+    month = issue_date.month
+    current = clamp_date(year, month, payment_day)
+
+    while current < start_date:
+        month += step
+        if month > 12:
+            month -= 12
+            year += 1
+        current = clamp_date(year, month, payment_day)
+
+    while current <= end_date:
+        dates.append(current)
+        month += step
+        if month > 12:
+            month -= 12
+            year += 1
+        current = clamp_date(year, month, payment_day)
+
+    return dates
+
+
+def generate_annual_dates(
+    issue_date: datetime,
+    payment_day: int,
+    start_year: int = gmm.START_YEAR,
+    end_year: int = gmm.END_YEAR,
+) -> list:
+    return [clamp_date(year, issue_date.month, payment_day) for year in range(start_year, end_year + 1)]
+
+
+def gmm_dates(
+    issue_date: datetime,
+    payment_day,
+    frequency: str,
+    start_year: int = gmm.START_YEAR,
+    end_year: int = gmm.END_YEAR,
+) -> list:
+    """
+    Cuotas de una póliza GMM según su forma de pago.
+    """
+    payment_day = get_payment_day(issue_date, payment_day)
+    frequency = str(frequency).strip().lower()
+    if frequency == "anual":
+        return generate_annual_dates(issue_date, payment_day, start_year, end_year)
+    return generate_dates(issue_date, payment_day, gmm.PAYMENT_COLUMNS[frequency][1], start_year, end_year)
+
+
+def gmm_wide_schedule(df: pd.DataFrame, issue_dates: pd.Series) -> pd.DataFrame:
+    """
+    Implementación original fila por fila del formato ancho GMM.
+    """
+    for freq, (count, _) in gmm.PAYMENT_COLUMNS.items():
+        for i in range(count):
+            df[f"{freq.capitalize()}_{i+1}"] = ""
+
+    df["Fecha Renovación"] = ""
+    df["Amparo_30_días"] = ""
+    df["Amparo_15_días"] = ""
+
+    for idx, row in df.iterrows():
+        frequency = str(row["Forma de Pago"]).strip().lower()
+        count, _ = gmm.PAYMENT_COLUMNS[frequency]
+        dates = gmm_dates(issue_dates.loc[idx], row["Día de Cobro"], frequency)
+
+        renewal_date = dates[0]
+        df.at[idx, "Fecha Renovación"] = renewal_date.strftime(gmm.DATE_FORMAT)
+
+        g30, g15 = generate_grace_periods(renewal_date)
+        df.at[idx, "Amparo_30_días"] = g30.strftime(gmm.DATE_FORMAT)
+        df.at[idx, "Amparo_15_días"] = g15.strftime(gmm.DATE_FORMAT)
+
+        for i, date in enumerate(dates[:count]):
+            df.at[idx, f"{frequency.capitalize()}_{i+1}"] = date.strftime(gmm.DATE_FORMAT)
+
+    return df
+
+
+def gmm_long_schedule(
+    df: pd.DataFrame,
+    issue_dates: pd.Series,
+    start_year: int = gmm.START_YEAR,
+    end_year: int = gmm.END_YEAR,
+) -> pd.DataFrame:
+    """
+    Formato largo GMM fila por fila: una fila por póliza y cuota.
+    """
+    rows = []
+    for position, (idx, row) in enumerate(df.iterrows()):
+        dates = gmm_dates(issue_dates.loc[idx], row["Día de Cobro"], row["Forma de Pago"], start_year, end_year)
+        rows.extend((position, number, date) for number, date in enumerate(dates, 1))
+    return long_frame(df, rows)
+
+
+# ---------------------
+# PRODUCTOS FLEXIBLES
+# ---------------------
+def flex_payment_day(row: pd.Series) -> int:
+    payment_day = row.get("Día de Cobro", 0)
+    return int(payment_day) if pd.notna(payment_day) else 0
+
+
+def generate_monthly_flex(
+    issue_date: datetime,
+    payment_day: int,
+    start_year: int = flex.START_YEAR,
+    end_year: int = flex.END_YEAR,
+) -> list:
+    """
+    Genera pagos mensuales para productos flexibles.
+    """
+    start_date, end_date = datetime(start_year, 1, 1), datetime(end_year, 12, 31)
+    dates = []
+
+    renewal = datetime(start_year, issue_date.month, issue_date.day)
+    if start_date <= renewal <= end_date:
+        dates.append(renewal)
+
+    day_to_use = payment_day if payment_day > 0 else renewal.day
+
+    year, month = renewal.year, renewal.month + 1
+    if month > 12:
+        month, year = 1, year + 1
+
+    while True:
+        current = clamp_date(year, month, day_to_use)
+        if current > end_date:
+            break
+        if current >= start_date:
+            dates.append(current)
+
+        month += 1
+        if month > 12:
+            month, year = 1, year + 1
+
+    return dates
+
+
+def generate_fixed_months(
+    issue_date: datetime,
+    payment_day: int,
+    step: int,
+    start_year: int = flex.START_YEAR,
+    end_year: int = flex.END_YEAR,
+) -> list:
+    """
+    Genera pagos en meses fijos cada `step` meses desde enero (trimestral:
+    enero, abril, julio, octubre; semestral: enero y julio) de cada año.
+    """
+    day_to_use = payment_day if payment_day > 0 else issue_date.day
+    return [
+        clamp_date(year, month, day_to_use)
+        for year in range(start_year, end_year + 1)
+        for month in range(1, 13, step)
+    ]
+
+
+def generate_annual(
+    issue_date: datetime,
+    start_year: int = flex.START_YEAR,
+    end_year: int = flex.END_YEAR,
+) -> list:
+    """
+    Genera el pago anual en el aniversario de la emisión de cada año.
+    """
+    return [clamp_date(year, issue_date.month, issue_date.day) for year in range(start_year, end_year + 1)]
+
+
+def flex_wide_schedule(df: pd.DataFrame, issue_dates: pd.Series) -> pd.DataFrame:
+    """
+    Implementación original fila por fila del formato ancho de flexibles.
+    Los pagos trimestrales, semestrales y anual cubren solo el primer año.
+    """
+    df["Fecha Renovación"] = ""
+    for col in flex.MONTHLY_COLS + flex.SEMIANNUAL_COLS + flex.QUARTERLY_COLS + [flex.ANNUAL_COL] + flex.GRACE_COLS:
+        df[col] = ""
+
+    for idx, row in df.iterrows():
+        issue_date = issue_dates.loc[idx]
+        payment_day = flex_payment_day(row)
+        payment_type = str(row["Forma de Pago"]).strip().lower()
+
+        renewal_date = datetime(flex.START_YEAR, issue_date.month, issue_date.day)
+        df.at[idx, "Fecha Renovación"] = renewal_date.strftime(flex.DATE_FORMAT)
+
+        g30, g15 = generate_grace_periods(renewal_date)
+        df.at[idx, "Amparo_30_días"] = g30.strftime(flex.DATE_FORMAT)
+        df.at[idx, "Amparo_15_días"] = g15.strftime(flex.DATE_FORMAT)
+
+        if payment_type == "mensual":
+            columns, dates = flex.MONTHLY_COLS, generate_monthly_flex(issue_date, payment_day)
+        elif payment_type == "semestral":
+            columns, dates = flex.SEMIANNUAL_COLS, generate_fixed_months(issue_date, payment_day, 6)
+        elif payment_type == "trimestral":
+            columns, dates = flex.QUARTERLY_COLS, generate_fixed_months(issue_date, payment_day, 3)
+        else:
+            columns, dates = [flex.ANNUAL_COL], generate_annual(issue_date)
+
+        for column, date in zip(columns, dates):
+            df.at[idx, column] = date.strftime(flex.DATE_FORMAT)
+
+    return df
+
+
+def flex_long_schedule(
+    df: pd.DataFrame,
+    issue_dates: pd.Series,
+    start_year: int = flex.START_YEAR,
+    end_year: int = flex.END_YEAR,
+) -> pd.DataFrame:
+    """
+    Formato largo de flexibles fila por fila: todos los pagos del
+    horizonte, una fila por póliza y pago.
+    """
+    rows = []
+    for position, (idx, row) in enumerate(df.iterrows()):
+        issue_date = issue_dates.loc[idx]
+        payment_day = flex_payment_day(row)
+        payment_type = str(row["Forma de Pago"]).strip().lower()
+
+        if payment_type == "mensual":
+            dates = generate_monthly_flex(issue_date, payment_day, start_year, end_year)
+        elif payment_type == "anual":
+            dates = generate_annual(issue_date, start_year, end_year)
+        else:
+            step = flex.FIXED_MONTH_STEPS[payment_type]
+            dates = generate_fixed_months(issue_date, payment_day, step, start_year, end_year)
+
+        rows.extend((position, number, date) for number, date in enumerate(dates, 1))
+    return long_frame(df, rows)
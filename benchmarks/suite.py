@@ -0,0 +1,263 @@
+"""
+Suite de benchmarks del pipeline completo.
+
+Genera entradas sintéticas reproducibles (semilla fija) para cada etapa
+del pipeline, ejecuta cada etapa de principio a fin (lectura, cálculo y
+escritura) a 1k, 100k y 1M filas en un proceso nuevo por caso, y guarda
+tiempo y memoria pico en un JSON que puede compararse entre commits con
+benchmarks.compare.
+
+En las etapas HTML las "filas" son filas de tabla dentro de los HTML:
+páginas de cliente de ~100 filas y exportaciones de grid de 1,000 filas.
+
+Full pipeline benchmark suite.
+
+Builds seeded synthetic inputs for every pipeline stage, runs each stage
+end to end (read, compute, write) at 1k, 100k and 1M rows in a fresh
+process per case, and stores wall-clock time and peak memory in a JSON
+file that benchmarks.compare can diff between commits.
+
+For the HTML stages "rows" are table rows inside the pages: ~100-row
+client pages and 1,000-row grid exports.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from automation_scripts.batch_processing_gmm import process_file as run_gmm_calculation
+from automation_scripts.resource_usage import isolated_executor, peak_rss_mb
+from automation_scripts.storage import FORMAT_SUFFIXES, with_format
+from benchmarks.generators import (
+    make_flex_portfolio,
+    make_gmm_portfolio,
+    make_names,
+    write_client_pages,
+    write_grid_pages,
+    write_portfolio,
+)
+from business_calculations.primas_flexibles_calculation import process_file as run_flex_calculation
+from business_calculations.primas_tradicionales_calculation import process_html_folder
+from data_cleaning.name_normalization import clean_names_file
+from database_construction.create_clients_database import build_policy_database
+from database_construction.html_extraction import build_html_outputs
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+CLIENT_PAGE_ROWS = 100  # Filas de tabla por página de cliente
+GRID_PAGE_ROWS = 1_000  # Filas GridRow por exportación de grid
+
+RESULTS_DIR = Path("benchmarks/results")
+PRELOAD_MODULES = [
+    "automation_scripts.batch_processing_gmm",
+    "business_calculations.primas_flexibles_calculation",
+    "business_calculations.primas_tradicionales_calculation",
+    "data_cleaning.name_normalization",
+    "database_construction.create_clients_database",
+    "database_construction.html_extraction",
+]
+
+
+# ---------------------
+# ENTRADAS SINTÉTICAS
+# ---------------------
+def prepare_names(rows: int, folder: Path, seed: int, fmt: str) -> Path:
+    return write_portfolio(make_names(rows, seed), with_format(folder / "Limpiezanombres", fmt))
+
+
+def prepare_gmm(rows: int, folder: Path, seed: int, fmt: str) -> Path:
+    return write_portfolio(
+        make_gmm_portfolio(rows, seed), with_format(folder / "Renovaciones_GMM_Tradicional", fmt)
+    )
+
+
+def prepare_flex(rows: int, folder: Path, seed: int, fmt: str) -> Path:
+    return write_portfolio(
+        make_flex_portfolio(rows, seed), with_format(folder / "Renovaciones_Flexibles", fmt)
+    )
+
+
+def prepare_premiums(rows: int, folder: Path, seed: int, fmt: str) -> Path:
+    pages = max(1, rows // GRID_PAGE_ROWS)
+    return write_grid_pages(folder / "html_tradicional", pages, GRID_PAGE_ROWS, seed)
+
+
+def prepare_policies(rows: int, folder: Path, seed: int, fmt: str) -> Path:
+    documents = max(1, rows // CLIENT_PAGE_ROWS)
+    # make_client_page reparte las filas de relleno entre los 27 campos.
+    return write_client_pages(folder / "html_clientes", documents, seed, CLIENT_PAGE_ROWS * 2)
+
+
+# ---------------------
+# ETAPAS
+# ---------------------
+def run_names(source: Path, output: Path) -> None:
+    clean_names_file(source, output, "NOMBRES")
+
+
+def run_policies(source: Path, output: Path) -> None:
+    build_policy_database(source, output)
+
+
+def run_html_extraction(source: Path, output: Path) -> None:
+    build_html_outputs(
+        source,
+        {"policy": output, "premium": output.with_name(f"{output.stem}_primas{output.suffix}")},
+    )
+
+
+STAGES = {
+    "name_cleaning": (prepare_names, run_names),
+    "gmm_renewals": (prepare_gmm, run_gmm_calculation),
+    "flex_renewals": (prepare_flex, run_flex_calculation),
+    "traditional_premiums": (prepare_premiums, process_html_folder),
+    "policy_database": (prepare_policies, run_policies),
+    "html_extraction": (prepare_policies, run_html_extraction),
+}
+
+
+def execute_case(stage: str, source: Path, output: Path) -> dict:
+    """
+    Ejecuta una etapa dentro de un proceso aislado y devuelve su tiempo,
+    la memoria con la que arrancó el proceso y su memoria pico.
+    """
+    _, run = STAGES[stage]
+    baseline = peak_rss_mb()
+
+    # Los mensajes por archivo de las etapas no forman parte de la medición.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        run(source, output)
+        elapsed = time.perf_counter() - start
+
+    return {"seconds": elapsed, "baseline_rss_mb": baseline, "peak_rss_mb": peak_rss_mb()}
+
+
+# ---------------------
+# PROCESO PRINCIPAL
+# ---------------------
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def input_files(source: Path) -> int:
+    return len(list(source.glob("*.html"))) if source.is_dir() else 1
+
+
+def run_suite(
+    stages: list[str],
+    sizes: list[str],
+    data_dir: Path,
+    repeat: int = 1,
+    seed: int = 0,
+    input_format: str = "excel",
+    output_format: str = "parquet",
+) -> list[dict]:
+    """
+    Ejecuta cada combinación etapa/tamaño `repeat` veces y conserva el
+    menor tiempo y la mayor memoria pico. Las entradas generadas se
+    guardan en data_dir y se reutilizan si ya existen.
+    """
+    results = []
+
+    for stage in stages:
+        prepare, _ = STAGES[stage]
+        for size in sizes:
+            rows = SIZES[size]
+            folder = data_dir / f"{stage}_{size}_{seed}_{input_format}"
+            marker = folder / ".ready"
+            if not marker.exists():
+                print(f"🔍 Generando entradas: {stage} {size}")
+                folder.mkdir(parents=True, exist_ok=True)
+                source = prepare(rows, folder, seed, input_format)
+                marker.write_text(str(source), encoding="utf-8")
+            source = Path(marker.read_text(encoding="utf-8"))
+
+            runs = []
+            with TemporaryDirectory() as tmp:
+                output = with_format(Path(tmp) / stage, output_format)
+                for _ in range(repeat):
+                    with isolated_executor(1, PRELOAD_MODULES) as executor:
+                        runs.append(executor.submit(execute_case, stage, source, output).result())
+
+            seconds = min(run["seconds"] for run in runs)
+            peaks = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+            result = {
+                "stage": stage,
+                "size": size,
+                "rows": rows,
+                "files": input_files(source),
+                "seconds": seconds,
+                "rows_per_second": rows / seconds if seconds else None,
+                "peak_rss_mb": max(peaks) if peaks else None,
+                "baseline_rss_mb": runs[0]["baseline_rss_mb"],
+                "repeat": repeat,
+            }
+            results.append(result)
+
+            peak = f"{result['peak_rss_mb']:,.1f} MB" if peaks else "n/d"
+            print(f"⏱️ {stage:<22}{size:>5}: {seconds:>9.2f} s, {result['rows_per_second']:>12,.0f} filas/s, pico {peak}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=1, help="Ejecuciones por caso (se toma la más rápida)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--input-format", choices=sorted(FORMAT_SUFFIXES), default="excel")
+    parser.add_argument("--output-format", choices=sorted(FORMAT_SUFFIXES), default="parquet")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Carpeta para reutilizar las entradas generadas")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    output = args.output or RESULTS_DIR / f"{commit or 'local'}.json"
+
+    with TemporaryDirectory() as tmp:
+        results = run_suite(
+            args.stages,
+            args.sizes,
+            args.data_dir or Path(tmp),
+            args.repeat,
+            args.seed,
+            args.input_format,
+            args.output_format,
+        )
+
+    report = {
+        "commit": commit,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "input_format": args.input_format,
+        "output_format": args.output_format,
+        "results": results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"📄 Resultados: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,11 +13,47 @@ payment schedules and grace periods for flexible products,
 reducing manual operational effort.
 """
 
+import argparse
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from pathlib import Path
 
+from automation_scripts.renewal_calendar import (
+    ScheduleCache,
+    decode_signature,
+    encode_signature,
+    format_dates,
+    horizon_months,
+    long_schedule_frame,
+    month_end_clamp,
+)
+from automation_scripts.input_validation import (
+    check_issue_dates,
+    collect_errors,
+    error_report_path,
+    non_numeric,
+    normalized_text,
+    row_errors,
+    write_error_report,
+)
+from automation_scripts.instrumentation import (
+    add_profiling_arguments,
+    configure,
+    profile_stage,
+    span,
+    tally,
+)
+from automation_scripts.storage import (
+    EXCEL_MAX_ROWS,
+    TableWriter,
+    add_storage_arguments,
+    finish_output,
+    is_excel,
+    iter_table_batches,
+    read_table,
+    with_format,
+)
+
 
 # ---------------------
 # CONFIGURACIÓN GENERAL
@@ -25,170 +61,383 @@ from pathlib import Path
 START_YEAR = 2025
 END_YEAR = 2026
 
-START_DATE = datetime(START_YEAR, 1, 1)
-END_DATE = datetime(END_YEAR, 12, 31)
+EXCEL_DATE_FORMAT = "DD-MM-YYYY"
+DATE_FORMAT = "%d-%m-%Y"
+
+MONTHLY_COLS = [f"Mensual_{i+1}" for i in range(25)]
+SEMIANNUAL_COLS = ["Semestral_1", "Semestral_2"]
+QUARTERLY_COLS = ["Trimestral_1", "Trimestral_2", "Trimestral_3", "Trimestral_4"]
+ANNUAL_COL = "Anual"
+GRACE_COLS = ["Amparo_30_días", "Amparo_15_días"]
+
+PAYMENT_TYPES = ["mensual", "semestral", "trimestral", "anual"]
+FIXED_MONTH_STEPS = {"semestral": 6, "trimestral": 3}
+
+LONG_BATCH_SIZE = 10_000  # Pólizas por bloque en formato largo
+LAYOUTS = ["wide", "long"]
 
 
 # ---------------------
-# FUNCIONES AUXILIARES
+# KERNELS VECTORIZADOS
 # ---------------------
-def adjust_day(base_date: datetime, day: int) -> datetime:
+def parse_payment_days(values: pd.Series) -> np.ndarray:
     """
-    Ajusta el día al último día del mes si el día solicitado no existe.
+    Convierte la columna Día de Cobro a enteros (0 si está vacía; los
+    valores no numéricos los reporta validate_rows).
     """
-    last_day = (base_date + relativedelta(day=31)).day
-    return base_date.replace(day=min(day, last_day))
+    if not pd.api.types.is_numeric_dtype(values):
+        text = values.astype(str).str.strip().where(values.notna())
+        values = pd.to_numeric(text.where(text != ""), errors="coerce")
+
+    raw = np.trunc(values.to_numpy(dtype="float64", na_value=np.nan))
+    raw = np.where(np.isfinite(raw), raw, 0)
+    # Cualquier día mayor a 31 se ajusta al fin de mes, así que 31 basta.
+    return np.clip(raw, -1, 31).astype("int64")
 
 
-def generate_monthly_flex(issue_date: datetime, payment_day: int) -> list:
+def monthly_columns(start_year: int = START_YEAR, end_year: int = END_YEAR) -> list:
     """
-    Genera pagos mensuales para productos flexibles.
+    Columnas mensuales para un horizonte dado; con el horizonte por defecto
+    coincide con MONTHLY_COLS.
     """
-    dates = []
+    return [f"Mensual_{i+1}" for i in range(horizon_months(start_year, end_year) + 1)]
 
-    renewal = datetime(START_YEAR, issue_date.month, issue_date.day)
-    if START_DATE <= renewal <= END_DATE:
-        dates.append(renewal)
 
-    day_to_use = payment_day if payment_day > 0 else renewal.day
+def monthly_kernel(
+    issue_months: np.ndarray,
+    issue_days: np.ndarray,
+    payment_days: np.ndarray,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+) -> np.ndarray:
+    """
+    Matriz de pagos mensuales: la renovación seguida de los meses siguientes
+    dentro del horizonte, ajustados al día de cobro.
+    """
+    horizon = horizon_months(start_year, end_year)
+    offsets = issue_months[:, None] + np.arange(horizon + 1)[None, :]
+
+    days = np.where(payment_days > 0, payment_days, issue_days)
+    months = np.datetime64(f"{start_year}-01", "M") + offsets
+    dates = month_end_clamp(months, days[:, None])
+    dates[:, 0] = renewal_dates(issue_months, issue_days, start_year)
+    return np.where(offsets < horizon, dates, np.datetime64("NaT", "D"))
+
+
+def fixed_months_kernel(
+    issue_days: np.ndarray,
+    payment_days: np.ndarray,
+    step: int,
+    count: int,
+    start_year: int = START_YEAR,
+) -> np.ndarray:
+    """
+    Matriz de pagos en meses fijos cada `step` meses desde enero de start_year
+    (trimestral: enero, abril, julio, octubre; semestral: enero y julio).
+    """
+    days = np.where(payment_days > 0, payment_days, issue_days)
+    months = np.datetime64(f"{start_year}-01", "M") + step * np.arange(count)
+    return month_end_clamp(months[None, :], days[:, None])
 
-    year, month = renewal.year, renewal.month + 1
-    if month > 12:
-        month, year = 1, year + 1
 
-    while True:
-        current = adjust_day(datetime(year, month, 1), day_to_use)
-        if current > END_DATE:
-            break
-        if current >= START_DATE:
-            dates.append(current)
+def annual_kernel(
+    issue_months: np.ndarray,
+    issue_days: np.ndarray,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+) -> np.ndarray:
+    """
+    Matriz de aniversarios de la renovación, uno por año del horizonte
+    (un 29 de febrero se ajusta al 28 en los años no bisiestos).
+    """
+    years = horizon_months(start_year, end_year) // 12
+    months = np.datetime64(f"{start_year}-01", "M") + issue_months[:, None] + 12 * np.arange(years)[None, :]
+    return month_end_clamp(months, issue_days[:, None])
 
-        month += 1
-        if month > 12:
-            month, year = 1, year + 1
 
-    return dates
+def renewal_dates(issue_months: np.ndarray, issue_days: np.ndarray, start_year: int = START_YEAR) -> np.ndarray:
+    """
+    Fecha de renovación en start_year con el mes y día de emisión.
+    """
+    months = np.datetime64(f"{start_year}-01", "M") + issue_months
+    return months.astype("datetime64[D]") + (issue_days - 1)
 
 
-def generate_semiannual(issue_date: datetime, payment_day: int) -> list:
+def signature_schedule(
+    codes: np.ndarray,
+    kernel,
+    start_year: int = START_YEAR,
+    date_format: str | None = None,
+) -> np.ndarray:
     """
-    Genera pagos semestrales (enero y julio).
+    Calendario de cada firma (mes y día de emisión, día de cobro): los
+    pagos de kernel(meses, días, días de cobro) seguidos de Fecha
+    Renovación y los amparos de 30 y 45 días.
     """
-    day_to_use = payment_day if payment_day > 0 else issue_date.day
-    dates = []
+    issue_months, issue_days, payment_days = decode_signature(codes, 3)
+    renewal = renewal_dates(issue_months, issue_days, start_year)
+    dates = np.column_stack(
+        [kernel(issue_months, issue_days, payment_days), renewal, renewal + 30, renewal + 45]
+    )
+    return format_dates(dates, date_format)
 
-    for year in [START_YEAR, END_YEAR]:
-        for month in [1, 7]:
-            date = adjust_day(datetime(year, month, 1), day_to_use)
-            if START_DATE <= date <= END_DATE:
-                dates.append(date)
 
-    return dates[:2]
+def signature_codes(issue_months: np.ndarray, issue_days: np.ndarray, payment_days: np.ndarray) -> np.ndarray:
+    # Un día de cobro 0 o negativo se trata igual: se usa el día de emisión.
+    return encode_signature(issue_months, issue_days, np.maximum(payment_days, 0))
 
 
-def generate_quarterly(issue_date: datetime, payment_day: int) -> list:
+def schedule_inputs(df: pd.DataFrame, issue_dates: pd.Series, start_year: int = START_YEAR) -> tuple:
     """
-    Genera pagos trimestrales (enero, abril, julio, octubre).
+    Prepara forma de pago, mes (base 0) y día de emisión, día de cobro y
+    fecha de renovación para todas las filas. Las filas deben venir
+    revisadas por validate_rows.
     """
-    day_to_use = payment_day if payment_day > 0 else issue_date.day
-    dates = []
+    issue_months = issue_dates.dt.month.to_numpy() - 1
+    issue_days = issue_dates.dt.day.to_numpy()
+
+    if "Día de Cobro" in df.columns:
+        payment_days = parse_payment_days(df["Día de Cobro"])
+    else:
+        payment_days = np.zeros(len(df), dtype="int64")
 
-    for year in [START_YEAR, END_YEAR]:
-        for month in [1, 4, 7, 10]:
-            date = adjust_day(datetime(year, month, 1), day_to_use)
-            if START_DATE <= date <= END_DATE:
-                dates.append(date)
+    payment_types = normalized_text(df["Forma de Pago"])
+    renewal = renewal_dates(issue_months, issue_days, start_year)
 
-    return dates[:4]
+    return payment_types, issue_months, issue_days, payment_days, renewal
 
 
-def generate_annual(issue_date: datetime) -> datetime | None:
+def build_schedule(
+    df: pd.DataFrame,
+    issue_dates: pd.Series,
+    date_format: str | None = DATE_FORMAT,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    cache: ScheduleCache | None = None,
+) -> pd.DataFrame:
     """
-    Genera pago anual en la fecha de emisión.
+    Calcula renovación, amparos y pagos agrupando las filas por forma de pago
+    (formato ancho: una columna por pago). Las columnas mensuales cubren
+    todo el horizonte; las trimestrales, semestrales y anual, el primer año.
+    Con date_format=None las columnas de fechas quedan como datetime64.
+
+    Cada firma (forma de pago, mes y día de emisión, día de cobro) se
+    calcula y formatea una sola vez y se reparte a sus filas; `cache`
+    permite conservar las firmas entre lotes.
     """
-    renewal = datetime(START_YEAR, issue_date.month, issue_date.day)
-    return renewal if START_DATE <= renewal <= END_DATE else None
-
-
-def generate_grace_periods(renewal_date: datetime) -> tuple:
+    payment_types, issue_months, issue_days, payment_days, _ = schedule_inputs(
+        df, issue_dates, start_year
+    )
+    cache = cache if cache is not None else ScheduleCache()
+    codes = signature_codes(issue_months, issue_days, payment_days)
+
+    groups = {
+        "mensual": (
+            monthly_columns(start_year, end_year),
+            lambda m, d, p: monthly_kernel(m, d, p, start_year, end_year),
+        ),
+        "semestral": (SEMIANNUAL_COLS, lambda m, d, p: fixed_months_kernel(d, p, 6, 2, start_year)),
+        "trimestral": (QUARTERLY_COLS, lambda m, d, p: fixed_months_kernel(d, p, 3, 4, start_year)),
+        "anual": ([ANNUAL_COL], lambda m, d, p: renewal_dates(m, d, start_year)[:, None]),
+    }
+
+    dtype = object if date_format else "datetime64[D]"
+    empty = "" if date_format else np.datetime64("NaT", "D")
+    renewals = np.full((len(df), 3), empty, dtype=dtype)
+    payments = {}
+    with span("generate_schedules"):
+        for payment_type, (columns, kernel) in groups.items():
+            mask = payment_types == payment_type
+            rows = cache.rows(
+                ("wide", payment_type, start_year, end_year, date_format),
+                codes[mask],
+                lambda unique, kernel=kernel: signature_schedule(unique, kernel, start_year, date_format),
+            )
+            block = np.full((len(df), len(columns)), empty, dtype=dtype)
+            block[mask] = rows[:, :len(columns)]
+            payments.update(zip(columns, block.T))
+            renewals[mask] = rows[:, len(columns):]
+
+        schedule = {"Fecha Renovación": renewals[:, 0], **payments}
+        schedule[GRACE_COLS[0]] = renewals[:, 1]
+        schedule[GRACE_COLS[1]] = renewals[:, 2]
+
+    # Todas las columnas nuevas se agregan de una vez.
+    with span("assign"):
+        schedule = pd.DataFrame(schedule, index=df.index)
+        return pd.concat([df.drop(columns=schedule.columns, errors="ignore"), schedule], axis=1)
+
+
+def iter_schedule_long(
+    df: pd.DataFrame,
+    issue_dates: pd.Series,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    batch_size: int = LONG_BATCH_SIZE,
+    cache: ScheduleCache | None = None,
+):
     """
-    Calcula amparos de 30 y 45 días desde la renovación.
+    Genera el calendario en formato largo (póliza, pago, fecha de pago,
+    amparos de 30 y 45 días) por bloques de batch_size pólizas. A diferencia
+    del formato ancho, los pagos trimestrales, semestrales y anuales cubren
+    todo el horizonte.
     """
-    return (
-        renewal_date + timedelta(days=30),
-        renewal_date + timedelta(days=45),
+    payment_types, issue_months, issue_days, payment_days, _ = schedule_inputs(
+        df, issue_dates, start_year
     )
+    cache = cache if cache is not None else ScheduleCache()
+    codes = signature_codes(issue_months, issue_days, payment_days)
+    horizon = horizon_months(start_year, end_year)
+
+    kernels = {
+        "mensual": lambda m, d, p: monthly_kernel(m, d, p, start_year, end_year),
+        "anual": lambda m, d, p: annual_kernel(m, d, start_year, end_year),
+    }
+    for payment_type, step in FIXED_MONTH_STEPS.items():
+        kernels[payment_type] = lambda m, d, p, step=step: fixed_months_kernel(
+            d, p, step, horizon // step, start_year
+        )
+
+    # Sin filas válidas se genera igual un bloque vacío con los encabezados.
+    for start in range(0, max(len(df), 1), batch_size):
+        block = slice(start, start + batch_size)
+        positions, installments, due_dates = [], [], []
+
+        with span("generate_schedules"):
+            for payment_type, kernel in kernels.items():
+                rows = np.flatnonzero(payment_types[block] == payment_type) + start
+                matrix = cache.rows(
+                    ("long", payment_type, start_year, end_year),
+                    codes[rows],
+                    lambda unique, kernel=kernel: kernel(*decode_signature(unique, 3)),
+                )
+                row_idx, col_idx = np.nonzero(~np.isnat(matrix))
+                positions.append(rows[row_idx])
+                installments.append(col_idx + 1)
+                due_dates.append(matrix[row_idx, col_idx])
+
+        with span("assign"):
+            frame = long_schedule_frame(
+                df,
+                np.concatenate(positions),
+                np.concatenate(installments),
+                np.concatenate(due_dates),
+            )
+        yield frame
 
 
 # ---------------------
 # PROCESO PRINCIPAL
 # ---------------------
-def process_file(input_path: Path, output_path: Path) -> None:
-    df = pd.read_excel(input_path, dtype={"Fecha Emisión": str})
-
-    issue_dates = pd.to_datetime(
-        df["Fecha Emisión"].astype(str).str.strip(),
-        dayfirst=True,
-        errors="raise",
+def validate_rows(df: pd.DataFrame, start_year: int = START_YEAR) -> tuple[pd.Series, np.ndarray, pd.DataFrame]:
+    """
+    Revisa Fecha Emisión, Forma de Pago y Día de Cobro de todas las filas a
+    la vez y devuelve las fechas de emisión, la máscara de filas válidas y
+    el reporte de errores.
+    """
+    issue_dates, date_errors = check_issue_dates(df)
+    unsupported = ~np.isin(normalized_text(df["Forma de Pago"]), PAYMENT_TYPES)
+    reports = [date_errors, row_errors(df, "Forma de Pago", unsupported, "Forma de pago no soportada")]
+
+    if "Día de Cobro" in df.columns:
+        reports.append(
+            row_errors(df, "Día de Cobro", non_numeric(df["Día de Cobro"]), "Día de Cobro no numérico")
+        )
+
+    # Fechas como 29 de febrero no existen en todos los años.
+    issue_months = issue_dates.dt.month.fillna(1).to_numpy(dtype="int64") - 1
+    issue_days = issue_dates.dt.day.fillna(1).to_numpy(dtype="int64")
+    renewal = renewal_dates(issue_months, issue_days, start_year)
+    first_of_month = renewal_dates(issue_months, 1, start_year)
+    invalid = renewal.astype("datetime64[M]") != first_of_month.astype("datetime64[M]")
+    reports.append(
+        row_errors(df, "Fecha Emisión", invalid, f"Fecha de renovación inexistente en {start_year}")
     )
 
-    monthly_cols = [f"Mensual_{i+1}" for i in range(25)]
-    semiannual_cols = ["Semestral_1", "Semestral_2"]
-    quarterly_cols = ["Trimestral_1", "Trimestral_2", "Trimestral_3", "Trimestral_4"]
-    annual_col = "Anual"
-    grace_cols = ["Amparo_30_días", "Amparo_15_días"]
-
-    df["Fecha Renovación"] = ""
-    for col in monthly_cols + semiannual_cols + quarterly_cols + [annual_col] + grace_cols:
-        df[col] = ""
-
-    for idx, row in df.iterrows():
-        issue_date = issue_dates.iloc[idx]
-
-        payment_day = row.get("Día de Cobro", 0)
-        payment_day = int(payment_day) if pd.notna(payment_day) else 0
-
-        payment_type = str(row["Forma de Pago"]).strip().lower()
+    valid, report = collect_errors(df, reports)
+    return issue_dates, valid, report
 
-        renewal_date = datetime(START_YEAR, issue_date.month, issue_date.day)
-        df.at[idx, "Fecha Renovación"] = renewal_date.strftime("%d-%m-%Y")
 
-        g30, g15 = generate_grace_periods(renewal_date)
-        df.at[idx, "Amparo_30_días"] = g30.strftime("%d-%m-%Y")
-        df.at[idx, "Amparo_15_días"] = g15.strftime("%d-%m-%Y")
-
-        if payment_type == "mensual":
-            dates = generate_monthly_flex(issue_date, payment_day)
-            for i, d in enumerate(dates[: len(monthly_cols)]):
-                df.at[idx, monthly_cols[i]] = d.strftime("%d-%m-%Y")
-
-        elif payment_type == "semestral":
-            for i, d in enumerate(generate_semiannual(issue_date, payment_day)):
-                df.at[idx, semiannual_cols[i]] = d.strftime("%d-%m-%Y")
-
-        elif payment_type == "trimestral":
-            for i, d in enumerate(generate_quarterly(issue_date, payment_day)):
-                df.at[idx, quarterly_cols[i]] = d.strftime("%d-%m-%Y")
+def process_file(
+    input_path: Path,
+    output_path: Path,
+    batch_size: int | None = None,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    layout: str = "wide",
+) -> None:
+    """
+    Las fechas se guardan tipadas en todos los formatos; en Excel como
+    celdas de fecha con formato dd-mm-aaaa.
 
-        elif payment_type == "anual":
-            annual_date = generate_annual(issue_date)
-            if annual_date:
-                df.at[idx, annual_col] = annual_date.strftime("%d-%m-%Y")
+    Con batch_size la entrada se lee por lotes y cada lote se calcula y
+    agrega a la salida, manteniendo la memoria constante. layout="long"
+    escribe una fila por póliza y pago en lugar de una columna por pago;
+    en Excel la salida falla si no cabe en una hoja (EXCEL_MAX_ROWS).
 
-        else:
-            raise ValueError(f"Forma de pago no soportada en fila {idx + 1}")
+    Las filas con errores (validate_rows) no detienen el proceso: se omiten
+    y se listan en <salida>_errores junto al archivo de salida.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Formato de salida no soportado: {layout}")
+    if layout == "long" and is_excel(output_path):
+        print(
+            f"⚠️ Formato largo en Excel: una hoja admite {EXCEL_MAX_ROWS - 1:,} filas; "
+            "para carteras grandes use --format csv, parquet o arrow"
+        )
+
+    excel_dtype = {"Fecha Emisión": str}
+    batches = (
+        iter_table_batches(input_path, batch_size, excel_dtype)
+        if batch_size
+        else [read_table(input_path, excel_dtype=excel_dtype)]
+    )
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(output_path, index=False)
+    cache = ScheduleCache()
+    errors = []
+    with TableWriter(output_path, EXCEL_DATE_FORMAT) as writer:
+        for df in batches:
+            tally("rows", len(df))
+            issue_dates, valid, report = validate_rows(df, start_year)
+            errors.append(report)
+            if not valid.all():
+                df, issue_dates = df[valid], issue_dates[valid]
+            if layout == "long":
+                for block in iter_schedule_long(
+                    df, issue_dates, start_year, end_year, cache=cache
+                ):
+                    writer.write(block)
+            else:
+                writer.write(build_schedule(df, issue_dates, None, start_year, end_year, cache))
 
     print(f"✅ Archivo generado exitosamente: {output_path}")
+    invalid = write_error_report(errors, output_path)
+    if invalid:
+        print(f"⚠️ {invalid:,} filas con error omitidas: {error_report_path(output_path)}")
+    print(cache.report())
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Renovaciones de productos flexibles.")
+    add_storage_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=None, help="Filas por lote (modo streaming)")
+    parser.add_argument("--start-year", type=int, default=START_YEAR, help="Primer año del horizonte")
+    parser.add_argument("--end-year", type=int, default=END_YEAR, help="Último año del horizonte")
+    parser.add_argument("--layout", choices=LAYOUTS, default="wide", help="Una columna por pago o una fila por pago")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
     input_file = Path("data/raw/Renovaciones_Flexibles.xlsx")
-    output_file = Path("data/processed/Renovaciones_Flexibles_processed.xlsx")
+    output_file = with_format(
+        Path("data/processed/Renovaciones_Flexibles_processed.xlsx"), args.format
+    )
 
-    process_file(input_file, output_file)
+    with profile_stage("flex_renewals"):
+        process_file(
+            input_file, output_file, args.batch_size, args.start_year, args.end_year, args.layout
+        )
+        finish_output(output_file, args, EXCEL_DATE_FORMAT)
 
 
 if __name__ == "__main__":
@@ -12,16 +12,43 @@ converting unstructured data into structured outputs for operational
 and analytical use.
 """
 
+import argparse
 import os
+from collections import Counter
 from pathlib import Path
-from bs4 import BeautifulSoup
-from openpyxl import Workbook
+from lxml import etree
+
+from automation_scripts.instrumentation import (
+    add_profiling_arguments,
+    configure,
+    profile_stage,
+    span,
+    tally,
+)
+from automation_scripts.storage import write_excel_stream
+from database_construction.html_encoding import (
+    FALLBACK_ENCODING,
+    TRIAL_BYTES,
+    checked_chunks,
+    detect_encoding,
+    format_encoding_counts,
+    lxml_encoding,
+    read_html_text,
+)
+from database_construction.html_manifest import HtmlManifest, extractor_signature
 
 
 # ---------------------
 # CONFIGURACIÓN GENERAL
 # ---------------------
 PREMIUM_COLUMN_INDEX = 17  # Columna 18 en HTML (índice base 0)
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes leídos por bloque al recorrer un HTML
+HIDDEN_TEXT_TAGS = {"script", "style", "template"}  # BeautifulSoup omite su texto
+EXTRACTOR_VERSION = "3"  # Incrementar al cambiar la lógica de extracción
+
+PREMIUM_SIGNATURE = extractor_signature(
+    EXTRACTOR_VERSION, PREMIUM_COLUMN_INDEX, sorted(HIDDEN_TEXT_TAGS)
+)
 
 
 # ---------------------
@@ -29,12 +56,10 @@ PREMIUM_COLUMN_INDEX = 17  # Columna 18 en HTML (índice base 0)
 # ---------------------
 def read_html_file(file_path: Path) -> str:
     """
-    Lee un archivo HTML intentando distintos encodings.
+    Lee un archivo HTML con el mismo criterio de encoding que la base de
+    pólizas (BOM, prueba UTF-8, <meta charset> y latin-1 como respaldo).
     """
-    try:
-        return file_path.read_text(encoding="latin-1")
-    except UnicodeDecodeError:
-        return file_path.read_text(encoding="utf-8")
+    return read_html_text(file_path)
 
 
 def extract_premium_data(html_content: str, file_name: str) -> tuple | None:
@@ -42,56 +67,200 @@ def extract_premium_data(html_content: str, file_name: str) -> tuple | None:
     Extrae número de póliza y prima al cobro desde el contenido HTML.
     Solo se toma la primera fila válida.
     """
-    soup = BeautifulSoup(html_content, "lxml")
-    rows = soup.find_all("tr", class_="GridRow")
+    chunks = (
+        html_content[i:i + STREAM_CHUNK_SIZE]
+        for i in range(0, len(html_content), STREAM_CHUNK_SIZE)
+    )
+    return stream_premium_data(chunks, file_name)
+
+
+def element_strings(element):
+    """
+    Recorre los textos de un elemento lxml en el mismo orden y con las
+    mismas exclusiones (comentarios, script, style) que BeautifulSoup.
+    """
+    if isinstance(element.tag, str) and element.tag not in HIDDEN_TEXT_TAGS:
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from element_strings(child)
+            if child.tail:
+                yield child.tail
+
+
+def is_grid_row(element) -> bool:
+    return element.tag == "tr" and "GridRow" in (element.get("class") or "").split()
+
+
+def parse_grid_row(row, file_name: str) -> tuple | None:
+    """
+    Devuelve (archivo, póliza, prima) si la fila tiene enlace de póliza.
+    """
+    policy_link = next(
+        (a for a in row.iter("a") if "lnkPoliza" in (a.get("id") or "")),
+        None,
+    )
+    if policy_link is None:
+        return None
+
+    policy_number = "".join(element_strings(policy_link)).strip()
+    cells = list(row.iter("td"))
+
+    premium = ""
+    if len(cells) > PREMIUM_COLUMN_INDEX:
+        cell_strings = element_strings(cells[PREMIUM_COLUMN_INDEX])
+        premium = "".join(text.strip() for text in cell_strings if text.strip())
+
+    return file_name, policy_number, premium
+
+
+def stream_premium_data(chunks, file_name: str, encoding: str | None = None) -> tuple | None:
+    """
+    Versión incremental de extract_premium_data sobre bloques de texto o bytes.
+
+    Analiza el HTML conforme llegan los bloques, descarta cada fila ya
+    revisada y se detiene en cuanto se completa la primera fila GridRow
+    con enlace de póliza, por lo que la memoria no crece con el archivo.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+    open_rows = 0
 
-    for row in rows:
-        policy_link = row.find("a", id=lambda x: x and "lnkPoliza" in x)
-        if not policy_link:
-            continue
+    def consume_events():
+        nonlocal open_rows
+        for event, element in parser.read_events():
+            grid_row = is_grid_row(element)
+            if event == "start":
+                open_rows += grid_row
+                continue
 
-        policy_number = policy_link.text.strip()
-        cells = row.find_all("td")
+            open_rows -= grid_row
+            if open_rows:
+                # Dentro de otra GridRow: la fila exterior se evalúa completa.
+                continue
 
-        premium = ""
-        if len(cells) > PREMIUM_COLUMN_INDEX:
-            premium = cells[PREMIUM_COLUMN_INDEX].get_text(strip=True)
+            if grid_row:
+                with span("html_extract"):
+                    result = parse_grid_row(element, file_name)
+                if result:
+                    return result
 
-        return file_name, policy_number, premium
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+        return None
 
-    return None
+    for chunk in chunks:
+        parser.feed(chunk)
+        result = consume_events()
+        if result:
+            return result
+
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        # Documento vacío o sin contenido HTML.
+        return None
+    return consume_events()
+
+
+def extract_premium_file(file_path: Path) -> tuple[tuple | None, str]:
+    """
+    Extrae la prima leyendo el archivo por bloques sin cargarlo completo en
+    memoria, con una sola apertura. Devuelve (resultado, encoding).
+
+    El encoding se detecta en el primer bloque y cada bloque se valida
+    antes de entregar sus bytes a lxml; si más adelante aparece un byte
+    inválido para ese encoding, el archivo se vuelve a recorrer en latin-1
+    (el mismo criterio que decode_html).
+    """
+    with span("html_parse"), file_path.open("rb") as handle:
+        encoding = detect_encoding(handle.read(TRIAL_BYTES))
+        try:
+            return stream_premium_file(handle, file_path.name, encoding), encoding
+        except UnicodeDecodeError:
+            return stream_premium_file(handle, file_path.name, FALLBACK_ENCODING), FALLBACK_ENCODING
+
+
+def stream_premium_file(handle, file_name: str, encoding: str) -> tuple | None:
+    handle.seek(0)
+    chunks = checked_chunks(handle, encoding, STREAM_CHUNK_SIZE)
+    return stream_premium_data(chunks, file_name, encoding=lxml_encoding(encoding))
 
 
 # ---------------------
 # PROCESO PRINCIPAL
 # ---------------------
-def process_html_folder(input_folder: Path, output_file: Path) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Primas Tradicionales"
-    ws.append(["Archivo", "No. Póliza", "Prima al Cobro"])
-
-    for html_file in input_folder.iterdir():
-        if html_file.suffix.lower() != ".html":
-            continue
+def iter_premium_results(html_files: list[Path], manifest: HtmlManifest | None = None):
+    """
+    Genera las tuplas (archivo, póliza, prima) tomando del manifiesto los
+    archivos sin cambios y analizando el resto.
+    """
+    cached, _ = manifest.split(html_files) if manifest else ({}, html_files)
+    tally("files", len(html_files))
+    tally("files_parsed", len(html_files) - len(cached))
+    encodings = Counter()
 
-        html_content = read_html_file(html_file)
-        result = extract_premium_data(html_content, html_file.name)
+    for html_file in html_files:
+        if html_file in cached:
+            result = cached[html_file]
+        else:
+            result, encoding = extract_premium_file(html_file)
+            encodings[encoding] += 1
+            tally(f"encoding_{encoding}")
+            if manifest:
+                manifest.store(html_file, result)
 
         if result:
-            ws.append(result)
+            tally("rows")
+            yield tuple(result)
+
+    if encodings:
+        print(f"🔤 Encodings detectados: {format_encoding_counts(encodings)}")
+    if manifest:
+        print(f"♻️ Reutilizados del manifiesto: {len(cached)}")
+
+
+def process_html_folder(input_folder: Path, output_file: Path, manifest_path: Path | None = None) -> None:
+    """
+    Si se indica manifest_path, solo se analizan los archivos nuevos o
+    modificados desde la ejecución anterior; el resto se toma del manifiesto.
+    Las filas se escriben en Excel conforme se extraen (modo write-only).
+    """
+    html_files = [
+        html_file for html_file in input_folder.iterdir()
+        if html_file.suffix.lower() == ".html"
+    ]
+
+    manifest = HtmlManifest(manifest_path, PREMIUM_SIGNATURE) if manifest_path else None
 
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    wb.save(output_file)
+    write_excel_stream(
+        iter_premium_results(html_files, manifest),
+        output_file,
+        header=["Archivo", "No. Póliza", "Prima al Cobro"],
+        sheet_title="Primas Tradicionales",
+    )
+
+    if manifest:
+        manifest.prune(html_files)
+        manifest.close()
 
     print(f"✅ Archivo generado exitosamente: {output_file}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Extracción de primas de productos tradicionales.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
     input_folder = Path("data/raw/html_tradicional")
     output_file = Path("data/processed/polizas_prima_al_cobro.xlsx")
+    manifest_path = Path("data/processed/polizas_prima_al_cobro_manifest.sqlite")
 
-    process_html_folder(input_folder, output_file)
+    with profile_stage("traditional_premiums"):
+        process_html_folder(input_folder, output_file, manifest_path)
 
 
 if __name__ == "__main__":
@@ -13,10 +13,36 @@ unwanted characters, text after dots and extra spaces, preparing
 the data for analytical or database usage.
 """
 
+import argparse
+import numpy as np
 import pandas as pd
 import re
+import string
 from pathlib import Path
 
+from automation_scripts.instrumentation import (
+    add_profiling_arguments,
+    configure,
+    profile_stage,
+    span,
+    tally,
+)
+from automation_scripts.storage import (
+    add_storage_arguments,
+    finish_output,
+    read_table,
+    with_format,
+    write_table,
+)
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+DOT_SUFFIX = re.compile(r"\..*")
+WHITESPACE = re.compile(r"\s+")
+REMOVED_CHARS = str.maketrans("", "", string.ascii_lowercase + string.digits)
+
 
 def limpiar_nombre(nombre: str) -> str:
     """
@@ -29,39 +55,62 @@ def limpiar_nombre(nombre: str) -> str:
     nombre = str(nombre)
 
     # Eliminar todo lo que esté después de un punto
-    nombre = re.sub(r"\..*", "", nombre)
+    nombre = DOT_SUFFIX.sub("", nombre)
 
     # Eliminar letras minúsculas y números
-    nombre = re.sub(r"[a-z0-9]", "", nombre)
+    nombre = nombre.translate(REMOVED_CHARS)
 
     # Normalizar espacios
-    nombre = re.sub(r"\s+", " ", nombre).strip()
+    nombre = WHITESPACE.sub(" ", nombre).strip()
 
     return nombre
 
 
+def clean_names(names: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de limpiar_nombre para una columna completa.
+    Cada nombre distinto se limpia una sola vez y el resultado se
+    replica a todas sus apariciones.
+    """
+    with span("clean_names"):
+        codes, uniques = pd.factorize(names)
+
+        # El último elemento cubre los vacíos (código -1 en factorize).
+        cleaned = np.array([limpiar_nombre(name) for name in uniques] + [""], dtype=object)
+
+        return pd.Series(cleaned[codes], index=names.index, name=names.name)
+
+
 def clean_names_file(input_path: Path, output_path: Path, column_name: str) -> None:
     """
-    Carga un archivo Excel, limpia la columna de nombres
+    Carga un archivo (Excel, Parquet o Arrow), limpia la columna de nombres
     y guarda el resultado en un nuevo archivo.
     """
-    df = pd.read_excel(input_path)
+    df = read_table(input_path)
 
     if column_name not in df.columns:
         raise ValueError(f"La columna '{column_name}' no existe en el archivo.")
 
-    df[column_name] = df[column_name].apply(limpiar_nombre)
+    tally("rows", len(df))
+    df[column_name] = clean_names(df[column_name])
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(output_path, index=False)
+    write_table(df, output_path)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Limpieza de nombres de clientes.")
+    add_storage_arguments(parser)
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
     input_file = Path("data/raw/Limpiezanombres.xlsx")
-    output_file = Path("data/processed/Limpiezanombres_clean.xlsx")
+    output_file = with_format(Path("data/processed/Limpiezanombres_clean.xlsx"), args.format)
     column_name = "NOMBRES"
 
-    clean_names_file(input_file, output_file, column_name)
+    with profile_stage("data_cleaning"):
+        clean_names_file(input_file, output_file, column_name)
+        finish_output(output_file, args)
 
     print("✅ Limpieza de nombres completada correctamente.")
     print(f"📄 Archivo generado: {output_file}")
@@ -12,117 +12,280 @@ a consolidated database in Excel format, enabling operational analysis
 and data integration.
 """
 
-import pandas as pd
+import argparse
+import re
+from functools import lru_cache
+from operator import attrgetter
 from bs4 import BeautifulSoup
 from pathlib import Path
 
+from automation_scripts.instrumentation import (
+    add_profiling_arguments,
+    configure,
+    profile_stage,
+    span,
+    tally,
+)
+from automation_scripts.storage import (
+    add_storage_arguments,
+    finish_output,
+    with_format,
+    write_table,
+)
+from database_construction.html_batch import DEFAULT_CHUNKSIZE, extract_folder, print_batch_summary
+from database_construction.html_encoding import decode_html
+from database_construction.html_manifest import extractor_signature
+from database_construction.policy_store import policy_frame, sync_policy_store
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+EXTRACTOR_VERSION = "4"  # Incrementar al cambiar la lógica de extracción
+
+PLAN_TAG_ID = "ctl00_ContentPlaceHolder1_lbDescL"
+PLAN_PLACEHOLDERS = ["planes tradicionales", "plan", "planes"]
+VALUE_TAGS = ("td", "div", "span")
+
+# Columna de salida -> etiqueta buscada en el HTML
+FIELD_LABELS = {
+    "Número de Póliza": "Póliza",
+    "Tipo de Seguro": "Tipo de seguro",
+    "Plan": "Plan",
+    "Estatus": "Estatus",
+    "Suma Asegurada": "Suma Asegurada",
+    "Moneda": "Moneda",
+    "Fecha Emisión": "Fecha Emisión",
+    "Forma de Pago": "Forma de pago",
+    "Medio de Cobro": "Medio de cobro",
+    "Banco": "Banco",
+    "Cuenta / CLABE": "Número de token/Cuenta CLABE",
+    "Día de Cobro": "Día de cobro",
+    "Agente": "Agente",
+    "Correo Agente": "E-mail",
+    "Teléfono Agente": "Teléfono",
+    "Contratante": "Contratante",
+    "Asegurado Principal": "Asegurado Principal",
+    "Fecha de Nacimiento": "Fecha de Nacimiento",
+    "Calle y Número": "Calle y número",
+    "Colonia": "Colonia",
+    "Ciudad o Municipio": "Ciudad o Municipio",
+    "Estado": "Estado",
+    "Código Postal": "Código postal",
+    "País": "País",
+    "Correo Electrónico": "Correo electrónico",
+    "Teléfono Particular": "Teléfono particular",
+    "Teléfono Oficina": "Teléfono oficina",
+}
+
+POLICY_COLUMNS = ["Archivo", *FIELD_LABELS]
+
+POLICY_SIGNATURE = extractor_signature(
+    EXTRACTOR_VERSION, FIELD_LABELS, PLAN_TAG_ID, PLAN_PLACEHOLDERS, VALUE_TAGS
+)
+
 
 # ---------------------
 # FUNCIONES AUXILIARES
 # ---------------------
-def read_html(file_path: Path) -> BeautifulSoup:
+def read_html(file_path: Path) -> tuple[BeautifulSoup, str]:
     """
-    Lee un archivo HTML y devuelve el objeto BeautifulSoup.
+    Lee los bytes de un archivo HTML una sola vez, detecta su encoding y
+    devuelve el objeto BeautifulSoup junto con el encoding usado.
     """
-    return BeautifulSoup(file_path.read_text(encoding="utf-8"), "html.parser")
+    text, encoding = decode_html(file_path.read_bytes())
+    return BeautifulSoup(text, "html.parser"), encoding
 
 
-def find_field(soup: BeautifulSoup, label: str) -> str:
+@lru_cache(maxsize=None)
+def label_matcher(labels: tuple[str, ...]):
     """
-    Busca un campo por etiqueta textual y devuelve el valor asociado limpio.
+    Compila las etiquetas en un solo patrón y devuelve una función que,
+    con una evaluación por texto, entrega el conjunto de etiquetas que el
+    texto contiene (igual que evaluar `etiqueta in texto` una por una).
+
+    Una búsqueda con la alternativa de todas las etiquetas descarta los
+    textos sin coincidencias. En el resto, un lookahead en cada posición
+    toma la etiqueta más larga que empieza ahí y una tabla precalculada
+    agrega las etiquetas contenidas en ella ("Teléfono" dentro de
+    "Teléfono particular"), así que los traslapes no se pierden.
     """
-    element = soup.find(string=lambda x: x and label in x)
-    if element:
-        next_element = element.find_next(["td", "div", "span"])
-        if next_element:
-            return next_element.get_text(strip=True)
-    return ""
+    ordered = sorted(set(labels), key=len, reverse=True)
+    alternation = "|".join(re.escape(label) for label in ordered)
+    any_label = re.compile(alternation)
+    each_position = re.compile(f"(?=({alternation}))")
+    contained = {
+        label: frozenset(other for other in ordered if other in label)
+        for label in ordered
+    }
+
+    def match(text: str) -> set:
+        if any_label.search(text) is None:
+            return set()
+        found = set()
+        for hit in each_position.finditer(text):
+            found |= contained[hit.group(1)]
+        return found
+
+    return match
 
 
-def extract_plan(soup: BeautifulSoup) -> str:
+def scan_labels(nodes, labels, tag_ids, tag_name, tag_text) -> tuple[dict, dict]:
     """
-    Extrae el plan asegurador priorizando selectores específicos
-    y usando búsqueda por texto como respaldo.
+    Recorre los nodos de un documento (elementos y textos, en orden) una
+    sola vez y resuelve todas las etiquetas.
+
+    Para cada etiqueta toma el primer texto que la contiene y el valor del
+    siguiente td/div/span, igual que la búsqueda original por etiqueta
+    (benchmarks.reference_labels.find_field). También devuelve el texto
+    del primer elemento con cada id de tag_ids.
+
+    tag_name y tag_text obtienen el nombre y el texto limpio de un
+    elemento, de modo que el mismo recorrido sirve para BeautifulSoup y
+    para lxml. Cada texto se evalúa una sola vez con label_matcher.
     """
-    plan_tag = soup.find(id="ctl00_ContentPlaceHolder1_lbDescL")
-    if plan_tag and plan_tag.get_text(strip=True):
-        return plan_tag.get_text(strip=True)
+    labels = list(labels)
+    pending = list(dict.fromkeys(labels))
+    match_labels = label_matcher(tuple(pending))
+    pending_ids = set(tag_ids)
+    waiting = []
+    values = {}
+    ids = {}
+
+    for node in nodes:
+        if not isinstance(node, str):
+            if waiting and tag_name(node) in VALUE_TAGS:
+                text = tag_text(node)
+                for label in waiting:
+                    values[label] = text
+                waiting = []
+
+            if pending_ids:
+                tag_id = node.get("id")
+                if tag_id in pending_ids:
+                    ids[tag_id] = tag_text(node)
+                    pending_ids.discard(tag_id)
+
+        elif node and pending:
+            found = match_labels(node)
+            matched = [label for label in pending if label in found] if found else None
+            if matched:
+                waiting.extend(matched)
+                pending = [label for label in pending if label not in matched]
+
+        if not pending and not waiting and not pending_ids:
+            break
 
-    plan_text = soup.find(string=lambda x: x and "Plan" in x)
-    if plan_text:
-        next_element = plan_text.find_next(["td", "div", "span"])
-        if next_element:
-            value = next_element.get_text(strip=True)
-            if value.lower() not in ["planes tradicionales", "plan", "planes"]:
-                return value
+    for label in labels:
+        values.setdefault(label, "")
 
-    return ""
+    return values, ids
 
 
-def extract_policy_data(html_file: Path) -> dict:
+def soup_text(tag) -> str:
+    return tag.get_text(strip=True)
+
+
+def index_labels(soup: BeautifulSoup, labels, tag_ids=()) -> tuple[dict, dict]:
+    """
+    scan_labels sobre un documento de BeautifulSoup.
+    """
+    return scan_labels(soup.descendants, labels, tag_ids, attrgetter("name"), soup_text)
+
+
+def resolve_plan(values: dict, ids: dict) -> str:
+    """
+    Aplica las reglas del plan (id específico y, como respaldo, la
+    etiqueta "Plan" sin valores genéricos) sobre un índice ya construido.
+    """
+    if ids.get(PLAN_TAG_ID):
+        return ids[PLAN_TAG_ID]
+
+    value = values.get(FIELD_LABELS["Plan"], "")
+    return value if value.lower() not in PLAN_PLACEHOLDERS else ""
+
+
+def extract_policy_data(html_file: Path) -> tuple[tuple, str]:
     """
     Extrae los datos principales de una póliza desde un archivo HTML.
+    Devuelve el registro (tupla en el orden de POLICY_COLUMNS) y el
+    encoding detectado.
     """
-    soup = read_html(html_file)
-
-    return {
-        "Archivo": html_file.name,
-        "Número de Póliza": find_field(soup, "Póliza"),
-        "Tipo de Seguro": find_field(soup, "Tipo de seguro"),
-        "Plan": extract_plan(soup),
-        "Estatus": find_field(soup, "Estatus"),
-        "Suma Asegurada": find_field(soup, "Suma Asegurada"),
-        "Moneda": find_field(soup, "Moneda"),
-        "Fecha Emisión": find_field(soup, "Fecha Emisión"),
-        "Forma de Pago": find_field(soup, "Forma de pago"),
-        "Medio de Cobro": find_field(soup, "Medio de cobro"),
-        "Banco": find_field(soup, "Banco"),
-        "Cuenta / CLABE": find_field(soup, "Número de token/Cuenta CLABE"),
-        "Día de Cobro": find_field(soup, "Día de cobro"),
-        "Agente": find_field(soup, "Agente"),
-        "Correo Agente": find_field(soup, "E-mail"),
-        "Teléfono Agente": find_field(soup, "Teléfono"),
-        "Contratante": find_field(soup, "Contratante"),
-        "Asegurado Principal": find_field(soup, "Asegurado Principal"),
-        "Fecha de Nacimiento": find_field(soup, "Fecha de Nacimiento"),
-        "Calle y Número": find_field(soup, "Calle y número"),
-        "Colonia": find_field(soup, "Colonia"),
-        "Ciudad o Municipio": find_field(soup, "Ciudad o Municipio"),
-        "Estado": find_field(soup, "Estado"),
-        "Código Postal": find_field(soup, "Código postal"),
-        "País": find_field(soup, "País"),
-        "Correo Electrónico": find_field(soup, "Correo electrónico"),
-        "Teléfono Particular": find_field(soup, "Teléfono particular"),
-        "Teléfono Oficina": find_field(soup, "Teléfono oficina"),
-    }
+    with span("html_parse"):
+        soup, encoding = read_html(html_file)
+
+    with span("html_extract"):
+        values, ids = index_labels(soup, FIELD_LABELS.values(), [PLAN_TAG_ID])
+
+        plan = resolve_plan(values, ids)
+        record = (html_file.name, *(
+            plan if column == "Plan" else values[label] for column, label in FIELD_LABELS.items()
+        ))
+
+    return record, encoding
 
 
 # ---------------------
 # PROCESO PRINCIPAL
 # ---------------------
-def build_policy_database(input_folder: Path, output_file: Path) -> None:
-    records = []
+def build_policy_database(
+    input_folder: Path,
+    output_file: Path,
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    manifest_path: Path | None = None,
+    store_path: Path | None = None,
+) -> None:
+    """
+    Si se indica manifest_path, solo se analizan los archivos nuevos o
+    modificados desde la ejecución anterior; el resto se toma del manifiesto.
 
-    for html_file in input_folder.glob("*.html"):
-        try:
-            print(f"🔍 Procesando: {html_file.name}")
-            records.append(extract_policy_data(html_file))
-        except Exception as error:
-            print(f"⚠️ Error procesando {html_file.name}: {error}")
+    Si se indica store_path, los registros se guardan con upsert en la base
+    SQLite de pólizas (una fila por póliza, la del HTML más reciente) y
+    output_file es una exportación de esa base.
+    """
+    html_files = sorted(input_folder.glob("*.html"))
+    batch = extract_folder(
+        html_files, extract_policy_data, POLICY_SIGNATURE, workers, chunksize, manifest_path
+    )
+    results = batch.results
 
-    df = pd.DataFrame(records)
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(output_file, index=False)
+    if store_path:
+        df, skipped = sync_policy_store(store_path, POLICY_COLUMNS, results, batch.stale)
+    else:
+        records = [results[html_file] for html_file in html_files if html_file in results]
+        df = policy_frame(records, POLICY_COLUMNS)
+    tally("rows", len(df))
+    write_table(df, output_file)
 
     print(f"✅ Base de datos generada: {output_file}")
     print(f"📄 Total de pólizas procesadas: {len(df)}")
+    if store_path:
+        print(f"🗄️ Base de pólizas: {store_path} ({len(results)} archivos, {len(df)} pólizas únicas)")
+        if skipped:
+            print(f"⚠️ Registros sin número de póliza: {skipped}")
+    print_batch_summary(batch, workers)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Construcción de base de pólizas desde HTML.")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Archivos por tarea")
+    add_storage_arguments(parser)
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
     input_folder = Path("data/raw/html_clientes")
-    output_file = Path("data/processed/base_polizas.xlsx")
+    output_file = with_format(Path("data/processed/base_polizas.xlsx"), args.format)
+    manifest_path = Path("data/processed/base_polizas_manifest.sqlite")
+    store_path = Path("data/processed/base_polizas.sqlite")
 
-    build_policy_database(input_folder, output_file)
+    with profile_stage("policy_database"):
+        build_policy_database(
+            input_folder, output_file, args.workers, args.chunksize, manifest_path, store_path
+        )
+        finish_output(output_file, args)
 
 
 if __name__ == "__main__":
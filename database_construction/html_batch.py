@@ -0,0 +1,151 @@
+"""
+Recorrido común de una carpeta de archivos HTML.
+
+Este módulo concentra la parte compartida por la base de pólizas y la
+extracción unificada: ejecutar un extractor por archivo (en serie o en
+varios procesos) sin que un documento defectuoso detenga el lote, reutilizar
+el manifiesto incremental, contar archivos y encodings, e imprimir los
+errores y el resumen final. Cada script aporta solo su extractor por
+archivo y la firma que invalida el manifiesto.
+
+Shared driver for a folder of HTML files.
+
+This module holds what the policy database and the unified extraction have
+in common: running a per-file extractor (serially or across processes)
+without letting a broken document stop the batch, reusing the incremental
+manifest, counting files and encodings, and printing the errors and the
+final summary. Each script only supplies its per-file extractor and the
+signature that invalidates the manifest.
+"""
+
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from automation_scripts.instrumentation import measured, merge, tally
+from database_construction.html_encoding import format_encoding_counts
+from database_construction.html_manifest import HtmlManifest
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+DEFAULT_CHUNKSIZE = 64  # Archivos enviados por tarea a cada proceso
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def extract_safe(extract, html_file: Path) -> tuple:
+    """
+    Ejecuta extract(html_file) capturando el error del archivo para que un
+    documento defectuoso no detenga el lote completo. Devuelve
+    (resultado, encoding, error).
+    """
+    try:
+        return *extract(html_file), None
+    except Exception as error:
+        return None, None, str(error)
+
+
+def extract_files(extract, html_files: list[Path], workers: int = 1, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Aplica extract a una lista de archivos, en paralelo si workers > 1.
+    extract debe ser una función de módulo (se envía a los procesos hijos).
+    Los resultados se entregan en el mismo orden que html_files.
+    """
+    if workers <= 1:
+        for html_file in html_files:
+            print(f"🔍 Procesando: {html_file.name}")
+            yield extract_safe(extract, html_file)
+        return
+
+    # Los tramos medidos en cada proceso hijo vuelven con su resultado y
+    # se suman a la instrumentación de este proceso.
+    task = partial(measured, extract_safe, extract)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for outcome, measures in executor.map(task, html_files, chunksize=chunksize):
+            merge(measures)
+            yield outcome
+
+
+# ---------------------
+# LOTE
+# ---------------------
+class HtmlBatch:
+    """
+    Resultado de recorrer una carpeta: resultados por archivo (nuevos y
+    del manifiesto), archivos analizados en esta ejecución, errores,
+    encodings detectados y tiempo de extracción.
+    """
+
+    def __init__(self, html_files: list[Path], results: dict, stale: list[Path], manifest: bool):
+        self.html_files = html_files
+        self.results = results
+        self.stale = stale
+        self.manifest = manifest
+        self.errors = []
+        self.encodings = Counter()
+        self.elapsed = 0.0
+
+
+def extract_folder(
+    html_files: list[Path],
+    extract,
+    signature: str,
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    manifest_path: Path | None = None,
+) -> HtmlBatch:
+    """
+    Extrae los archivos de html_files con extract. Si se indica
+    manifest_path, solo se analizan los archivos nuevos o modificados; el
+    resto se toma del manifiesto, que se actualiza y se depura de los
+    archivos eliminados. Los errores por archivo se imprimen al terminar.
+    """
+    manifest = HtmlManifest(manifest_path, signature) if manifest_path else None
+    results, stale = manifest.split(html_files) if manifest else ({}, html_files)
+    batch = HtmlBatch(html_files, results, stale, manifest is not None)
+
+    start = time.perf_counter()
+    for html_file, (result, encoding, error) in zip(
+        stale, extract_files(extract, stale, workers, chunksize)
+    ):
+        if error is None:
+            batch.encodings[encoding] += 1
+            results[html_file] = result
+            if manifest:
+                manifest.store(html_file, result)
+        else:
+            batch.errors.append((html_file.name, error))
+    batch.elapsed = time.perf_counter() - start
+    tally("files", len(html_files))
+    tally("files_parsed", len(stale))
+    tally("files_failed", len(batch.errors))
+    for encoding, total in batch.encodings.items():
+        tally(f"encoding_{encoding}", total)
+
+    if manifest:
+        manifest.prune(html_files)
+        manifest.close()
+
+    for file_name, error in batch.errors:
+        print(f"⚠️ Error procesando {file_name}: {error}")
+
+    return batch
+
+
+def print_batch_summary(batch: HtmlBatch, workers: int = 1) -> None:
+    """
+    Imprime errores, encodings, archivos reutilizados y velocidad del lote.
+    """
+    if batch.errors:
+        print(f"⚠️ Archivos con error: {len(batch.errors)}")
+    if batch.encodings:
+        print(f"🔤 Encodings detectados: {format_encoding_counts(batch.encodings)}")
+    if batch.manifest:
+        print(f"♻️ Reutilizados del manifiesto: {len(batch.html_files) - len(batch.stale)}")
+    if batch.stale and batch.elapsed > 0:
+        print(f"⏱️ {len(batch.stale) / batch.elapsed:,.1f} archivos/s ({workers} procesos)")
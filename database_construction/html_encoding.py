@@ -0,0 +1,163 @@
+"""
+Detección de encoding para los HTML exportados.
+
+Este módulo decide con una sola regla el encoding de cada archivo HTML a
+partir de sus primeros bytes: BOM, luego una prueba de decodificación
+UTF-8, luego el <meta charset> declarado y por último latin-1. Si el resto del archivo no se
+decodifica con el encoding elegido, se lee completo como latin-1. Así la
+base de pólizas y la extracción de primas leen los mismos bytes de la
+misma forma, y los lectores pueden entregar los bytes directamente a lxml.
+
+Encoding detection for exported HTML files.
+
+This module picks each HTML file's encoding from its first bytes with a
+single rule: BOM, then a UTF-8 trial decode, then the declared <meta
+charset>, then latin-1. If the rest of the file does not decode with the
+chosen encoding, the whole file is read as latin-1. The policy database
+and the premium extraction therefore decode the same bytes the same way,
+and readers can hand the raw bytes straight to lxml.
+"""
+
+import codecs
+import re
+from collections import Counter
+from pathlib import Path
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+FALLBACK_ENCODING = "iso8859-1"  # latin-1: decodifica cualquier secuencia de bytes
+META_SNIFF_BYTES = 1024  # Bytes donde se busca <meta charset> (igual que HTML5)
+TRIAL_BYTES = 64 * 1024  # Bytes decodificados como prueba de UTF-8
+
+META_CHARSET = re.compile(
+    rb"""<meta[^>]*?charset\s*=\s*["']?\s*([A-Za-z0-9._:-]+)""",
+    re.IGNORECASE,
+)
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def normalize_encoding(label: str) -> str | None:
+    """
+    Nombre canónico de Python para un encoding (None si no se reconoce).
+    """
+    try:
+        name = codecs.lookup(label).name
+    except LookupError:
+        return None
+    # Un <meta> dentro de bytes compatibles con ASCII no puede ser UTF-16.
+    return "utf-8" if name.startswith("utf-16") else name
+
+
+def declared_encoding(head: bytes) -> str | None:
+    """
+    Encoding declarado en el primer <meta charset> o <meta http-equiv>.
+    """
+    match = META_CHARSET.search(head[:META_SNIFF_BYTES])
+    if not match:
+        return None
+    return normalize_encoding(match.group(1).decode("ascii"))
+
+
+def lxml_encoding(encoding: str) -> str:
+    """
+    Nombre que acepta libxml2 (no reconoce "utf-8-sig" ni "latin-1").
+    """
+    return "utf-8" if encoding == "utf-8-sig" else encoding
+
+
+# ---------------------
+# FUNCIONES PRINCIPALES
+# ---------------------
+def detect_encoding(head: bytes) -> str:
+    """
+    Devuelve el encoding de un documento a partir de sus primeros bytes
+    (basta con TRIAL_BYTES):
+
+    1. El indicado por el BOM.
+    2. UTF-8 si el prefijo tiene bytes no ASCII y es UTF-8 válido; un
+       texto latin-1 con acentos casi nunca lo es, así que un <meta>
+       equivocado no produce texto corrupto ("PÃ³liza").
+    3. El declarado en <meta charset>, si existe.
+    4. UTF-8 si el prefijo es ASCII y latin-1 en cualquier otro caso.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    trial = head[:TRIAL_BYTES]
+    declared = declared_encoding(trial)
+
+    if trial.isascii():
+        return declared or "utf-8"
+
+    try:
+        # Sin final=True se tolera un carácter cortado al final del prefijo.
+        codecs.getincrementaldecoder("utf-8")().decode(trial)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    if declared and declared != "utf-8":
+        return declared
+    return FALLBACK_ENCODING
+
+
+def confirm_encoding(raw: bytes, encoding: str) -> str:
+    """
+    Comprueba que el documento completo se decodifica con el encoding
+    detectado en su prefijo; si no (p. ej. un latin-1 con los primeros
+    TRIAL_BYTES en ASCII), devuelve FALLBACK_ENCODING.
+    """
+    try:
+        raw.decode(encoding)
+        return encoding
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def decode_html(raw: bytes) -> tuple[str, str]:
+    """
+    Decodifica un documento completo y devuelve (texto, encoding). Si el
+    resto del archivo contradice al prefijo, se usa latin-1.
+    """
+    encoding = detect_encoding(raw)
+    try:
+        return raw.decode(encoding), encoding
+    except UnicodeDecodeError:
+        return raw.decode(FALLBACK_ENCODING), FALLBACK_ENCODING
+
+
+def checked_chunks(handle, encoding: str, chunk_size: int):
+    """
+    Bloques de bytes de `handle` validados con un decodificador incremental:
+    lanza UnicodeDecodeError en el primer bloque que no corresponde al
+    encoding, antes de entregarlo al parser.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in iter(lambda: handle.read(chunk_size), b""):
+        decoder.decode(chunk)
+        yield chunk
+    decoder.decode(b"", final=True)
+
+
+def read_html_text(file_path: Path) -> str:
+    """
+    Lee un archivo HTML como texto aplicando detect_encoding.
+    """
+    return decode_html(file_path.read_bytes())[0]
+
+
+def format_encoding_counts(counts: Counter) -> str:
+    """
+    Resumen "utf-8: 120, iso8859-1: 3" de archivos por encoding.
+    """
+    return ", ".join(f"{encoding}: {total}" for encoding, total in counts.most_common())
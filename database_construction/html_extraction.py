@@ -0,0 +1,319 @@
+"""
+Extracción unificada de pólizas y primas desde los mismos HTML.
+
+Cuando las mismas exportaciones alimentan la base de pólizas y la
+extracción de primas, este script decodifica y analiza cada HTML una sola
+vez (lxml, encoding según html_encoding) y de ese único árbol obtiene el
+registro de la póliza y la tupla de prima. Las columnas de cada salida se
+declaran en un registro de extractores, y ambas salidas se escriben al
+terminar la misma pasada.
+
+Unified policy and premium extraction from the same HTML files.
+
+When the same exports feed both the policy database and the premium
+extraction, this script decodes and parses each HTML file once (lxml,
+encoding chosen by html_encoding) and derives both the policy record and
+the premium tuple from that single tree. Each output's columns are
+declared in a registry of field extractors, and both outputs are written
+at the end of the same pass.
+"""
+
+import argparse
+import pandas as pd
+from functools import cached_property
+from lxml import etree
+from operator import attrgetter
+from pathlib import Path
+
+from automation_scripts.instrumentation import (
+    add_profiling_arguments,
+    configure,
+    profile_stage,
+    span,
+    tally,
+)
+from automation_scripts.storage import (
+    add_storage_arguments,
+    finish_output,
+    with_format,
+    write_table,
+)
+from business_calculations.primas_tradicionales_calculation import (
+    HIDDEN_TEXT_TAGS,
+    PREMIUM_COLUMN_INDEX,
+    element_strings,
+    is_grid_row,
+    parse_grid_row,
+)
+from database_construction.create_clients_database import (
+    FIELD_LABELS,
+    PLAN_PLACEHOLDERS,
+    PLAN_TAG_ID,
+    VALUE_TAGS,
+    resolve_plan,
+    scan_labels,
+)
+from database_construction.html_batch import DEFAULT_CHUNKSIZE, extract_folder, print_batch_summary
+from database_construction.html_encoding import confirm_encoding, detect_encoding, lxml_encoding
+from database_construction.html_manifest import extractor_signature
+from database_construction.policy_store import policy_frame, sync_policy_store
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+EXTRACTOR_VERSION = "3"  # Incrementar al cambiar la lógica de extracción
+
+
+# ---------------------
+# DOCUMENTO ANALIZADO
+# ---------------------
+def iter_nodes(element):
+    """
+    Recorre un árbol lxml en el orden de BeautifulSoup.descendants: cada
+    elemento, luego su texto y sus hijos, y tras cada hijo su texto final.
+    Los comentarios se entregan como texto, igual que en BeautifulSoup.
+    """
+    if not isinstance(element.tag, str):
+        if element.text:
+            yield element.text
+        return
+
+    yield element
+    if element.text:
+        yield element.text
+    for child in element:
+        yield from iter_nodes(child)
+        if child.tail:
+            yield child.tail
+
+
+def document_nodes(root):
+    """
+    Recorre el documento completo, incluidos los comentarios fuera de <html>.
+    """
+    node = root
+    while node.getprevious() is not None:
+        node = node.getprevious()
+    while node is not None:
+        yield from iter_nodes(node)
+        node = node.getnext()
+
+
+def element_text(element) -> str:
+    """
+    Equivalente a get_text(strip=True) de BeautifulSoup.
+    """
+    return "".join(text.strip() for text in element_strings(element) if text.strip())
+
+
+def index_tree_labels(root, labels, tag_ids=()) -> tuple[dict, dict]:
+    """
+    scan_labels sobre un árbol lxml.
+    """
+    return scan_labels(document_nodes(root), labels, tag_ids, attrgetter("tag"), element_text)
+
+
+class HtmlDocument:
+    """
+    Un HTML decodificado y analizado una sola vez. Los índices que usan
+    varios extractores se calculan al primer uso y se comparten.
+    """
+
+    def __init__(self, file_name: str, root, encoding: str):
+        self.file_name = file_name
+        self.root = root
+        self.encoding = encoding
+
+    @cached_property
+    def labels(self) -> tuple[dict, dict]:
+        if self.root is None:
+            return {label: "" for label in FIELD_LABELS.values()}, {}
+        return index_tree_labels(self.root, FIELD_LABELS.values(), [PLAN_TAG_ID])
+
+    @cached_property
+    def grid_row(self) -> tuple | None:
+        if self.root is None:
+            return None
+        for row in self.root.iter("tr"):
+            if is_grid_row(row):
+                result = parse_grid_row(row, self.file_name)
+                if result:
+                    return result
+        return None
+
+
+def parse_document(html_file: Path) -> HtmlDocument:
+    """
+    Lee los bytes del archivo una vez, detecta su encoding (confirmado
+    sobre el archivo completo) y entrega los bytes directo a lxml, sin
+    pasar por un str intermedio.
+    """
+    raw = html_file.read_bytes()
+    encoding = confirm_encoding(raw, detect_encoding(raw))
+    parser = etree.HTMLParser(encoding=lxml_encoding(encoding))
+    # Un documento vacío o sin HTML produce un árbol vacío (root None).
+    root = etree.fromstring(raw, parser) if raw.strip() else None
+    return HtmlDocument(html_file.name, root, encoding)
+
+
+# ---------------------
+# REGISTRO DE EXTRACTORES
+# ---------------------
+def file_name(document: HtmlDocument) -> str:
+    return document.file_name
+
+
+def label_value(label: str):
+    def extract(document: HtmlDocument) -> str:
+        return document.labels[0][label]
+    return extract
+
+
+def plan_value(document: HtmlDocument) -> str:
+    return resolve_plan(*document.labels)
+
+
+def grid_value(position: int):
+    def extract(document: HtmlDocument) -> str:
+        return document.grid_row[position]
+    return extract
+
+
+def has_grid_row(document: HtmlDocument) -> bool:
+    return document.grid_row is not None
+
+
+# Salida -> columnas (columna -> extractor), condición para emitir fila
+# (None = siempre) y hoja de Excel. El orden de las columnas es el de las
+# salidas de create_clients_database y primas_tradicionales_calculation.
+OUTPUTS = {
+    "policy": {
+        "fields": {
+            "Archivo": file_name,
+            **{column: label_value(label) for column, label in FIELD_LABELS.items()},
+            "Plan": plan_value,
+        },
+        "when": None,
+        "sheet_title": "Sheet1",
+    },
+    "premium": {
+        "fields": {
+            "Archivo": file_name,
+            "No. Póliza": grid_value(1),
+            "Prima al Cobro": grid_value(2),
+        },
+        "when": has_grid_row,
+        "sheet_title": "Primas Tradicionales",
+    },
+}
+
+UNIFIED_SIGNATURE = extractor_signature(
+    EXTRACTOR_VERSION,
+    {name: list(output["fields"]) for name, output in OUTPUTS.items()},
+    FIELD_LABELS,
+    PLAN_TAG_ID,
+    PLAN_PLACEHOLDERS,
+    VALUE_TAGS,
+    PREMIUM_COLUMN_INDEX,
+    sorted(HIDDEN_TEXT_TAGS),
+)
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def extract_document(html_file: Path) -> tuple[dict, str]:
+    """
+    Analiza un HTML una vez y devuelve, por salida, su registro (tupla en
+    el orden de sus columnas, o None si el documento no aporta fila a esa
+    salida), junto con el encoding.
+    """
+    with span("html_parse"):
+        document = parse_document(html_file)
+
+    with span("html_extract"):
+        results = {}
+        for name, output in OUTPUTS.items():
+            when = output["when"]
+            if when is None or when(document):
+                results[name] = tuple(extract(document) for extract in output["fields"].values())
+            else:
+                results[name] = None
+
+    return results, document.encoding
+
+
+# ---------------------
+# PROCESO PRINCIPAL
+# ---------------------
+def build_html_outputs(
+    input_folder: Path,
+    output_files: dict[str, Path],
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    manifest_path: Path | None = None,
+    store_path: Path | None = None,
+) -> None:
+    """
+    Genera las salidas de output_files ({"policy": ruta, "premium": ruta})
+    en una sola pasada sobre los HTML de input_folder. Si se indica
+    manifest_path, solo se analizan los archivos nuevos o modificados; si
+    se indica store_path, la salida de pólizas se exporta desde la base
+    SQLite de pólizas tras el upsert (ver build_policy_database).
+    """
+    html_files = sorted(
+        html_file for html_file in input_folder.iterdir()
+        if html_file.suffix.lower() == ".html"
+    )
+    batch = extract_folder(
+        html_files, extract_document, UNIFIED_SIGNATURE, workers, chunksize, manifest_path
+    )
+    results = batch.results
+
+    for name, output_file in output_files.items():
+        output = OUTPUTS[name]
+        records = {
+            html_file: results[html_file][name] for html_file in html_files
+            if html_file in results and results[html_file][name] is not None
+        }
+        if name == "policy" and store_path:
+            df, _ = sync_policy_store(store_path, list(output["fields"]), records, batch.stale)
+        elif name == "policy":
+            df = policy_frame(records.values(), list(output["fields"]))
+        else:
+            df = pd.DataFrame(list(records.values()), columns=list(output["fields"]))
+        tally(f"rows_{name}", len(df))
+        write_table(df, output_file, sheet_title=output["sheet_title"])
+        print(f"✅ {output_file}: {len(df)} filas")
+
+    print_batch_summary(batch, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extracción unificada de pólizas y primas desde HTML.")
+    parser.add_argument("--input-folder", type=Path, default=Path("data/raw/html_clientes"))
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Archivos por tarea")
+    add_storage_arguments(parser)
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
+    output_files = {
+        "policy": with_format(Path("data/processed/base_polizas.xlsx"), args.format),
+        "premium": with_format(Path("data/processed/polizas_prima_al_cobro.xlsx"), args.format),
+    }
+    manifest_path = Path("data/processed/html_extraction_manifest.sqlite")
+    store_path = Path("data/processed/base_polizas.sqlite")
+
+    with profile_stage("html_extraction"):
+        build_html_outputs(
+            args.input_folder, output_files, args.workers, args.chunksize, manifest_path, store_path
+        )
+        for output_file in output_files.values():
+            finish_output(output_file, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Manifiesto incremental de archivos HTML procesados.
+
+Este módulo guarda en un archivo SQLite el resultado de extracción de cada
+HTML junto con su tamaño, fecha de modificación y hash de contenido, de modo
+que en una nueva ejecución solo se analicen los archivos nuevos o
+modificados y los eliminados desaparezcan del resultado.
+
+Incremental manifest of processed HTML files.
+
+This module stores each HTML file's extracted result in a SQLite file,
+keyed by size, modification time and content hash, so reruns only parse
+new or modified files and deleted files drop out.
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+HASH_BLOCK_SIZE = 1024 * 1024  # Bytes leídos por bloque al calcular el hash
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def extractor_signature(version: str, *config) -> str:
+    """
+    Firma del extractor: cambia si cambia la versión o su configuración
+    (etiquetas, columnas), lo que invalida el manifiesto.
+    """
+    payload = json.dumps([version, *config], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(file_path: Path) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un archivo.
+    """
+    digest = hashlib.sha256()
+    with file_path.open("rb") as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ---------------------
+# MANIFIESTO
+# ---------------------
+class HtmlManifest:
+    """
+    Caché persistente de resultados de extracción por archivo.
+
+    Uso típico:
+        cached, stale = manifest.split(html_files)
+        ... extraer solo `stale` y llamar manifest.store(archivo, resultado) ...
+        manifest.prune(html_files)
+        manifest.close()
+    """
+
+    def __init__(self, db_path: Path, signature: str):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                result TEXT NOT NULL
+            );
+            """
+        )
+
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'signature'"
+        ).fetchone()
+        if row is None or row[0] != signature:
+            # Extractor distinto: ningún resultado guardado es válido.
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                (signature,),
+            )
+            self.connection.commit()
+
+    def split(self, html_files: list[Path]) -> tuple[dict, list[Path]]:
+        """
+        Separa los archivos en resultados reutilizables y archivos por analizar.
+
+        Si tamaño y fecha coinciden se reutiliza sin leer el archivo; si no,
+        se compara el hash y solo se analiza de nuevo si el contenido cambió.
+        """
+        entries = {
+            path: (size, mtime_ns, sha256, result)
+            for path, size, mtime_ns, sha256, result in self.connection.execute(
+                "SELECT path, size, mtime_ns, sha256, result FROM files"
+            )
+        }
+        cached = {}
+        stale = []
+
+        for html_file in html_files:
+            key = str(html_file.resolve())
+            stat = html_file.stat()
+            entry = entries.get(key)
+
+            if entry is None:
+                stale.append(html_file)
+                continue
+
+            size, mtime_ns, sha256, result = entry
+            if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                if file_digest(html_file) != sha256:
+                    stale.append(html_file)
+                    continue
+                self.connection.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime_ns, key),
+                )
+
+            cached[html_file] = json.loads(result)
+
+        self.connection.commit()
+        return cached, stale
+
+    def store(self, html_file: Path, result) -> None:
+        """
+        Guarda (o reemplaza) el resultado de extracción de un archivo.
+        """
+        stat = html_file.stat()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, result) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                str(html_file.resolve()),
+                stat.st_size,
+                stat.st_mtime_ns,
+                file_digest(html_file),
+                json.dumps(result, ensure_ascii=False),
+            ),
+        )
+
+    def prune(self, html_files: list[Path]) -> int:
+        """
+        Elimina del manifiesto los archivos que ya no existen en la carpeta.
+        """
+        current = {str(html_file.resolve()) for html_file in html_files}
+        known = [row[0] for row in self.connection.execute("SELECT path FROM files")]
+        removed = [(path,) for path in known if path not in current]
+
+        self.connection.executemany("DELETE FROM files WHERE path = ?", removed)
+        self.connection.commit()
+        return len(removed)
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
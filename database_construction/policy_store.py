@@ -0,0 +1,363 @@
+"""
+Base persistente de pólizas en SQLite.
+
+Este módulo guarda una fila por número de póliza en un archivo SQLite:
+cada ejecución hace upsert de los registros extraídos y, cuando existen
+varios HTML de la misma póliza, conserva el del archivo modificado más
+recientemente; las pólizas de archivos eliminados se borran. Incluye búsquedas por póliza, agente o estatus con índices,
+y la exportación a Excel/CSV/Parquet/Arrow es solo una salida derivada.
+
+Las tablas de pólizas se arman columna por columna con tipos compactos:
+categorías para los campos con pocos valores distintos, texto respaldado
+por Arrow para el texto libre y Suma Asegurada numérica (si algún monto
+no tiene un formato reconocido, la columna se conserva como texto).
+
+Persistent SQLite policy store.
+
+This module keeps one row per policy number in a SQLite file: every run
+upserts the extracted records and, when several HTML snapshots of the
+same policy exist, keeps the one from the most recently modified file;
+policies from deleted files are removed. It provides indexed lookups by policy, agent or status; the
+Excel/CSV/Parquet/Arrow file is only a derived export.
+
+Policy tables are built column by column with compact dtypes: categories
+for low-cardinality fields, Arrow-backed strings for free text and a
+numeric Suma Asegurada (kept as text if any amount has an unrecognized
+format).
+"""
+
+import argparse
+import sqlite3
+import pandas as pd
+from pathlib import Path
+
+from automation_scripts.storage import write_table
+
+
+# ---------------------
+# CONFIGURACIÓN GENERAL
+# ---------------------
+KEY_COLUMN = "Número de Póliza"
+FILE_COLUMN = "Archivo"
+LOOKUP_COLUMNS = {"agent": "Agente", "status": "Estatus"}  # Columnas con índice
+
+# Columnas con pocos valores distintos: se guardan como category
+CATEGORY_COLUMNS = [
+    "Tipo de Seguro", "Plan", "Estatus", "Moneda", "Forma de Pago",
+    "Medio de Cobro", "Banco", "Agente", "Estado", "País",
+]
+AMOUNT_COLUMNS = ["Suma Asegurada"]  # Montos como "$ 1,500,000.00" -> 1500000.0
+# Signo, símbolo o código de moneda opcional, miles con coma, decimales con
+# punto y sufijo de moneda opcional ("M.N.", "MXN", "USD", "DLLS").
+AMOUNT_PATTERN = (
+    r"(?i)^\s*(?P<sign>-)?\s*(?:\$|MXN|USD)?\s*"
+    r"(?P<integer>\d{1,3}(?:,\d{3})+|\d+)(?P<decimals>\.\d+)?"
+    r"\s*(?:M\.?\s?N\.?|MXN|USD|DLLS?\.?)?\s*$"
+)
+TEXT_DTYPE = pd.StringDtype("pyarrow")
+
+DEFAULT_STORE = Path("data/processed/base_polizas.sqlite")
+
+
+# ---------------------
+# FUNCIONES AUXILIARES
+# ---------------------
+def quote(column: str) -> str:
+    """
+    Nombre de columna entre comillas para SQL (admite espacios y acentos).
+    """
+    return '"' + column.replace('"', '""') + '"'
+
+
+def parse_amounts(values) -> pd.Series:
+    """
+    Convierte montos en texto a float según AMOUNT_PATTERN; los vacíos y
+    los que no tienen ese formato (p. ej. "1.500.000,00" o "500 mil")
+    quedan como NaN, sin intentar adivinar su valor.
+    """
+    parts = pd.Series(values, dtype=TEXT_DTYPE).str.extract(AMOUNT_PATTERN)
+    number = (
+        parts["sign"].fillna("")
+        + parts["integer"].str.replace(",", "", regex=False)
+        + parts["decimals"].fillna("")
+    )
+    return pd.to_numeric(number, errors="coerce").astype("float64")
+
+
+def invalid_amounts(values) -> pd.Series:
+    """
+    Montos con texto que parse_amounts no reconoce (los vacíos no cuentan).
+    """
+    text = pd.Series(values, dtype=TEXT_DTYPE)
+    filled = text.fillna("").str.strip() != ""
+    return text[filled & parse_amounts(text).isna().to_numpy()]
+
+
+def policy_frame(rows, columns: list[str]) -> pd.DataFrame:
+    """
+    Tabla de pólizas a partir de filas (tuplas en el orden de `columns`).
+
+    Cada columna se arma de una vez desde su búfer, sin pasar por un dict
+    por póliza: category para CATEGORY_COLUMNS, montos numéricos para
+    AMOUNT_COLUMNS y texto Arrow para el resto. Si algún monto no tiene un
+    formato reconocido, se avisa y la columna conserva el texto original.
+    """
+    rows = list(rows)
+    buffers = zip(*rows) if rows else [() for _ in columns]
+    data = {}
+    for column, values in zip(columns, buffers):
+        if column in AMOUNT_COLUMNS:
+            invalid = invalid_amounts(values)
+            if invalid.empty:
+                data[column] = parse_amounts(values).to_numpy()
+                continue
+            examples = ", ".join(repr(value) for value in invalid.unique()[:3])
+            print(f"⚠️ {column}: {len(invalid)} montos con formato no reconocido ({examples}); se conserva el texto")
+        if column in CATEGORY_COLUMNS:
+            data[column] = pd.Categorical(values)
+        else:
+            data[column] = pd.array(values, dtype=TEXT_DTYPE)
+    return pd.DataFrame(data, columns=columns)
+
+
+# ---------------------
+# BASE DE PÓLIZAS
+# ---------------------
+class PolicyStore:
+    """
+    Tabla `policies` con una fila por póliza y la fecha de modificación
+    (mtime_ns) del HTML de donde salió.
+
+    Uso típico:
+        store = PolicyStore(db_path, columnas)
+        store.upsert((registro, mtime_ns) for ...)
+        store.get("12345"), store.find(agent="...", status="...")
+        store.export(Path("data/processed/base_polizas.xlsx"))
+        store.close()
+    """
+
+    def __init__(self, db_path: Path, columns: list[str] | None = None):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+
+        existing = [
+            row[1] for row in self.connection.execute("PRAGMA table_info(policies)")
+            if row[1] != "mtime_ns"
+        ]
+        if columns is None:
+            if not existing:
+                raise ValueError(f"La base {db_path} no tiene pólizas")
+            columns = existing
+        if KEY_COLUMN not in columns:
+            raise ValueError(f"Falta la columna {KEY_COLUMN}")
+        self.columns = list(columns)
+
+        if not existing:
+            definitions = ", ".join(
+                f"{quote(column)} TEXT PRIMARY KEY" if column == KEY_COLUMN
+                else f"{quote(column)} TEXT NOT NULL DEFAULT ''"
+                for column in self.columns
+            )
+            self.connection.execute(
+                f"CREATE TABLE policies ({definitions}, mtime_ns INTEGER NOT NULL)"
+            )
+        else:
+            # Columnas nuevas (p. ej. una etiqueta agregada al extractor).
+            for column in self.columns:
+                if column not in existing:
+                    self.connection.execute(
+                        f"ALTER TABLE policies ADD COLUMN {quote(column)} TEXT NOT NULL DEFAULT ''"
+                    )
+
+        for name, column in LOOKUP_COLUMNS.items():
+            if column in self.columns:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_policies_{name} ON policies ({quote(column)})"
+                )
+        self.connection.commit()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM policies").fetchone()[0]
+
+    def upsert(self, rows) -> tuple[int, int]:
+        """
+        Inserta o actualiza pólizas a partir de pares (registro, mtime_ns);
+        el registro es un dict o una tupla en el orden de las columnas.
+
+        Una póliza existente solo se reemplaza si el nuevo registro viene
+        de un archivo igual o más reciente (a igual fecha, decide el nombre
+        de archivo). Los registros sin número de póliza se omiten.
+        Devuelve (registros aplicados, registros omitidos).
+        """
+        names = ", ".join(quote(column) for column in self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        updates = ", ".join(
+            f"{quote(column)} = excluded.{quote(column)}"
+            for column in self.columns if column != KEY_COLUMN
+        )
+        file_column = quote(FILE_COLUMN)
+        newer = (
+            f"(excluded.mtime_ns, excluded.{file_column}) >= (policies.mtime_ns, policies.{file_column})"
+            if FILE_COLUMN in self.columns
+            else "excluded.mtime_ns >= policies.mtime_ns"
+        )
+        statement = (
+            f"INSERT INTO policies ({names}, mtime_ns) VALUES ({placeholders}, ?) "
+            f"ON CONFLICT ({quote(KEY_COLUMN)}) DO UPDATE SET {updates}, "
+            f"mtime_ns = excluded.mtime_ns WHERE {newer}"
+        )
+
+        key_index = self.columns.index(KEY_COLUMN)
+        applied = skipped = 0
+        values = []
+        for record, mtime_ns in rows:
+            if isinstance(record, dict):
+                record = [record.get(column) for column in self.columns]
+            row = [str(value or "") for value in record]
+            if not row[key_index].strip():
+                skipped += 1
+                continue
+            values.append(row + [mtime_ns])
+            applied += 1
+
+        with self.connection:
+            self.connection.executemany(statement, values)
+        return applied, skipped
+
+    def remove_files(self, keep: set[str]) -> set[str]:
+        """
+        Borra las pólizas cuyo archivo de origen no está en `keep` (p. ej.
+        un HTML eliminado o que se volvió a analizar) y devuelve sus
+        números de póliza.
+        """
+        where = f"WHERE {quote(FILE_COLUMN)} NOT IN (SELECT name FROM kept_files)"
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS kept_files (name TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM kept_files")
+            self.connection.executemany("INSERT OR IGNORE INTO kept_files VALUES (?)", ((name,) for name in keep))
+            removed = {
+                row[0] for row in self.connection.execute(f"SELECT {quote(KEY_COLUMN)} FROM policies {where}")
+            }
+            self.connection.execute(f"DELETE FROM policies {where}")
+        return removed
+
+    def _query(self, where: str = "", params=()) -> pd.DataFrame:
+        names = ", ".join(quote(column) for column in self.columns)
+        cursor = self.connection.execute(
+            f"SELECT {names} FROM policies {where} ORDER BY {quote(KEY_COLUMN)}", params
+        )
+        return policy_frame(cursor.fetchall(), self.columns)
+
+    def get(self, policy_number: str) -> dict | None:
+        """
+        Registro de una póliza (None si no existe).
+        """
+        names = ", ".join(quote(column) for column in self.columns)
+        row = self.connection.execute(
+            f"SELECT {names} FROM policies WHERE {quote(KEY_COLUMN)} = ?", (policy_number,)
+        ).fetchone()
+        return dict(zip(self.columns, row)) if row else None
+
+    def find(self, agent: str | None = None, status: str | None = None) -> pd.DataFrame:
+        """
+        Pólizas de un agente y/o con un estatus (coincidencia exacta).
+        """
+        filters = {"agent": agent, "status": status}
+        conditions = [
+            f"{quote(LOOKUP_COLUMNS[name])} = ?" for name, value in filters.items() if value is not None
+        ]
+        params = [value for value in filters.values() if value is not None]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query(where, params)
+
+    def to_frame(self) -> pd.DataFrame:
+        return self._query()
+
+    def export(self, output_file: Path) -> int:
+        """
+        Exporta todas las pólizas en el formato indicado por la extensión.
+        """
+        df = self.to_frame()
+        write_table(df, output_file)
+        return len(df)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# ---------------------
+# SINCRONIZACIÓN
+# ---------------------
+def sync_policy_store(
+    store_path: Path,
+    columns: list[str],
+    records: dict[Path, tuple],
+    parsed: list[Path],
+) -> tuple[pd.DataFrame, int]:
+    """
+    Hace upsert de los registros de los archivos recién analizados (o de
+    todos si la base está vacía, p. ej. la primera vez) y devuelve la
+    tabla deduplicada junto con los registros omitidos por no tener número
+    de póliza.
+
+    `records` tiene los registros de todos los archivos actuales: antes
+    del upsert se borran las pólizas de archivos que ya no están o que se
+    volvieron a analizar, y si otro archivo actual tiene la misma póliza,
+    su registro vuelve a la base.
+    """
+    store = PolicyStore(store_path, columns)
+    if len(store) == 0:
+        files = list(records)
+    else:
+        parsed = set(parsed)
+        removed = store.remove_files({html_file.name for html_file in records if html_file not in parsed})
+        key_index = store.columns.index(KEY_COLUMN)
+        files = [
+            html_file for html_file, record in records.items()
+            if html_file in parsed or record[key_index] in removed
+        ]
+    _, skipped = store.upsert(
+        (records[html_file], html_file.stat().st_mtime_ns) for html_file in files
+    )
+    df = store.to_frame()
+    store.close()
+    return df, skipped
+
+
+# ---------------------
+# PROCESO PRINCIPAL
+# ---------------------
+def main():
+    parser = argparse.ArgumentParser(description="Consultas sobre la base persistente de pólizas.")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE, help="Archivo SQLite de pólizas")
+    parser.add_argument("--policy", help="Número de póliza")
+    parser.add_argument("--agent", help="Agente")
+    parser.add_argument("--status", help="Estatus")
+    parser.add_argument("--export", type=Path, help="Exportar todas las pólizas (.xlsx, .csv, .parquet, .arrow)")
+    args = parser.parse_args()
+
+    if not args.store.exists():
+        parser.error(f"No existe la base {args.store}")
+    store = PolicyStore(args.store)
+
+    if args.export:
+        total = store.export(args.export)
+        print(f"✅ Exportación generada: {args.export} ({total} pólizas)")
+    elif args.policy:
+        record = store.get(args.policy)
+        if record is None:
+            print(f"⚠️ Póliza no encontrada: {args.policy}")
+        else:
+            for column, value in record.items():
+                print(f"{column}: {value}")
+    else:
+        df = store.find(args.agent, args.status)
+        with pd.option_context("display.max_rows", None, "display.width", None):
+            print(df.to_string(index=False) if len(df) else "⚠️ Sin resultados")
+        print(f"📄 Pólizas: {len(df)}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
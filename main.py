@@ -5,20 +5,43 @@ This script orchestrates the execution of data cleaning,
 business calculations, and database construction processes,
 serving as the central control for the project.
 
+The pipeline is declared as a stage graph: every stage lists its inputs,
+outputs and the stages it depends on. Independent stages run concurrently
+in a process pool, stages whose inputs (data and the project modules their
+code imports) did not change since the last successful run are skipped,
+and a wall-clock / peak-memory summary is printed at the end. --format
+selects the storage format the stages hand each other.
+
 Author: Ana Paula Marhx
 """
 
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
 from pathlib import Path
 
+from automation_scripts import instrumentation
+from automation_scripts.resource_usage import isolated_executor, peak_rss_mb
+from automation_scripts.storage import add_storage_arguments, finish_output, with_format
+
 # Data Cleaning
-from data_cleaning.clean_names import clean_names_file
+from data_cleaning.name_normalization import clean_names_file
 
 # Business Calculations
-from business_calculation.flex_calculation import run_flex_calculation
-from business_calculation.tradicional_calculation import run_traditional_calculation
+from automation_scripts.batch_processing_gmm import EXCEL_DATE_FORMAT as GMM_EXCEL_DATE_FORMAT
+from automation_scripts.batch_processing_gmm import process_file as run_gmm_calculation
+from automation_scripts.due_date_index import refresh_index
+from business_calculations.primas_flexibles_calculation import EXCEL_DATE_FORMAT as FLEX_EXCEL_DATE_FORMAT
+from business_calculations.primas_flexibles_calculation import process_file as run_flex_calculation
+from business_calculations.primas_tradicionales_calculation import process_html_folder
 
 # Database Construction
-from database_construction.html_to_database_builder import build_policy_database
+from database_construction.create_clients_database import build_policy_database
 
 
 # ---------------------
@@ -29,45 +52,391 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_RAW = BASE_DIR / "data" / "raw"
 DATA_PROCESSED = BASE_DIR / "data" / "processed"
 
+STATE_FILE = DATA_PROCESSED / "pipeline_state.json"
+
+# Modules imported once by the fork server so each stage worker starts
+# without paying the pandas/lxml import again.
+PRELOAD_MODULES = ["main"]
+
 
 # ---------------------
 # PIPELINE STEPS
 # ---------------------
-def run_data_cleaning():
+# Every step receives the run's storage options (--format, --export-excel),
+# so stages hand each other Parquet/Arrow files instead of round-tripping
+# through Excel, and Excel stays an optional final export.
+def processed(file_name: str, fmt: str) -> Path:
+    """
+    Processed output path with the extension of the run's format.
+    """
+    return with_format(DATA_PROCESSED / file_name, fmt)
+
+
+def run_data_cleaning(storage: argparse.Namespace):
     print("\n🧹 Running data cleaning...")
 
-    input_file = DATA_RAW / "Limpiezanombres.xlsx"
-    output_file = DATA_PROCESSED / "Limpiezanombres_clean.xlsx"
-    column_name = "NOMBRES"
+    output = processed("Limpiezanombres_clean.xlsx", storage.format)
+    clean_names_file(DATA_RAW / "Limpiezanombres.xlsx", output, "NOMBRES")
+    finish_output(output, storage)
+
+
+def run_flex_renewals(storage: argparse.Namespace):
+    print("\n📊 Running flexible products renewals...")
 
-    clean_names_file(input_file, output_file, column_name)
+    output = processed("Renovaciones_Flexibles_processed.xlsx", storage.format)
+    run_flex_calculation(DATA_RAW / "Renovaciones_Flexibles.xlsx", output)
+    finish_output(output, storage, FLEX_EXCEL_DATE_FORMAT)
 
 
-def run_business_calculations():
-    print("\n📊 Running business calculations...")
+def run_gmm_renewals(storage: argparse.Namespace):
+    print("\n📊 Running GMM/Traditional renewals...")
 
-    run_flex_calculation()
-    run_traditional_calculation()
+    output = processed("Renovaciones_GMM_Tradicional_processed.xlsx", storage.format)
+    run_gmm_calculation(DATA_RAW / "Renovaciones_GMM_Tradicional.xlsx", output)
+    finish_output(output, storage, GMM_EXCEL_DATE_FORMAT)
 
 
-def run_database_construction():
+def run_due_date_index(storage: argparse.Namespace):
+    print("\n📅 Updating due-date index...")
+
+    refresh_index(
+        {
+            "gmm": processed("Renovaciones_GMM_Tradicional_processed.xlsx", storage.format),
+            "flexibles": processed("Renovaciones_Flexibles_processed.xlsx", storage.format),
+        },
+        DATA_PROCESSED / "indice_vencimientos.sqlite",
+    )
+
+
+def run_traditional_premiums(storage: argparse.Namespace):
+    print("\n📊 Extracting traditional products premiums...")
+
+    # Final report: always written as Excel.
+    process_html_folder(
+        DATA_RAW / "html_tradicional",
+        DATA_PROCESSED / "polizas_prima_al_cobro.xlsx",
+        DATA_PROCESSED / "polizas_prima_al_cobro_manifest.sqlite",
+    )
+
+
+def run_database_construction(storage: argparse.Namespace):
     print("\n🗄️ Building policy database from HTML files...")
 
-    html_folder = DATA_RAW / "html_clientes"
-    output_file = DATA_PROCESSED / "base_polizas.xlsx"
+    output = processed("base_polizas.xlsx", storage.format)
+    build_policy_database(
+        DATA_RAW / "html_clientes",
+        output,
+        manifest_path=DATA_PROCESSED / "base_polizas_manifest.sqlite",
+        store_path=DATA_PROCESSED / "base_polizas.sqlite",
+    )
+    finish_output(output, storage)
+
+
+# ---------------------
+# STAGE GRAPH
+# ---------------------
+# Every stage lists its entry-point module as an input. Change detection
+# follows that module's project imports (renewal_calendar, date_parsing,
+# storage, html_manifest, ...), so editing any shared business rule also
+# invalidates the previous result.
+def stage_graph(fmt: str = "excel", export_excel: bool = False) -> dict:
+    """
+    Stage inputs, outputs and dependencies for a run writing `fmt` files.
+    With `export_excel`, the Excel export of each output is an output too,
+    so an up-to-date stage still runs when its export is missing.
+    """
+    def outputs(file_name: str) -> list[Path]:
+        formats = [fmt, "excel"] if export_excel and fmt != "excel" else [fmt]
+        return [processed(file_name, output_format) for output_format in formats]
+
+    flex_output = processed("Renovaciones_Flexibles_processed.xlsx", fmt)
+    gmm_output = processed("Renovaciones_GMM_Tradicional_processed.xlsx", fmt)
+
+    return {
+        "data_cleaning": {
+            "run": run_data_cleaning,
+            "inputs": [
+                DATA_RAW / "Limpiezanombres.xlsx",
+                BASE_DIR / "data_cleaning" / "name_normalization.py",
+            ],
+            "outputs": outputs("Limpiezanombres_clean.xlsx"),
+            "depends": [],
+        },
+        "flex_renewals": {
+            "run": run_flex_renewals,
+            "inputs": [
+                DATA_RAW / "Renovaciones_Flexibles.xlsx",
+                BASE_DIR / "business_calculations" / "primas_flexibles_calculation.py",
+            ],
+            "outputs": outputs("Renovaciones_Flexibles_processed.xlsx"),
+            "depends": [],
+        },
+        "gmm_renewals": {
+            "run": run_gmm_renewals,
+            "inputs": [
+                DATA_RAW / "Renovaciones_GMM_Tradicional.xlsx",
+                BASE_DIR / "automation_scripts" / "batch_processing_gmm.py",
+            ],
+            "outputs": outputs("Renovaciones_GMM_Tradicional_processed.xlsx"),
+            "depends": [],
+        },
+        "due_date_index": {
+            "run": run_due_date_index,
+            "inputs": [
+                gmm_output,
+                flex_output,
+                BASE_DIR / "automation_scripts" / "due_date_index.py",
+            ],
+            "outputs": [DATA_PROCESSED / "indice_vencimientos.sqlite"],
+            "depends": ["flex_renewals", "gmm_renewals"],
+        },
+        "traditional_premiums": {
+            "run": run_traditional_premiums,
+            "inputs": [
+                DATA_RAW / "html_tradicional",
+                BASE_DIR / "business_calculations" / "primas_tradicionales_calculation.py",
+            ],
+            "outputs": [DATA_PROCESSED / "polizas_prima_al_cobro.xlsx"],
+            "depends": [],
+        },
+        "policy_database": {
+            "run": run_database_construction,
+            "inputs": [
+                DATA_RAW / "html_clientes",
+                BASE_DIR / "database_construction" / "create_clients_database.py",
+            ],
+            "outputs": [*outputs("base_polizas.xlsx"), DATA_PROCESSED / "base_polizas.sqlite"],
+            "depends": [],
+        },
+    }
+
+
+STAGES = stage_graph()
+
+
+def stage_order(stages: dict, targets: list[str] | None = None) -> list[str]:
+    """
+    Returns the target stages (all by default) and their dependencies in
+    dependency order, rejecting unknown stages and cycles.
+    """
+    order = []
+    visiting = set()
+
+    def visit(name, path=()):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + (name,))}")
+        if name not in stages:
+            raise ValueError(f"Unknown stage: {name}")
+
+        visiting.add(name)
+        for dependency in stages[name]["depends"]:
+            visit(dependency, path + (name,))
+        visiting.discard(name)
+        order.append(name)
+
+    for name in targets or stages:
+        visit(name)
+    return order
+
+
+# ---------------------
+# CHANGE DETECTION
+# ---------------------
+def path_fingerprint(path: Path) -> list:
+    """
+    Size and modification time of a file, or of every file in a folder.
+    """
+    if path.is_dir():
+        return [
+            [str(child.relative_to(path)), child.stat().st_size, child.stat().st_mtime_ns]
+            for child in sorted(path.rglob("*"))
+            if child.is_file()
+        ]
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def module_path(name: str) -> Path | None:
+    """
+    Source file of a project module (None for third-party modules).
+    """
+    path = BASE_DIR.joinpath(*name.split("."))
+    for candidate in (path.with_suffix(".py"), path / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def project_modules(source: Path) -> list[Path]:
+    """
+    A module and every project module it imports, followed transitively.
+    """
+    found = set()
+    pending = [source]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module, *(f"{node.module}.{alias.name}" for alias in node.names)]
+            else:
+                continue
+            pending.extend(module for module in map(module_path, names) if module)
+    return sorted(found)
+
+
+def stage_fingerprint(stage: dict) -> str:
+    paths = []
+    for path in stage["inputs"]:
+        paths.extend(project_modules(path) if path.suffix == ".py" else [path])
+    payload = json.dumps([[str(path), path_fingerprint(path)] for path in paths])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATE_FILE.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+# ---------------------
+# STAGE EXECUTION
+# ---------------------
+def execute_stage(name: str, storage: argparse.Namespace) -> tuple[float, float | None, dict | None]:
+    """
+    Runs one stage inside a pool worker and returns its wall-clock time,
+    the worker's peak RSS and its instrumentation report (None when
+    profiling is off). Each worker runs a single stage, so the peak
+    belongs to that stage alone.
+    """
+    start = time.perf_counter()
+    with instrumentation.profile_stage(name):
+        STAGES[name]["run"](storage)
+    return time.perf_counter() - start, peak_rss_mb(), instrumentation.snapshot()
+
+
+async def run_pipeline(
+    stage_names: list[str],
+    workers: int,
+    force: bool = False,
+    reports: dict | None = None,
+    storage: argparse.Namespace | None = None,
+) -> dict:
+    """
+    Runs the selected stages as soon as their dependencies finish, up to
+    `workers` at a time. Returns {stage: (status, seconds, peak_rss_mb)}
+    and, when given, fills `reports` with each stage's instrumentation.
+    `storage` holds the run's --format / --export-excel options.
+    """
+    storage = storage or argparse.Namespace(format="excel", export_excel=False)
+    stages = stage_graph(storage.format, storage.export_excel)
+    state = load_state()
+    loop = asyncio.get_running_loop()
+    summary = {}
+    tasks = {}
+
+    with isolated_executor(workers, PRELOAD_MODULES) as executor:
+
+        async def run_stage(name):
+            stage = stages[name]
+            dependencies = [tasks[d] for d in stage["depends"] if d in tasks]
+            results = await asyncio.gather(*dependencies)
+            if not all(results):
+                summary[name] = ("blocked", None, None)
+                return False
+
+            missing = [path for path in stage["inputs"] if not path.exists()]
+            if missing:
+                print(f"\n⚠️ {name}: input not found: {missing[0]}")
+                summary[name] = ("failed", None, None)
+                return False
+
+            fingerprint = stage_fingerprint(stage)
+            outputs_ready = all(path.exists() for path in stage["outputs"])
+            if not force and outputs_ready and state.get(name) == fingerprint:
+                print(f"\n♻️ {name}: inputs unchanged, skipped")
+                summary[name] = ("skipped", None, None)
+                return True
+
+            try:
+                elapsed, peak, report = await loop.run_in_executor(executor, execute_stage, name, storage)
+            except Exception as error:
+                print(f"\n⚠️ {name} failed: {error}")
+                summary[name] = ("failed", None, None)
+                return False
+
+            state[name] = fingerprint
+            summary[name] = ("done", elapsed, peak)
+            if reports is not None and report is not None:
+                reports[name] = report
+            return True
 
-    build_policy_database(html_folder, output_file)
+        for name in stage_names:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        await asyncio.gather(*tasks.values())
+
+    save_state(state)
+    return {name: summary[name] for name in stage_names}
+
+
+def print_summary(summary: dict, elapsed: float) -> None:
+    print("\n⏱️ Stage summary")
+    print(f"{'Stage':<22}{'Status':<10}{'Time (s)':>10}{'Peak RSS (MB)':>16}")
+    for name, (status, seconds, peak) in summary.items():
+        seconds = f"{seconds:,.2f}" if seconds is not None else "-"
+        peak = f"{peak:,.1f}" if peak is not None else "-"
+        print(f"{name:<22}{status:<10}{seconds:>10}{peak:>16}")
+    print(f"{'Total':<32}{elapsed:>10,.2f}")
 
 
 # ---------------------
 # MAIN EXECUTION
 # ---------------------
 def main():
+    parser = argparse.ArgumentParser(description="Data automation pipeline.")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="Stages running at the same time",
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(STAGES), default=None,
+        help="Run only these stages (and their dependencies)",
+    )
+    parser.add_argument("--force", action="store_true", help="Run stages even if inputs are unchanged")
+    add_storage_arguments(parser)
+    instrumentation.add_profiling_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args)
+
+    order = stage_order(STAGES, args.stages)
+
     print("🚀 Starting data automation pipeline...\n")
 
-    run_data_cleaning()
-    run_business_calculations()
-    run_database_construction()
+    start = time.perf_counter()
+    reports = {}
+    storage = argparse.Namespace(format=args.format, export_excel=args.export_excel)
+    summary = asyncio.run(run_pipeline(order, args.workers, args.force, reports, storage))
+    print_summary(summary, time.perf_counter() - start)
+
+    if instrumentation.enabled():
+        report = instrumentation.write_report(stages=reports)
+        print(f"\n⏱️ Profiling report: {report}")
+
+    if any(status in ("failed", "blocked") for status, _, _ in summary.values()):
+        print("\n⚠️ Pipeline finished with errors.")
+        sys.exit(1)
 
     print("\n✅ Pipeline completed successfully.")
 
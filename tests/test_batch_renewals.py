@@ -0,0 +1,44 @@
+"""
+Pruebas del procesamiento por lotes de libros (automation_scripts.batch_renewals).
+"""
+
+import pandas as pd
+import pytest
+
+from automation_scripts.batch_renewals import SOURCE_COLUMN, consolidate
+from automation_scripts.storage import read_table, write_table
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".xlsx", ".parquet"])
+def test_consolidate_matches_columns_by_name(tmp_path, suffix):
+    first = pd.DataFrame({"Póliza": ["P1"], "Forma de Pago": ["Anual"]})
+    second = pd.DataFrame({"Forma de Pago": ["Mensual"], "Póliza": ["P2"]})
+    sources = []
+    for name, df in [("norte.xlsx", first), ("sur.xlsx", second)]:
+        output = tmp_path / f"{name}_processed.csv"
+        write_table(df, output)
+        sources.append((tmp_path / name, output))
+
+    output = tmp_path / f"consolidado{suffix}"
+    assert consolidate(sources, output, "DD/MM/YYYY") == 2
+
+    result = read_table(output)
+    assert list(result.columns) == [SOURCE_COLUMN, "Póliza", "Forma de Pago"]
+    assert result["Póliza"].tolist() == ["P1", "P2"]
+    assert result[SOURCE_COLUMN].tolist() == ["norte.xlsx", "sur.xlsx"]
+
+
+def test_consolidate_rejects_different_columns(tmp_path):
+    sources = []
+    for name, df in [
+        ("norte.xlsx", pd.DataFrame({"Póliza": ["P1"], "Forma de Pago": ["Anual"]})),
+        ("sur.xlsx", pd.DataFrame({"Póliza": ["P2"], "Anual": ["01/01/2025"]})),
+    ]:
+        output = tmp_path / f"{name}_processed.csv"
+        write_table(df, output)
+        sources.append((tmp_path / name, output))
+
+    output = tmp_path / "consolidado.csv"
+    with pytest.raises(ValueError, match="columnas distintas"):
+        consolidate(sources, output, "DD/MM/YYYY")
+    assert not output.exists()
@@ -0,0 +1,163 @@
+"""
+Pruebas del índice de vencimientos (automation_scripts.due_date_index):
+las consultas por día y por amparo se comparan con un filtro directo
+sobre las salidas de renovaciones.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from automation_scripts import batch_processing_gmm as gmm
+from automation_scripts.batch_renewals import SOURCE_COLUMN
+from automation_scripts.due_date_index import GRACE_COLUMNS, INSTALLMENT_COLUMN, RENEWAL_COLUMN, DueDateIndex
+from automation_scripts.storage import write_table
+from benchmarks.generators import make_gmm_portfolio
+
+
+START_YEAR, END_YEAR = 2025, 2026
+DAYS = [date(2025, 1, 1) + timedelta(days=offset) for offset in range(0, 730, 23)]
+
+
+def portfolio(rows: int = 120, seed: int = 4) -> tuple[pd.DataFrame, pd.Series]:
+    df = make_gmm_portfolio(rows, seed)
+    issue_dates, valid, _ = gmm.validate_rows(df)
+    return df[valid], issue_dates[valid]
+
+
+@pytest.fixture
+def long_output(tmp_path):
+    df, issue_dates = portfolio()
+    output = pd.concat(list(gmm.iter_schedule_long(df, issue_dates, START_YEAR, END_YEAR)), ignore_index=True)
+    path = tmp_path / "gmm_largo.parquet"
+    write_table(output, path)
+    return output, path
+
+
+@pytest.fixture
+def wide_output(tmp_path):
+    df, issue_dates = portfolio()
+    output = gmm.build_schedule(df.copy(), issue_dates).reset_index(drop=True)
+    path = tmp_path / "gmm_ancho.csv"
+    write_table(output, path)
+    return output, path
+
+
+def indexed(tmp_path, sources: dict) -> DueDateIndex:
+    index = DueDateIndex(tmp_path / "indice.sqlite")
+    index.refresh(sources)
+    return index
+
+
+def keys(df: pd.DataFrame) -> set:
+    return set(zip(df["Fila"], df["Póliza"], df["Concepto"]))
+
+
+def wide_events(output: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vencimientos del formato ancho, fila por fila: cada cuota y, si no
+    coincide con ninguna cuota, la Fecha Renovación; los amparos son los
+    de la renovación.
+    """
+    def parse(value):
+        return pd.to_datetime(value, format="%d/%m/%Y", errors="coerce")
+
+    installments = [column for column in output.columns if INSTALLMENT_COLUMN.match(column)]
+    events = []
+    for fila, row in enumerate(output.itertuples(index=False), start=1):
+        row = dict(zip(output.columns, row))
+        renewal = parse(row[RENEWAL_COLUMN])
+        grace = [parse(row[column]) for column in GRACE_COLUMNS]
+        dates = [(column, parse(row[column])) for column in installments if row[column]]
+        for concept, day in dates:
+            matched = day == renewal
+            events.append((fila, row["Póliza"], concept, day, *(grace if matched else [pd.NaT] * 2)))
+        if pd.notna(renewal) and renewal not in [day for _, day in dates]:
+            events.append((fila, row["Póliza"], RENEWAL_COLUMN, renewal, *grace))
+    return pd.DataFrame(events, columns=["Fila", "Póliza", "Concepto", "Fecha de Pago", *GRACE_COLUMNS])
+
+
+def expected_due(events: pd.DataFrame, day: date) -> set:
+    return keys(events[events["Fecha de Pago"] == pd.Timestamp(day)])
+
+
+def expected_grace(events: pd.DataFrame, day: date) -> set:
+    day = pd.Timestamp(day)
+    return keys(events[(events["Fecha de Pago"] < day) & (events[GRACE_COLUMNS[1]] >= day)])
+
+
+def test_long_layout_queries(tmp_path, long_output):
+    output, path = long_output
+    # Fila es la fila de la salida, no la de la cartera de entrada.
+    events = output.assign(Fila=range(1, len(output) + 1), Concepto="Cuota " + output["No. Cuota"].astype(str))
+    index = indexed(tmp_path, {"gmm": path})
+
+    for day in DAYS:
+        assert keys(index.due(day)) == expected_due(events, day)
+
+        grace = index.in_grace(day)
+        assert keys(grace) == expected_grace(events, day)
+        in_30 = grace[GRACE_COLUMNS[0]] >= pd.Timestamp(day)
+        assert (grace["Ventana"] == in_30.map({True: GRACE_COLUMNS[0], False: GRACE_COLUMNS[1]})).all()
+    index.close()
+
+
+def test_wide_layout_queries(tmp_path, wide_output):
+    output, path = wide_output
+    events = wide_events(output.fillna(""))
+    index = indexed(tmp_path, {"gmm": path})
+
+    assert len(index) == len(events)
+    for day in DAYS:
+        assert keys(index.due(day)) == expected_due(events, day)
+        assert keys(index.in_grace(day)) == expected_grace(events, day)
+    index.close()
+
+
+def test_due_range_and_origin(tmp_path, long_output, wide_output):
+    index = indexed(tmp_path, {"gmm": wide_output[1], "flexibles": long_output[1]})
+    start, end = date(2025, 3, 1), date(2025, 3, 31)
+
+    both = index.due(start, end)
+    assert set(both["Origen"]) == {"gmm", "flexibles"}
+    assert both["Fecha de Pago"].between(pd.Timestamp(start), pd.Timestamp(end)).all()
+    assert both["Fecha de Pago"].is_monotonic_increasing
+    assert len(index.due(start, end, origin="gmm")) + len(index.due(start, end, origin="flexibles")) == len(both)
+    index.close()
+
+
+def test_refresh_reindexes_only_changed_sources(tmp_path, long_output, wide_output):
+    sources = {"gmm": wide_output[1], "flexibles": long_output[1]}
+    index = indexed(tmp_path, sources)
+    total = len(index)
+
+    assert index.refresh(sources) == {}
+
+    write_table(long_output[0].head(10), long_output[1])
+    assert index.refresh(sources) == {"flexibles": 10}
+
+    wide_output[1].unlink()
+    assert index.refresh(sources) == {}
+    assert len(index) == 10 < total
+    assert set(index.due(date(2025, 1, 1), date(2026, 12, 31))["Origen"]) == {"flexibles"}
+    index.close()
+
+
+def test_consolidated_output_keeps_every_workbook(tmp_path, long_output):
+    output, _ = long_output
+    # Cada libro repite los mismos números de fila de entrada.
+    consolidated = pd.concat(
+        [output.assign(**{SOURCE_COLUMN: name}) for name in ["norte.xlsx", "sur.xlsx"]],
+        ignore_index=True,
+    )
+    path = tmp_path / "consolidado.parquet"
+    write_table(consolidated, path)
+
+    index = indexed(tmp_path, {"gmm": path})
+
+    assert len(index) == len(consolidated)
+    day = output["Fecha de Pago"].iloc[0].date()
+    due = index.due(day)
+    assert (due[SOURCE_COLUMN].value_counts() == len(due) // 2).all()
+    index.close()
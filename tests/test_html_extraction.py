@@ -0,0 +1,68 @@
+"""
+Pruebas de la extracción unificada de HTML (database_construction.html_extraction):
+sus salidas deben ser las mismas que las de create_clients_database y
+primas_tradicionales_calculation por separado.
+"""
+
+import pandas as pd
+import pytest
+
+from automation_scripts.storage import read_table
+from benchmarks.generators import write_client_pages, write_grid_pages
+from business_calculations.primas_tradicionales_calculation import process_html_folder
+from database_construction.create_clients_database import build_policy_database
+from database_construction.html_extraction import build_html_outputs
+
+
+@pytest.fixture
+def html_folder(tmp_path):
+    folder = write_client_pages(tmp_path / "html", 6, seed=2, noise_rows=40)
+    write_grid_pages(folder, 4, rows=30, seed=2)
+    (folder / "vacio.html").write_bytes(b"")
+    return folder
+
+
+def premium_table(path) -> pd.DataFrame:
+    df = read_table(path).astype(str)
+    return df.sort_values("Archivo", ignore_index=True)
+
+
+def separate_outputs(folder, tmp_path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    policy, premium = tmp_path / "separado_polizas.csv", tmp_path / "separado_primas.xlsx"
+    build_policy_database(folder, policy)
+    process_html_folder(folder, premium)
+    return read_table(policy), premium_table(premium)
+
+
+def unified_outputs(folder, tmp_path, **options) -> tuple[pd.DataFrame, pd.DataFrame]:
+    output_files = {"policy": tmp_path / "polizas.csv", "premium": tmp_path / "primas.xlsx"}
+    build_html_outputs(folder, output_files, **options)
+    return read_table(output_files["policy"]), premium_table(output_files["premium"])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unified_outputs_match_separate_extractors(html_folder, tmp_path, workers):
+    policy, premium = unified_outputs(html_folder, tmp_path, workers=workers, chunksize=2)
+    expected_policy, expected_premium = separate_outputs(html_folder, tmp_path)
+
+    assert len(premium) == 4
+    pd.testing.assert_frame_equal(policy, expected_policy)
+    pd.testing.assert_frame_equal(premium, expected_premium)
+
+
+def test_manifest_and_store_follow_folder_changes(html_folder, tmp_path):
+    options = {"manifest_path": tmp_path / "manifest.sqlite", "store_path": tmp_path / "polizas.sqlite"}
+    unified_outputs(html_folder, tmp_path, **options)
+
+    sorted(html_folder.glob("cliente_*.html"))[0].unlink()
+    sorted(html_folder.glob("grid_*.html"))[0].unlink()
+    policy, premium = unified_outputs(html_folder, tmp_path, **options)
+
+    expected_policy, expected_premium = separate_outputs(html_folder, tmp_path)
+    pd.testing.assert_frame_equal(premium, expected_premium)
+    # La base de pólizas guarda una fila por póliza, ordenada por número.
+    key = "Número de Póliza"
+    expected_policy = expected_policy[expected_policy[key].notna()].sort_values(key, ignore_index=True)
+    pd.testing.assert_frame_equal(
+        policy.sort_values(key, ignore_index=True), expected_policy, check_dtype=False
+    )
@@ -0,0 +1,78 @@
+"""
+Pruebas del manifiesto incremental de HTML (database_construction.html_manifest).
+"""
+
+import os
+
+from database_construction.html_manifest import HtmlManifest, extractor_signature
+
+
+SIGNATURE = extractor_signature("1", ["Póliza"])
+
+
+def write_files(folder, names: list[str]) -> list:
+    folder.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (folder / name).write_text(f"<html>{name}</html>", encoding="utf-8")
+    return [folder / name for name in names]
+
+
+def stored_manifest(tmp_path, html_files, signature: str = SIGNATURE) -> HtmlManifest:
+    manifest = HtmlManifest(tmp_path / "manifest.sqlite", signature)
+    _, stale = manifest.split(html_files)
+    for html_file in stale:
+        manifest.store(html_file, [html_file.name, "P1"])
+    manifest.close()
+    return HtmlManifest(tmp_path / "manifest.sqlite", signature)
+
+
+def test_unchanged_files_are_reused(tmp_path):
+    html_files = write_files(tmp_path / "html", ["a.html", "b.html"])
+    manifest = stored_manifest(tmp_path, html_files)
+
+    cached, stale = manifest.split(html_files)
+
+    assert stale == []
+    assert cached == {html_file: [html_file.name, "P1"] for html_file in html_files}
+
+
+def test_touched_file_with_same_content_is_reused(tmp_path):
+    html_files = write_files(tmp_path / "html", ["a.html"])
+    manifest = stored_manifest(tmp_path, html_files)
+    os.utime(html_files[0], ns=(1_000, 1_000))
+
+    cached, stale = manifest.split(html_files)
+
+    assert (list(cached), stale) == (html_files, [])
+
+
+def test_modified_and_new_files_are_stale(tmp_path):
+    html_files = write_files(tmp_path / "html", ["a.html", "b.html"])
+    manifest = stored_manifest(tmp_path, html_files)
+    html_files[0].write_text("<html>otro contenido</html>", encoding="utf-8")
+    html_files += write_files(tmp_path / "html", ["c.html"])
+
+    cached, stale = manifest.split(html_files)
+
+    assert list(cached) == [html_files[1]]
+    assert stale == [html_files[0], html_files[2]]
+
+
+def test_new_signature_invalidates_results(tmp_path):
+    html_files = write_files(tmp_path / "html", ["a.html"])
+    stored_manifest(tmp_path, html_files).close()
+
+    manifest = HtmlManifest(tmp_path / "manifest.sqlite", extractor_signature("2", ["Póliza"]))
+
+    assert manifest.split(html_files) == ({}, html_files)
+
+
+def test_prune_drops_deleted_files(tmp_path):
+    html_files = write_files(tmp_path / "html", ["a.html", "b.html", "c.html"])
+    manifest = stored_manifest(tmp_path, html_files)
+    html_files[1].unlink()
+    current = [html_files[0], html_files[2]]
+
+    assert manifest.prune(current) == 1
+    assert manifest.split(current) == ({html_file: [html_file.name, "P1"] for html_file in current}, [])
+    assert manifest.prune(current) == 0
@@ -0,0 +1,70 @@
+"""
+Pruebas del índice de etiquetas de una sola pasada (index_labels sobre
+BeautifulSoup e index_tree_labels sobre lxml) contra la búsqueda original
+por etiqueta de benchmarks.reference_labels.
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from benchmarks.generators import make_client_page
+from benchmarks.reference_labels import extract_record
+from database_construction.create_clients_database import (
+    FIELD_LABELS,
+    PLAN_TAG_ID,
+    extract_policy_data,
+    index_labels,
+    resolve_plan,
+)
+from database_construction.html_extraction import parse_document
+
+
+EDGE_PAGES = {
+    # "Teléfono" (agente) aparece dentro de "Teléfono particular" antes que
+    # su propia celda; "Plan" dentro de "Planes tradicionales".
+    "overlapping": (
+        "<html><body><div>Planes tradicionales</div><table>"
+        "<tr><td>Teléfono particular:</td><td>3312345678</td></tr>"
+        "<tr><td>Teléfono:</td><td>5511112222</td></tr>"
+        "<tr><td>Póliza</td><td><span>  123 </span></td></tr>"
+        "</table></body></html>"
+    ),
+    "empty_plan_span": (
+        f"<html><body><span id='{PLAN_TAG_ID}'> </span>"
+        "<p>Plan</p><div>Plan Dorado</div></body></html>"
+    ),
+    "placeholder_plan": "<html><body><b>Plan:</b><span>Planes</span></body></html>",
+    "label_without_value": "<html><body><table><tr><td>Estatus</td></tr></table></body></html>",
+    "comment": "<!-- Póliza --><html><body><div>999</div><td>Moneda</td><td>MXN</td></body></html>",
+    "empty": "",
+}
+
+
+def indexed_record(values: dict, ids: dict) -> dict:
+    record = {column: values[label] for column, label in FIELD_LABELS.items()}
+    record["Plan"] = resolve_plan(values, ids)
+    return record
+
+
+def assert_matches_reference(tmp_path, page: str) -> None:
+    expected = extract_record(BeautifulSoup(page, "html.parser"))
+
+    soup = BeautifulSoup(page, "html.parser")
+    assert indexed_record(*index_labels(soup, FIELD_LABELS.values(), [PLAN_TAG_ID])) == expected
+
+    html_file = tmp_path / "pagina.html"
+    html_file.write_text(page, encoding="utf-8")
+    assert indexed_record(*parse_document(html_file).labels) == expected
+
+    record, _ = extract_policy_data(html_file)
+    assert record == ("pagina.html", *expected.values())
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_generated_pages_match_reference(tmp_path, seed):
+    assert_matches_reference(tmp_path, make_client_page(seed, noise_rows=60))
+
+
+@pytest.mark.parametrize("name", list(EDGE_PAGES))
+def test_edge_pages_match_reference(tmp_path, name):
+    assert_matches_reference(tmp_path, EDGE_PAGES[name])
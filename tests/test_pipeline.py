@@ -0,0 +1,29 @@
+"""
+Pruebas del grafo de etapas del pipeline (main).
+"""
+
+import main
+
+
+def test_excel_export_is_a_stage_output():
+    stages = main.stage_graph("parquet", export_excel=True)
+
+    for name, file_name in [
+        ("data_cleaning", "Limpiezanombres_clean"),
+        ("flex_renewals", "Renovaciones_Flexibles_processed"),
+        ("gmm_renewals", "Renovaciones_GMM_Tradicional_processed"),
+        ("policy_database", "base_polizas"),
+    ]:
+        outputs = stages[name]["outputs"]
+        assert main.DATA_PROCESSED / f"{file_name}.parquet" in outputs
+        assert main.DATA_PROCESSED / f"{file_name}.xlsx" in outputs
+
+
+def test_no_export_outputs_without_flag():
+    stages = main.stage_graph("parquet")
+
+    excel_outputs = [
+        path.name for stage in stages.values() for path in stage["outputs"] if path.suffix == ".xlsx"
+    ]
+    # Solo el reporte de primas se escribe siempre en Excel.
+    assert excel_outputs == ["polizas_prima_al_cobro.xlsx"]
@@ -0,0 +1,111 @@
+"""
+Pruebas de la base persistente de pólizas (database_construction.policy_store).
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from automation_scripts.storage import read_table
+from benchmarks.generators import write_client_pages
+from database_construction.create_clients_database import build_policy_database
+from database_construction.policy_store import parse_amounts, policy_frame, sync_policy_store
+
+
+COLUMNS = ["Archivo", "Número de Póliza", "Estatus"]
+
+
+def html_files(folder, policies: dict[str, str]) -> dict:
+    """
+    Un archivo por entrada (nombre -> póliza), con fechas de modificación
+    crecientes en el orden dado, y su registro.
+    """
+    records = {}
+    for offset, (name, policy) in enumerate(policies.items()):
+        path = folder / name
+        path.write_text("<html></html>", encoding="utf-8")
+        os.utime(path, ns=(1_700_000_000_000_000_000 + offset, 1_700_000_000_000_000_000 + offset))
+        records[path] = (name, policy, "Vigente")
+    return records
+
+
+def test_sync_drops_policies_of_deleted_files(tmp_path):
+    store = tmp_path / "polizas.sqlite"
+    records = html_files(tmp_path, {f"p{i}.html": f"P{i}" for i in range(5)})
+    df, _ = sync_policy_store(store, COLUMNS, records, list(records))
+    assert len(df) == 5
+
+    deleted = tmp_path / "p2.html"
+    deleted.unlink()
+    del records[deleted]
+    df, _ = sync_policy_store(store, COLUMNS, records, [])
+
+    assert df["Número de Póliza"].tolist() == ["P0", "P1", "P3", "P4"]
+
+
+def test_sync_restores_older_snapshot_when_newest_is_deleted(tmp_path):
+    store = tmp_path / "polizas.sqlite"
+    records = html_files(tmp_path, {"viejo.html": "P1", "nuevo.html": "P1"})
+    df, _ = sync_policy_store(store, COLUMNS, records, list(records))
+    assert df["Archivo"].tolist() == ["nuevo.html"]
+
+    newest = tmp_path / "nuevo.html"
+    newest.unlink()
+    del records[newest]
+    df, _ = sync_policy_store(store, COLUMNS, records, [])
+
+    assert df["Archivo"].tolist() == ["viejo.html"]
+
+
+def test_sync_drops_old_number_of_reparsed_file(tmp_path):
+    store = tmp_path / "polizas.sqlite"
+    records = html_files(tmp_path, {"a.html": "P1", "b.html": "P2"})
+    sync_policy_store(store, COLUMNS, records, list(records))
+
+    changed = tmp_path / "a.html"
+    records[changed] = ("a.html", "P9", "Vigente")
+    df, _ = sync_policy_store(store, COLUMNS, records, [changed])
+
+    assert df["Número de Póliza"].tolist() == ["P2", "P9"]
+
+
+def test_build_policy_database_forgets_deleted_html(tmp_path):
+    folder = write_client_pages(tmp_path / "html", 5, seed=1)
+    output = tmp_path / "base_polizas.csv"
+    options = {"manifest_path": tmp_path / "manifest.sqlite", "store_path": tmp_path / "polizas.sqlite"}
+
+    build_policy_database(folder, output, **options)
+    assert len(read_table(output)) == 5
+
+    removed = sorted(folder.glob("*.html"))[2]
+    removed.unlink()
+    build_policy_database(folder, output, **options)
+
+    result = read_table(output)
+    assert len(result) == 4
+    assert removed.name not in set(pd.Series(result["Archivo"]))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$1,000,000.00 M.N.", 1_000_000.0),
+    ("$ 1,500,000.00", 1_500_000.0),
+    ("MXN 2,500.50", 2_500.5),
+    ("750000 usd", 750_000.0),
+    ("-1,200", -1_200.0),
+])
+def test_parse_amounts_reads_currency_formats(text, expected):
+    assert parse_amounts([text]).tolist() == [expected]
+
+
+@pytest.mark.parametrize("text", ["1.500.000,00", "500 mil", "12,34", "1,000.00.00", ""])
+def test_parse_amounts_does_not_guess(text):
+    assert parse_amounts([text]).isna().all()
+
+
+def test_policy_frame_keeps_text_of_unrecognized_amounts(capsys):
+    amounts = ["$1,000,000.00 M.N.", "1.500.000,00", "500 mil"]
+    df = policy_frame([(amount,) for amount in amounts], ["Suma Asegurada"])
+
+    assert df["Suma Asegurada"].tolist() == amounts
+    assert "2 montos con formato no reconocido" in capsys.readouterr().out
@@ -0,0 +1,87 @@
+"""
+Pruebas de la extracción incremental de primas tradicionales
+(business_calculations.primas_tradicionales_calculation) contra la
+versión original con BeautifulSoup de benchmarks.bench_premium_stream.
+"""
+
+import pytest
+
+from benchmarks.bench_premium_stream import legacy_extract
+from benchmarks.generators import make_grid_page
+from business_calculations import primas_tradicionales_calculation as premiums
+from database_construction.html_encoding import FALLBACK_ENCODING, TRIAL_BYTES
+
+
+def grid_row(policy: str, premium: str) -> str:
+    cells = [f"<td>{i}</td>" for i in range(premiums.PREMIUM_COLUMN_INDEX + 2)]
+    cells[1] = f"<td><a id='ctl00_grid_ctl01_lnkPoliza'>{policy}</a></td>"
+    cells[premiums.PREMIUM_COLUMN_INDEX] = f"<td>{premium}</td>"
+    return f"<tr class='GridRow'>{''.join(cells)}</tr>"
+
+
+EDGE_PAGES = {
+    "no_valid_row": "<html><body><table><tr class='GridRow'><td>1</td></tr></table></body></html>",
+    "hidden_text": (
+        "<html><body><table>"
+        + grid_row(" 42 <script>var x = 1;</script>", " $ 1,200.00 <style>td {}</style><!-- nota -->")
+        + "</table></body></html>"
+    ),
+    "nested_rows": (
+        "<html><body><table><tr class='GridRow Alt'><td><table>"
+        + grid_row("7", "$ 10.00")
+        + "</table></td>" + "<td>x</td>" * premiums.PREMIUM_COLUMN_INDEX
+        + "<td><a id='lnkPoliza'>8</a></td></tr></table></body></html>"
+    ),
+    "short_row": (
+        "<html><body><table><tr class='GridRow'><td><a id='x_lnkPoliza'>9</a></td></tr>"
+        "</table></body></html>"
+    ),
+    "empty": "",
+}
+
+
+def write_page(tmp_path, page: str, encoding: str):
+    html_file = tmp_path / "grid.html"
+    html_file.write_text(page, encoding=encoding)
+    return html_file
+
+
+@pytest.mark.parametrize("rows, first_valid", [(5, 0), (400, 399), (800, 700), (50, 50)])
+@pytest.mark.parametrize("encoding", ["latin-1", "utf-8"])
+def test_grid_pages_match_reference(tmp_path, rows, first_valid, encoding):
+    page = make_grid_page(rows, first_valid, seed=rows)
+    html_file = write_page(tmp_path, page, encoding)
+
+    result, _ = premiums.extract_premium_file(html_file)
+
+    assert result == legacy_extract(page, "grid.html")
+
+
+@pytest.mark.parametrize("name", list(EDGE_PAGES))
+def test_edge_pages_match_reference(tmp_path, name):
+    html_file = write_page(tmp_path, EDGE_PAGES[name], "utf-8")
+
+    result, _ = premiums.extract_premium_file(html_file)
+
+    assert result == legacy_extract(EDGE_PAGES[name], "grid.html")
+
+
+def test_small_chunks_match_reference(monkeypatch):
+    page = make_grid_page(200, 120, seed=3)
+    monkeypatch.setattr(premiums, "STREAM_CHUNK_SIZE", 7)
+
+    assert premiums.extract_premium_data(page, "grid.html") == legacy_extract(page, "grid.html")
+
+
+def test_late_invalid_utf8_falls_back_to_latin1(tmp_path):
+    # UTF-8 válido en el bloque de prueba y un byte latin-1 más adelante.
+    filler = "<!-- ñ -->" * (TRIAL_BYTES // 8)
+    page = f"<html><body>{filler}<table>{grid_row('55', 'Año $ 3.00')}</table></body></html>"
+    html_file = tmp_path / "grid.html"
+    html_file.write_bytes(page.encode("utf-8").replace("Año".encode("utf-8"), "Año".encode("latin-1")))
+
+    result, encoding = premiums.extract_premium_file(html_file)
+
+    assert encoding == FALLBACK_ENCODING
+    assert result == ("grid.html", "55", "Año $ 3.00")
+    assert result == legacy_extract(premiums.read_html_file(html_file), "grid.html")
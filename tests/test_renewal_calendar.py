@@ -0,0 +1,34 @@
+"""
+Pruebas de la caché de calendarios (automation_scripts.renewal_calendar).
+"""
+
+import numpy as np
+
+from automation_scripts.renewal_calendar import ScheduleCache
+
+
+def compute(codes: np.ndarray) -> np.ndarray:
+    return np.stack([codes, codes * 10], axis=1)
+
+
+def test_empty_lookup_keeps_table():
+    cache = ScheduleCache()
+    codes = np.array([1, 3, 3, 5])
+
+    cache.rows("gmm", codes, compute)
+    assert cache.rows("gmm", codes[:0], compute).shape == (0, 2)
+    result = cache.rows("gmm", codes, compute)
+
+    np.testing.assert_array_equal(result, compute(codes))
+    assert (cache.hits, cache.misses) == (5, 3)
+
+
+def test_evicts_least_recently_used_table():
+    cache = ScheduleCache(max_cells=30)
+    cache.rows("a", np.arange(6), compute)
+    cache.rows("b", np.arange(6), compute)
+    cache.rows("a", np.arange(3), compute)
+    cache.rows("c", np.arange(6), compute)
+
+    assert list(cache.tables) == ["a", "c"]
+    assert cache.evictions == 1
@@ -0,0 +1,184 @@
+"""
+Pruebas de regresión de los calendarios de renovación.
+
+Comparan el motor vectorizado de batch_processing_gmm y
+primas_flexibles_calculation, en formato ancho y largo, contra las
+implementaciones fila por fila de benchmarks.reference_schedules sobre
+carteras sintéticas con semilla y sobre días de cobro límite (0 o
+negativos, mayores a 31, fraccionarios, vacíos y texto).
+
+Renewal schedule regression tests.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from automation_scripts import batch_processing_gmm as gmm
+from benchmarks import reference_schedules as reference
+from benchmarks.generators import make_flex_portfolio, make_gmm_portfolio
+from business_calculations import primas_flexibles_calculation as flex
+
+
+SEEDS = [0, 1, 2]
+HORIZONS = [(2025, 2026), (2024, 2027)]
+ROWS = 300
+LONG_BATCH = 37  # Bloques pequeños para cubrir el corte entre bloques
+
+# Fechas de emisión en fin de mes, bisiestas y principio de año
+EDGE_ISSUE_DATES = ["31/01/2020", "28/02/2019", "30/04/2021", "31/12/2018", "01/01/2022", "15/06/2017"]
+NUMERIC_EDGE_DAYS = [0, -3, 32, 45, 15.7, np.nan, 0.5, 31.9, 31, 29, 1]
+TEXT_EDGE_DAYS = [0, -3, 32, 45, 15.7, None, "", "abc", "12", " 7 ", "15.5", 30]
+
+
+def edge_portfolio(days: list, frequencies: list[str]) -> pd.DataFrame:
+    """
+    Cartera con cada día de cobro combinado con cada fecha de emisión y
+    forma de pago.
+    """
+    rows = [
+        (day, issue, frequency)
+        for day in days
+        for issue in EDGE_ISSUE_DATES
+        for frequency in frequencies
+    ]
+    return pd.DataFrame({
+        "Póliza": [f"E{i:05d}" for i in range(len(rows))],
+        "Fecha Emisión": [issue for _, issue, _ in rows],
+        "Día de Cobro": pd.Series([day for day, _, _ in rows], dtype=object),
+        "Forma de Pago": [frequency for _, _, frequency in rows],
+    })
+
+
+def valid_rows(module, df: pd.DataFrame, *args) -> tuple[pd.DataFrame, pd.Series, pd.DataFrame]:
+    """
+    Filas que pasan validate_rows, con sus fechas de emisión, como en process_file.
+    """
+    issue_dates, valid, report = module.validate_rows(df, *args)
+    return df[valid], issue_dates[valid], report
+
+
+def reference_dates(df: pd.DataFrame) -> pd.Series:
+    return df["Fecha Emisión"].map(reference.parse_issue_date)
+
+
+def long_schedule(module, df, issue_dates, start_year, end_year) -> pd.DataFrame:
+    blocks = module.iter_schedule_long(df, issue_dates, start_year, end_year, batch_size=LONG_BATCH)
+    return pd.concat(list(blocks), ignore_index=True)
+
+
+def assert_same_cells(result: pd.DataFrame, expected: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+# ---------------------
+# GMM / TRADICIONAL
+# ---------------------
+@pytest.mark.parametrize("seed", SEEDS)
+def test_gmm_wide_matches_reference(seed):
+    df, issue_dates, _ = valid_rows(gmm, make_gmm_portfolio(ROWS, seed))
+
+    result = gmm.build_schedule(df.copy(), issue_dates)
+    expected = reference.gmm_wide_schedule(df.copy(), reference_dates(df))
+
+    assert_same_cells(result, expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("start_year, end_year", HORIZONS)
+def test_gmm_long_matches_reference(seed, start_year, end_year):
+    df, issue_dates, _ = valid_rows(gmm, make_gmm_portfolio(ROWS, seed))
+
+    result = long_schedule(gmm, df, issue_dates, start_year, end_year)
+    expected = reference.gmm_long_schedule(df, reference_dates(df), start_year, end_year)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("days", [NUMERIC_EDGE_DAYS, TEXT_EDGE_DAYS], ids=["numeric", "text"])
+def test_gmm_edge_payment_days(days):
+    portfolio = edge_portfolio(days, list(gmm.PAYMENT_COLUMNS))
+    if days is NUMERIC_EDGE_DAYS:
+        portfolio["Día de Cobro"] = portfolio["Día de Cobro"].astype("float64")
+    df, issue_dates, report = valid_rows(gmm, portfolio)
+
+    # Un Día de Cobro inválido no es error en GMM: se usa el día de emisión.
+    assert report.empty
+    assert_same_cells(
+        gmm.build_schedule(df.copy(), issue_dates),
+        reference.gmm_wide_schedule(df.copy(), reference_dates(df)),
+    )
+    pd.testing.assert_frame_equal(
+        long_schedule(gmm, df, issue_dates, gmm.START_YEAR, gmm.END_YEAR),
+        reference.gmm_long_schedule(df, reference_dates(df)),
+    )
+
+
+# ---------------------
+# PRODUCTOS FLEXIBLES
+# ---------------------
+@pytest.mark.parametrize("seed", SEEDS)
+def test_flex_wide_matches_reference(seed):
+    df, issue_dates, _ = valid_rows(flex, make_flex_portfolio(ROWS, seed))
+
+    result = flex.build_schedule(df.copy(), issue_dates)
+    expected = reference.flex_wide_schedule(df.copy(), reference_dates(df))
+
+    assert_same_cells(result, expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("start_year, end_year", HORIZONS)
+def test_flex_long_matches_reference(seed, start_year, end_year):
+    df, issue_dates, _ = valid_rows(flex, make_flex_portfolio(ROWS, seed), start_year)
+
+    result = long_schedule(flex, df, issue_dates, start_year, end_year)
+    expected = reference.flex_long_schedule(df, reference_dates(df), start_year, end_year)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_flex_edge_numeric_payment_days():
+    portfolio = edge_portfolio(NUMERIC_EDGE_DAYS, flex.PAYMENT_TYPES)
+    portfolio["Día de Cobro"] = portfolio["Día de Cobro"].astype("float64")
+    df, issue_dates, report = valid_rows(flex, portfolio)
+
+    assert report.empty
+    assert_same_cells(
+        flex.build_schedule(df.copy(), issue_dates),
+        reference.flex_wide_schedule(df.copy(), reference_dates(df)),
+    )
+    pd.testing.assert_frame_equal(
+        long_schedule(flex, df, issue_dates, flex.START_YEAR, flex.END_YEAR),
+        reference.flex_long_schedule(df, reference_dates(df)),
+    )
+
+
+def test_flex_text_payment_days_are_reported():
+    portfolio = edge_portfolio(TEXT_EDGE_DAYS, flex.PAYMENT_TYPES)
+    df, issue_dates, report = valid_rows(flex, portfolio)
+
+    # Solo el texto no numérico es error; las celdas vacías valen 0.
+    assert set(report["Valor"]) == {"abc"}
+    assert set(report["Motivo"]) == {"Día de Cobro no numérico"}
+    assert len(df) == len(portfolio) - len(report)
+
+    # La referencia espera una columna numérica (como al leer Excel).
+    numeric = df.copy()
+    numeric["Día de Cobro"] = pd.to_numeric(df["Día de Cobro"].astype(str).str.strip(), errors="coerce")
+    assert_same_cells(
+        flex.build_schedule(df.copy(), issue_dates).drop(columns="Día de Cobro"),
+        reference.flex_wide_schedule(numeric.copy(), reference_dates(df)).drop(columns="Día de Cobro"),
+    )
+    pd.testing.assert_frame_equal(
+        long_schedule(flex, df, issue_dates, flex.START_YEAR, flex.END_YEAR),
+        reference.flex_long_schedule(numeric, reference_dates(df)),
+    )
+
+
+def test_flex_feb_29_is_reported():
+    portfolio = make_flex_portfolio(20, 0)
+    portfolio.loc[4, "Fecha Emisión"] = "29/02/2020"
+    _, _, report = valid_rows(flex, portfolio)
+
+    assert report["Fila"].tolist() == [5]
@@ -0,0 +1,65 @@
+"""
+Pruebas de la capa de almacenamiento (automation_scripts.storage).
+"""
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from automation_scripts.storage import TableWriter, iter_table_batches, read_table
+
+
+FORMATS = [".csv", ".xlsx", ".parquet", ".arrow"]
+
+
+def batch(policies: list[str], frequency: str) -> pd.DataFrame:
+    return pd.DataFrame({"Póliza": policies, "Forma de Pago": frequency, "Día de Cobro": 5})
+
+
+@pytest.mark.parametrize("suffix", FORMATS)
+def test_table_writer_aligns_columns_to_first_batch(tmp_path, suffix):
+    path = tmp_path / f"salida{suffix}"
+    shuffled = batch(["P3"], "Anual")[["Forma de Pago", "Día de Cobro", "Póliza"]]
+
+    with TableWriter(path) as writer:
+        writer.write(batch(["P1", "P2"], "Mensual"))
+        writer.write(shuffled)
+
+    result = read_table(path)
+    assert list(result.columns) == ["Póliza", "Forma de Pago", "Día de Cobro"]
+    assert result["Póliza"].tolist() == ["P1", "P2", "P3"]
+    assert result["Forma de Pago"].tolist() == ["Mensual", "Mensual", "Anual"]
+
+
+@pytest.mark.parametrize("suffix", FORMATS)
+def test_table_writer_rejects_different_columns(tmp_path, suffix):
+    path = tmp_path / f"salida{suffix}"
+
+    with pytest.raises(ValueError, match="columnas distintas"):
+        with TableWriter(path) as writer:
+            writer.write(batch(["P1"], "Mensual"))
+            writer.write(batch(["P2"], "Anual").rename(columns={"Día de Cobro": "Dia"}))
+
+    assert not path.exists()
+
+
+def test_excel_batches_skip_trailing_blank_rows(tmp_path):
+    path = tmp_path / "cartera.xlsx"
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(["Póliza", "Fecha Emisión"])
+    sheet.append(["P1", "01/01/2020"])
+    sheet.append([None, None])
+    sheet.append(["P2", "15/06/2021"])
+    # Celdas con formato pero sin valor debajo de los datos
+    for row in range(5, 12):
+        sheet.cell(row=row, column=1).font = Font(bold=True)
+    wb.save(path)
+
+    result = pd.concat(list(iter_table_batches(path, batch_size=2)))
+
+    expected = pd.read_excel(path)
+    assert result["Póliza"].fillna("").tolist() == ["P1", "", "P2"]
+    assert len(result) == len(expected)
+    assert result.index.tolist() == expected.index.tolist()